@@ -13,8 +13,23 @@ def create_app():
     db.init_app(app)
     migrate.init_app(app, db)
 
+    from . import metrics, token_vault
+    token_vault.init_app(app)
+    metrics.init_app(app)
+
     from . import routes
     app.register_blueprint(routes.bp)
 
+    # registers the background job handlers
+    from . import jobs, tasks
+    jobs.init_app(app)
+
+    from .commands import register_commands
+    register_commands(app)
+
+    if app.config.get("NLP_WARM_UP"):
+        from .resume_checker import warm_up
+        warm_up(app.config.get("MATCHER_CACHE_DIR") or app.instance_path)
+
     return app
 
@@ -0,0 +1,189 @@
+import threading
+import time
+import traceback
+
+import numpy as np
+from flask import current_app
+from scipy import sparse
+
+from . import db, vocabulary
+from .models import Repository, ResumeData
+
+# Every resume skill and commit topic, by vocabulary ID. Repo languages are matched against it lowercased.
+INDEX = vocabulary.SKILL_IDS
+VOCABULARY = [vocabulary.NAMES.get(i) for i in range(vocabulary.SIZE)]
+
+
+def skill_ids(skills):
+    """
+    Sorted vocabulary IDs of the known skills in an iterable of names. Unknown names are dropped.
+    """
+    return np.array(vocabulary.ids_of(vocabulary.to_bits(skill for skill in skills if skill)), dtype=np.int32)
+
+
+class SkillGraph:
+    """
+    Sparse skill co-occurrence counts over all users: entry (i, j) is the number of users showing both skill i
+    and skill j, the diagonal how many show skill i. A user's skills go in as a 0/1 vector, so scoring is one
+    sparse matrix-vector product against the cosine-normalised matrix, and changing one user only adds and
+    subtracts the outer products of their old and new skills.
+    """
+
+    def __init__(self, user_skills=None, size=vocabulary.SIZE):
+        self.size = size
+        self.users = dict(user_skills or {})
+        self._lock = threading.Lock()
+        self._similarity = None
+        # while a replacement is built: {user_id: ids} updated since, then the replacement itself
+        self._changes = None
+        self._successor = None
+        self.built_at = time.monotonic()
+
+        rows, cols = [], []
+        for row, ids in enumerate(self.users.values()):
+            rows.append(np.full(len(ids), row, dtype=np.int32))
+            cols.append(ids)
+        rows = np.concatenate(rows) if rows else np.array([], dtype=np.int32)
+        cols = np.concatenate(cols) if cols else np.array([], dtype=np.int32)
+        # users x skills, one 1 per skill shown
+        users = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(len(self.users), size))
+        self.cooccurrence = (users.T @ users).tocsr()
+
+    def _outer(self, ids, sign):
+        """
+        Sparse sign * (v v^T) for the 0/1 vector v with ones at ids.
+        """
+        rows = np.repeat(ids, len(ids))
+        cols = np.tile(ids, len(ids))
+        data = np.full(len(rows), sign, dtype=np.float32)
+        return sparse.csr_matrix((data, (rows, cols)), shape=(self.size, self.size))
+
+    def update_user(self, user_id, ids):
+        """
+        Replaces one user's skills, adjusting the counts in place of a rebuild.
+        """
+        with self._lock:
+            successor = self._successor
+            if successor is None:
+                if self._changes is not None:
+                    self._changes[user_id] = ids
+                self._update(user_id, ids)
+        if successor is not None:
+            # a caller that got this graph before it was replaced
+            successor.update_user(user_id, ids)
+
+    def _update(self, user_id, ids):
+        old = self.users.get(user_id)
+        if old is not None and np.array_equal(old, ids):
+            return
+        delta = self._outer(ids, 1)
+        if old is not None:
+            delta = delta + self._outer(old, -1)
+        self.cooccurrence = self.cooccurrence + delta
+        self.cooccurrence.eliminate_zeros()
+        self.users[user_id] = ids
+        self._similarity = None
+
+    def similarity(self):
+        """
+        Co-occurrence normalised to cosine similarity, count(i, j) / sqrt(count(i) * count(j)), with a zero diagonal.
+        Recomputed after updates, on the next score.
+        """
+        with self._lock:
+            if self._similarity is None:
+                counts = self.cooccurrence.diagonal()
+                scale = sparse.diags(np.divide(1.0, np.sqrt(counts), out=np.zeros_like(counts), where=counts > 0))
+                similarity = (scale @ self.cooccurrence @ scale).tolil()
+                similarity.setdiag(0)
+                similarity = similarity.tocsr()
+                similarity.eliminate_zeros()
+                self._similarity = similarity
+            return self._similarity
+
+    def adjacent(self, ids, limit=10):
+        """
+        Skills the user doesn't show, ranked by summed similarity to the ones they do, as [(skill, score)].
+        """
+        vector = np.zeros(self.size, dtype=np.float32)
+        vector[ids] = 1
+        scores = self.similarity() @ vector
+        scores[ids] = 0
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(scores[candidates], -limit)[-limit:]]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(VOCABULARY[i], round(float(scores[i]), 4)) for i in ranked]
+
+
+def load_user_skills():
+    """
+    {user_id: skill ids} for every user, from resume skill bitsets and repo topics and languages.
+    Reads the columns only, without loading ORM objects.
+    """
+    bits = {}
+    for user_id, packed, extracted in db.session.query(ResumeData.user_id, ResumeData.extracted_bits,
+                                                       ResumeData.extracted_skills):
+        bits[user_id] = bits.get(user_id, 0) | vocabulary.stored_bits(packed, extracted)
+    for user_id, topics, languages in db.session.query(Repository.user_id, Repository.commit_summary, Repository.languages):
+        bits[user_id] = bits.get(user_id, 0) | vocabulary.to_bits((topics or []) + (languages or []))
+    return {user_id: np.array(vocabulary.ids_of(user_bits), dtype=np.int32) for user_id, user_bits in bits.items()}
+
+
+_graph = None
+_graph_lock = threading.Lock()
+# the thread building the next graph, if one is
+_rebuild = None
+
+
+def get_graph(max_age=3600):
+    """
+    The process wide SkillGraph, built from the database on first use. Once it is max_age seconds old a new one is
+    built on a background thread, to pick up other processes' changes, while the old one keeps serving. Changes made
+    in this process are applied with update_user.
+    """
+    global _graph, _rebuild
+    with _graph_lock:
+        if _graph is None:
+            _graph = SkillGraph(load_user_skills())
+        elif time.monotonic() - _graph.built_at > max_age and _rebuild is None:
+            with _graph._lock:
+                _graph._changes = {}
+            _rebuild = threading.Thread(target=rebuild_graph, args=(current_app._get_current_object(), _graph),
+                                        name="skillsync-skill-graph", daemon=True)
+            _rebuild.start()
+        return _graph
+
+
+def rebuild_graph(app, old):
+    """
+    Builds a graph from the database without holding any lock, then swaps it in for old. Updates made to old in
+    the meantime are applied to the new graph first, and ones made to old afterwards are passed on to it.
+    """
+    global _graph, _rebuild
+    try:
+        with app.app_context():
+            try:
+                graph = SkillGraph(load_user_skills())
+            finally:
+                db.session.remove()
+        with _graph_lock, old._lock:
+            for user_id, ids in old._changes.items():
+                graph.update_user(user_id, ids)
+            old._successor = graph
+            if _graph is old:
+                _graph = graph
+    except Exception:
+        traceback.print_exc()
+        with old._lock:
+            old._changes = None
+        # try again on a later request
+        old.built_at = time.monotonic()
+    finally:
+        with _graph_lock:
+            _rebuild = None
+
+
+def reset_graph():
+    global _graph
+    with _graph_lock:
+        _graph = None
@@ -0,0 +1,112 @@
+import json
+import os
+import time
+from collections import Counter
+from itertools import groupby
+
+from flask import current_app
+
+from . import db, rollups, tfidf
+from .extraction import extract_file
+from .models import User, ResumeData
+from .resume_checker import get_nlp, parse_lines
+
+
+def user_id_from_filename(path):
+    """
+    Reads the user id off an uploaded resume's name. The dashboard saves uploads as <user_id>_<filename>.
+    """
+    prefix = os.path.basename(path).split("_", 1)[0]
+    if not prefix.isdigit():
+        raise ValueError(f"{path} is not named <user_id>_<filename>")
+    return int(prefix)
+
+
+def load_checkpoint(checkpoint_path):
+    """
+    Returns the set of paths a previous run already stored.
+    """
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return set()
+    with open(checkpoint_path) as f:
+        return {json.loads(line)["path"] for line in f if line.strip()}
+
+
+def save_resumes(results):
+    """
+    Writes a batch of (user_id, path, extracted, supported, gaps, skill counts) results, creating or overwriting
+    each user's ResumeData row, TF-IDF document and rollup contribution, with one query for the existing rows and one commit.
+    """
+    user_ids = [result[0] for result in results]
+    existing = {resume.user_id: resume for resume in ResumeData.query.filter(ResumeData.user_id.in_(user_ids))}
+    for user_id, path, extracted_skills, supported_skills, skill_gaps, skill_counts in results:
+        resume = existing.get(user_id)
+        if resume is None:
+            resume = ResumeData(user_id=user_id)
+            existing[user_id] = resume
+            db.session.add(resume)
+        resume.og_filename = path
+        resume.extracted_skills = extracted_skills
+        resume.supported_skills = supported_skills
+        resume.skill_gaps = skill_gaps
+        resume.skill_counts = skill_counts
+    User.query.filter(User.id.in_(user_ids)).update({"resume_uploaded": True}, synchronize_session=False)
+    tfidf.index_users(user_ids)
+    rollups.index_users(user_ids)
+    db.session.commit()
+
+
+def parse_resumes(resumes, batch_size=1000, n_process=1, commit_every=100, checkpoint_path=None):
+    """
+    Parses many resumes and stores them. `resumes` is an iterable of (user_id, path).
+    Text is extracted with extract_file and every resume's lines go through one nlp.pipe call
+    (`batch_size` lines per batch, tokenized on `n_process` processes). Results are written every `commit_every` resumes,
+    and the stored paths are appended to `checkpoint_path` so an interrupted run can be resumed by running it again.
+    Returns counts and throughput.
+    """
+    done = load_checkpoint(checkpoint_path)
+    stats = {"parsed": 0, "skipped": 0, "failed": []}
+    pending = []
+
+    def lines():
+        """
+        Yields (line, resume index) for every resume still to be parsed. Every resume yields at least one line.
+        """
+        for user_id, path in resumes:
+            path = os.path.abspath(path)
+            if path in done:
+                stats["skipped"] += 1
+                continue
+            text = extract_file(path, config=current_app.config)
+            if text == "":
+                stats["failed"].append(path)
+                continue
+            pending.append((user_id, path))
+            for line in text.splitlines(keepends=True) or [""]:
+                yield line, len(pending) - 1
+
+    def flush(results):
+        save_resumes(results)
+        if checkpoint_path:
+            with open(checkpoint_path, "a") as f:
+                for _, path, *_ in results:
+                    f.write(json.dumps({"path": path}) + "\n")
+        stats["parsed"] += len(results)
+
+    start = time.perf_counter()
+    docs = get_nlp().pipe(lines(), as_tuples=True, batch_size=batch_size, n_process=n_process)
+    results = []
+    for index, group in groupby(docs, key=lambda item: item[1]):
+        user_id, path = pending[index]
+        skill_counts = Counter()
+        extracted_skills, supported_skills, skill_gaps = parse_lines((doc for doc, _ in group), skill_counts)
+        results.append((user_id, path, extracted_skills, supported_skills, skill_gaps, dict(skill_counts)))
+        if len(results) >= commit_every:
+            flush(results)
+            results = []
+    if results:
+        flush(results)
+
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    stats["resumes_per_sec"] = round(stats["parsed"] / stats["seconds"], 2) if stats["seconds"] else None
+    return stats
@@ -0,0 +1,134 @@
+import json
+import uuid
+
+import click
+import requests
+from flask import current_app
+from flask.cli import with_appcontext
+
+from . import db, jobs, rollups, tfidf, webhooks
+from .models import User
+from .token_vault import vault
+from .batch_resume import parse_resumes, user_id_from_filename
+
+
+@click.command("parse-resumes")
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("--batch-size", default=1000, show_default=True, help="Lines per nlp.pipe batch.")
+@click.option("--n-process", default=1, show_default=True, help="Tokenizer processes.")
+@click.option("--commit-every", default=100, show_default=True, help="Resumes per database write.")
+@click.option("--checkpoint", type=click.Path(dir_okay=False), help="File recording stored resumes, to resume an interrupted run.")
+@with_appcontext
+def parse_resumes_command(paths, batch_size, n_process, commit_every, checkpoint):
+    """
+    Parse resume files named <user_id>_<filename> and store them.
+    """
+    resumes = [(user_id_from_filename(path), path) for path in paths]
+    stats = parse_resumes(resumes, batch_size=batch_size, n_process=n_process,
+                          commit_every=commit_every, checkpoint_path=checkpoint)
+    click.echo(f"parsed {stats['parsed']}, skipped {stats['skipped']} already stored, failed {len(stats['failed'])}")
+    for path in stats["failed"]:
+        click.echo(f"  could not extract text from {path}")
+    click.echo(f"{stats['seconds']}s, {stats['resumes_per_sec']} resumes/sec")
+
+
+@click.command("rebuild-tfidf")
+@with_appcontext
+def rebuild_tfidf_command():
+    """
+    Recount the TF-IDF document frequencies from every user's resume and commits.
+    """
+    frequencies = tfidf.rebuild()
+    db.session.commit()
+    click.echo(f"{frequencies.documents} documents, {int((frequencies.frequencies > 0).sum())} skills seen")
+
+
+@click.command("check-rollups")
+@click.option("--rebuild", is_flag=True, help="Replace the rollups with a recount and commit.")
+@click.option("--batch-size", default=1000, show_default=True, help="Users per recount query.")
+@with_appcontext
+def check_rollups_command(rebuild, batch_size):
+    """
+    Recount the analytics rollups from every user's resume and repos and compare them with the stored ones.
+    Exits 1 on a mismatch unless --rebuild replaced them.
+    """
+    mismatches = rollups.verify(batch_size)
+    for kind, name, stored, recounted in mismatches[:50]:
+        click.echo(f"  {kind} {name}: stored {stored}, recounted {recounted}")
+    click.echo(f"{len(mismatches)} rollups differ from a recount")
+    if rebuild:
+        totals = rollups.rebuild(batch_size)
+        db.session.commit()
+        click.echo(f"rebuilt {len(totals)} rollups")
+    elif mismatches:
+        raise SystemExit(1)
+
+
+@click.command("rotate-tokens")
+@click.option("--batch-size", default=500, show_default=True, help="Users per batch, each committed on its own.")
+@with_appcontext
+def rotate_tokens_command(batch_size):
+    """
+    Re-encrypt every stored access token under the first of ENCRYPTION_KEYS, so older keys can be dropped.
+    Safe to rerun after an interruption.
+    """
+    table = User.__table__
+    rotated, after = 0, 0
+    while True:
+        rows = db.session.execute(db.select(table.c.id, table.c.access_token)
+                                  .where(table.c.id > after, table.c.access_token.is_not(None))
+                                  .order_by(table.c.id).limit(batch_size)).all()
+        if not rows:
+            break
+        db.session.execute(table.update().where(table.c.id == db.bindparam("user_id"))
+                           .values(access_token=db.bindparam("token")),
+                           [{"user_id": user_id, "token": vault.rotate(token)} for user_id, token in rows])
+        db.session.commit()
+        rotated += len(rows)
+        after = rows[-1][0]
+    click.echo(f"re-encrypted {rotated} access tokens")
+
+
+@click.command("replay-webhook")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--event", help="X-GitHub-Event header, guessed from the payload if left out.")
+@click.option("--url", help="Post to this /github/webhook URL instead of this app in process.")
+@with_appcontext
+def replay_webhook_command(path, event, url):
+    """
+    Sign a recorded GitHub webhook payload with GITHUB_WEBHOOK_SECRET and post it, as GitHub would.
+    """
+    with open(path, "rb") as f:
+        body = f.read()
+    secret = current_app.config.get("GITHUB_WEBHOOK_SECRET")
+    if not secret:
+        raise click.UsageError("GITHUB_WEBHOOK_SECRET is not set")
+    if not event:
+        event = "push" if "commits" in json.loads(body) else "repository"
+    headers = {"Content-Type": "application/json", "X-GitHub-Event": event,
+               "X-GitHub-Delivery": str(uuid.uuid4()), "X-Hub-Signature-256": webhooks.sign(secret, body)}
+    if url:
+        response = requests.post(url, data=body, headers=headers, timeout=30)
+        click.echo(f"{response.status_code} {response.text.strip()}")
+    else:
+        response = current_app.test_client().post("/github/webhook", data=body, headers=headers)
+        click.echo(f"{response.status_code} {response.get_data(as_text=True).strip()}")
+
+
+@click.command("sweep-jobs")
+@with_appcontext
+def sweep_jobs_command():
+    """
+    Fail stale jobs, resubmit queued jobs that never started and queue unapplied webhook deliveries, once.
+    """
+    failed, resubmitted = jobs.sweep()
+    click.echo(f"failed {failed} stale jobs, resubmitted {resubmitted} queued jobs")
+
+
+def register_commands(app):
+    app.cli.add_command(parse_resumes_command)
+    app.cli.add_command(rebuild_tfidf_command)
+    app.cli.add_command(check_rollups_command)
+    app.cli.add_command(rotate_tokens_command)
+    app.cli.add_command(replay_webhook_command)
+    app.cli.add_command(sweep_jobs_command)
@@ -6,4 +6,71 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "dev")
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # GitHub ingestion
+    GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+    GITHUB_CONCURRENCY = int(os.getenv("GITHUB_CONCURRENCY", 8))
+    # Persistent ETag / Last-Modified cache for GitHub responses. Leave empty to disable
+    GITHUB_CACHE_PATH = os.getenv("GITHUB_CACHE_PATH", "github_cache.sqlite3")
+    # Response bodies kept in it, least recently used dropped first, and seconds an unused entry is kept
+    GITHUB_CACHE_MAX_BYTES = int(os.getenv("GITHUB_CACHE_MAX_BYTES", 100 * 1024 * 1024))
+    GITHUB_CACHE_MAX_AGE = int(os.getenv("GITHUB_CACHE_MAX_AGE", 30 * 24 * 3600))
+    GITHUB_MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", 3))
+    # Stop and wait for the rate limit window to reset when this few requests are left, or fail the sync with the
+    # time to retry at if it resets more than a minute from now
+    GITHUB_MIN_REMAINING = int(os.getenv("GITHUB_MIN_REMAINING", 50))
+    # "rest" (a request per repo list page, languages and commits page) or "graphql" (batched queries)
+    GITHUB_FETCH_MODE = os.getenv("GITHUB_FETCH_MODE", "rest")
+    # Repos per GraphQL query, and the most points a query may cost (GitHub allows 5000 an hour)
+    GITHUB_GRAPHQL_BATCH = int(os.getenv("GITHUB_GRAPHQL_BATCH", 20))
+    GITHUB_GRAPHQL_MAX_COST = int(os.getenv("GITHUB_GRAPHQL_MAX_COST", 1))
+    # newest commits read per repo (0 for all of them), and whether to count only the user's own commits
+    GITHUB_MAX_COMMITS = int(os.getenv("GITHUB_MAX_COMMITS", 0))
+    GITHUB_AUTHOR_ONLY = os.getenv("GITHUB_AUTHOR_ONLY", "0") == "1"
+    # Secret of the push and repository webhooks sent to /github/webhook (unset turns the endpoint off), and how
+    # long after a delivery its repo is updated, so a burst of pushes is applied together
+    GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET")
+    GITHUB_WEBHOOK_COALESCE_SECONDS = float(os.getenv("GITHUB_WEBHOOK_COALESCE_SECONDS", 5))
+
+    # Background jobs
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+    # Active jobs that haven't reported for this long are treated as dead
+    JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", 900))
+    # Queued jobs not started after this long are submitted again (a restart loses delayed jobs), checked every
+    # JOB_SWEEP_SECONDS along with other lost work. 0 turns the sweep off, `flask sweep-jobs` runs it once
+    JOB_REQUEUE_SECONDS = int(os.getenv("JOB_REQUEUE_SECONDS", 60))
+    JOB_SWEEP_SECONDS = int(os.getenv("JOB_SWEEP_SECONDS", 60))
+    # Run jobs inline on the request thread (tests, debugging)
+    JOBS_EAGER = os.getenv("JOBS_EAGER", "0") == "1"
+
+    # Load spaCy and build the skill matcher in create_app instead of on the first upload
+    NLP_WARM_UP = os.getenv("NLP_WARM_UP", "0") == "1"
+    # Where the tokenized matcher patterns are cached, defaults to the instance folder
+    MATCHER_CACHE_DIR = os.getenv("MATCHER_CACHE_DIR")
+
+    # Uploaded resumes, defaults to app/static/files
+    UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER")
+    # Total size of resume text kept in the parsed resume cache
+    RESUME_CACHE_MAX_BYTES = int(os.getenv("RESUME_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+
+    # Uploads bigger than this are rejected with 413 before they reach the dashboard
+    MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", 10 * 1024 * 1024))
+    # Limits on resume text extraction: PDF pages read, characters kept, seconds per file, and extraction processes
+    EXTRACT_MAX_PAGES = int(os.getenv("EXTRACT_MAX_PAGES", 50))
+    EXTRACT_MAX_CHARS = int(os.getenv("EXTRACT_MAX_CHARS", 500_000))
+    EXTRACT_TIMEOUT = int(os.getenv("EXTRACT_TIMEOUT", 30))
+    EXTRACT_PROCESSES = int(os.getenv("EXTRACT_PROCESSES", 2))
+
+    # Seconds before the process rebuilds its skill co-occurrence graph from the database, in the background
+    ADJACENCY_MAX_AGE = int(os.getenv("ADJACENCY_MAX_AGE", 3600))
+
+    # Access tokens are encrypted with the first of ENCRYPTION_KEYS (comma separated, or ENCRYPTION_KEY) and
+    # decrypted with any of them. Decrypted tokens are kept in memory this many seconds, at most this many
+    TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", 300))
+    TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 1024))
+
+    # Request, SQL and pipeline stage timings served at /metrics, and a JSON log line per request on the
+    # skillsync.trace logger
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+    METRICS_TRACE = os.getenv("METRICS_TRACE", "0") == "1"
\ No newline at end of file
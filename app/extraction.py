@@ -0,0 +1,239 @@
+import codecs
+import multiprocessing
+import threading
+import time
+
+import fitz
+from docx import Document
+
+from . import metrics
+
+# Defaults, overridden from the app config by extract_file
+MAX_PAGES = 50
+MAX_CHARS = 500_000
+TIMEOUT = 30
+PROCESSES = 2
+PAGES_PER_TASK = 8
+
+
+class ExtractionError(Exception):
+    """
+    Raised when a document can't be read within the limits.
+    """
+
+
+_idle = []
+_slots = None
+_pool_lock = threading.Lock()
+
+
+def _serve(conn):
+    """
+    A worker process: extracts the page ranges sent over conn until it is closed.
+    """
+    while True:
+        try:
+            path, start, stop = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send(_pdf_pages(path, start, stop))
+        except Exception as e:
+            # MuPDF's exceptions don't all pickle
+            conn.send(ExtractionError(f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    """
+    A spawned worker process (spawn, so it doesn't inherit the web server's threads) that runs one page range at a
+    time for whichever extraction has it checked out. A worker that overruns is killed without touching the others.
+    """
+
+    def __init__(self):
+        context = multiprocessing.get_context("spawn")
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        # a range was sent and its result not read yet
+        self.pending = False
+
+    def send(self, path, start, stop):
+        self.conn.send((path, start, stop))
+        self.pending = True
+
+    def receive(self, timeout):
+        """
+        The result of the range sent last. Raises TimeoutError if it doesn't come within timeout seconds.
+        """
+        if not self.conn.poll(max(timeout, 0)):
+            raise TimeoutError
+        result = self.conn.recv()
+        self.pending = False
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join(1)
+        self.conn.close()
+
+
+def _take(processes, timeout):
+    """
+    Checks out a worker for one extraction, at most `processes` being out at a time. Waits up to timeout seconds
+    for one to come free and returns None if none did. Idle workers are reused, new ones spawned as needed.
+    """
+    global _slots
+    with _pool_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(processes)
+    if not _slots.acquire(timeout=max(timeout, 0)):
+        return None
+    with _pool_lock:
+        worker = _idle.pop() if _idle else None
+    if worker is None or not worker.process.is_alive():
+        try:
+            worker = _Worker()
+        except Exception:
+            _slots.release()
+            raise
+    return worker
+
+
+def _checkin(workers):
+    """
+    Returns workers after an extraction. Ones still working on a range are killed instead.
+    """
+    for worker in workers:
+        if worker.pending or not worker.process.is_alive():
+            worker.kill()
+        else:
+            with _pool_lock:
+                _idle.append(worker)
+        _slots.release()
+
+
+def shutdown():
+    """
+    Stops the idle workers.
+    """
+    with _pool_lock:
+        workers = list(_idle)
+        _idle.clear()
+    for worker in workers:
+        worker.kill()
+
+
+def _pdf_pages(path, start, stop):
+    """
+    The PDF's page count and the text of pages [start, stop) (cut at the page count). Runs in a worker, which
+    opens the file itself.
+    """
+    with fitz.open(path) as doc:
+        return doc.page_count, [doc[i].get_text() for i in range(start, min(stop, doc.page_count))]
+
+
+def iter_pdf(path, max_pages=MAX_PAGES, timeout=TIMEOUT, processes=PROCESSES):
+    """
+    Yields a PDF's text page by page, in order. MuPDF reads pages from the file on demand, so only the pages being
+    extracted are in memory. Every PDF is opened on a worker process, which reads the first page range, and the
+    rest are spread over the workers free at that point, up to `processes` across all extractions. Pages past
+    max_pages are ignored, and ExtractionError is raised if everything takes longer than timeout seconds, after
+    killing the workers still on this file (and only those).
+    """
+    deadline = time.monotonic() + timeout
+    worker = _take(processes, timeout)
+    if worker is None:
+        raise ExtractionError(f"No PDF worker came free within {timeout}s")
+    workers = [worker]
+    try:
+        worker.send(path, 0, min(PAGES_PER_TASK, max_pages))
+        page_count, texts = worker.receive(deadline - time.monotonic())
+        yield from texts
+
+        ranges = [(start, min(start + PAGES_PER_TASK, page_count, max_pages))
+                  for start in range(PAGES_PER_TASK, min(page_count, max_pages), PAGES_PER_TASK)]
+        # more workers for the rest if they are free, without waiting for other extractions
+        while len(workers) < min(processes, len(ranges)):
+            extra = _take(processes, 0)
+            if extra is None:
+                break
+            workers.append(extra)
+        for round_start in range(0, len(ranges), len(workers)):
+            batch = list(zip(workers, ranges[round_start:round_start + len(workers)]))
+            for worker, (start, stop) in batch:
+                worker.send(path, start, stop)
+            for worker, _ in batch:
+                _, texts = worker.receive(deadline - time.monotonic())
+                yield from texts
+    except TimeoutError:
+        raise ExtractionError(f"PDF extraction took longer than {timeout}s")
+    finally:
+        # ranges still being extracted when the caller stopped at the character cap or another range failed are
+        # waited for until the deadline, a worker still busy after that is killed by _checkin
+        for worker in workers:
+            if worker.pending:
+                try:
+                    worker.receive(deadline - time.monotonic())
+                except Exception:
+                    pass
+        _checkin(workers)
+
+
+def iter_docx(path):
+    """
+    Yields a DOCX's paragraphs.
+    """
+    for para in Document(path).paragraphs:
+        yield para.text + "\n"
+
+
+def iter_txt(path, chunk_size=65536):
+    """
+    Yields a UTF-8 text file in chunks without reading it all at once.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            yield decoder.decode(chunk)
+        yield decoder.decode(b"", final=True)
+
+
+def iter_text(path, filename=None, max_pages=MAX_PAGES, timeout=TIMEOUT, processes=PROCESSES):
+    """
+    Yields the text of an uploaded file incrementally, choosing the reader by the extension of filename (or path).
+    """
+    name = (filename or path).lower()
+    if name.endswith(".pdf"):
+        return iter_pdf(path, max_pages, timeout, processes)
+    if name.endswith(".docx"):
+        return iter_docx(path)
+    if name.endswith(".txt"):
+        return iter_txt(path)
+    raise ExtractionError(f"Unsupported file type: {name}")
+
+
+@metrics.timer("extract_text")
+def extract_file(path, filename=None, config=None):
+    """
+    Extracts the text of a file saved on disk, within the EXTRACT_MAX_PAGES / EXTRACT_MAX_CHARS / EXTRACT_TIMEOUT
+    limits from config. Text past the character cap is cut off. Returns "" if the file can't be read.
+    """
+    config = config or {}
+    max_chars = config.get("EXTRACT_MAX_CHARS", MAX_CHARS)
+    chunks, length = [], 0
+    try:
+        for chunk in iter_text(path, filename,
+                               max_pages=config.get("EXTRACT_MAX_PAGES", MAX_PAGES),
+                               timeout=config.get("EXTRACT_TIMEOUT", TIMEOUT),
+                               processes=config.get("EXTRACT_PROCESSES", PROCESSES)):
+            chunks.append(chunk[:max_chars - length])
+            length += len(chunks[-1])
+            if length >= max_chars:
+                break
+    except Exception as e:
+        print("Failed to parse resume:", e)
+        return ""
+    return "".join(chunks)
@@ -0,0 +1,346 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import parse_header_links
+
+from . import metrics
+
+GITHUB_API_URL = "https://api.github.com"
+# seconds a cache entry's last use may be off by
+USED_AT_PRECISION = 3600
+
+
+class ResponseCache:
+    """
+    Persistent store of the ETag / Last-Modified validators and body of GitHub responses, keyed by token and url.
+    Backed by a small sqlite file so it survives restarts and can be shared by the worker threads.
+    Bounded to max_bytes of bodies, dropping the least recently used first, and entries unused for max_age seconds
+    are dropped too. Each incremental sync asks for commits since a new date, so without this it only grows.
+    """
+
+    def __init__(self, path, max_bytes=100 * 1024 * 1024, max_age=30 * 24 * 3600):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS github_cache ("
+                "key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, link TEXT, body TEXT)"
+            )
+            # files written before the cache was bounded
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(github_cache)")}
+            if "size" not in columns:
+                self._conn.execute("ALTER TABLE github_cache ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+                self._conn.execute("UPDATE github_cache SET size = length(body)")
+            if "used_at" not in columns:
+                self._conn.execute("ALTER TABLE github_cache ADD COLUMN used_at REAL NOT NULL DEFAULT 0")
+                self._conn.execute("UPDATE github_cache SET used_at = ?", (time.time(),))
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_github_cache_used_at ON github_cache (used_at)")
+            self._conn.commit()
+            self._evict()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, link, body, used_at FROM github_cache WHERE key = ?", (key,)
+            ).fetchone()
+            # the use time only needs to be roughly right, so a hit doesn't write every time
+            now = time.time()
+            if row is not None and now - row[4] > USED_AT_PRECISION:
+                self._conn.execute("UPDATE github_cache SET used_at = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "link": row[2], "body": row[3]}
+
+    def set(self, key, etag, last_modified, link, body):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO github_cache (key, etag, last_modified, link, body, size, used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, etag, last_modified, link, body, len(body), time.time())
+            )
+            self._conn.commit()
+            self._written += len(body)
+            # other processes may share the file, so the total is only recounted once this one wrote enough
+            if self._bytes + self._written > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """
+        Drops entries past max_age, then the least recently used until the bodies fit in 90% of max_bytes.
+        Called with the lock held.
+        """
+        self._conn.execute("DELETE FROM github_cache WHERE used_at < ?", (time.time() - self.max_age,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM github_cache").fetchone()[0]
+        if total > self.max_bytes:
+            target = self.max_bytes * 0.9
+            stale = []
+            for key, size in self._conn.execute("SELECT key, size FROM github_cache ORDER BY used_at"):
+                if total <= target:
+                    break
+                stale.append((key,))
+                total -= size
+            self._conn.executemany("DELETE FROM github_cache WHERE key = ?", stale)
+        self._conn.commit()
+        self._bytes, self._written = total, 0
+
+
+class ClientStats:
+    """
+    Thread safe counters shared by every client, exposed for monitoring.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {
+                "requests": 0,
+                "cache_hits": 0,
+                "cache_misses": 0,
+                "retries": 0,
+                "throttled_seconds": 0.0,
+                "quota_exhausted": 0,
+                "graphql_cost": 0,
+            }
+            self.rate_limit_remaining = None
+            self.rate_limit_reset = None
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def update_quota(self, remaining, reset):
+        with self._lock:
+            self.rate_limit_remaining = remaining
+            self.rate_limit_reset = reset
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self.counters)
+            data["rate_limit_remaining"] = self.rate_limit_remaining
+            data["rate_limit_reset"] = self.rate_limit_reset
+        return data
+
+
+stats = ClientStats()
+metrics.register_collector("github", "GitHub client counters since the process started.", stats.snapshot)
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(path, max_bytes=100 * 1024 * 1024, max_age=30 * 24 * 3600):
+    """
+    Returns the shared ResponseCache for a path, creating it on first use.
+    """
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = ResponseCache(path, max_bytes, max_age)
+        return _caches[path]
+
+
+class QuotaExhausted(Exception):
+    """
+    Raised instead of waiting when the token's rate limit window resets more than max_wait seconds from now.
+    Whatever was being fetched can be retried once it has reset.
+    """
+
+    def __init__(self, reset):
+        super().__init__("GitHub rate limit exhausted, retry after "
+                         + time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(reset)))
+        self.reset = reset
+
+
+class GitHubResponse:
+    """
+    What GitHubClient.get returns. Mirrors the parts of requests.Response the handlers use.
+    """
+
+    def __init__(self, status_code, data=None, links=None, from_cache=False):
+        self.status_code = status_code
+        self.data = data
+        self.links = links or {}
+        self.from_cache = from_cache
+
+    def json(self):
+        return self.data
+
+
+def _parse_links(link_header):
+    """
+    Same shape as requests.Response.links, built from a stored Link header.
+    """
+    links = {}
+    for link in parse_header_links(link_header or ""):
+        key = link.get("rel") or link.get("url")
+        links[key] = link
+    return links
+
+
+class GitHubClient:
+    """
+    GitHub REST client for a single token. Sends conditional requests using cached validators (304s don't count
+    against the quota), waits out the rate limit window when X-RateLimit-Remaining runs low, or raises
+    QuotaExhausted if that's more than max_wait away, honours Retry-After and retries server errors with
+    exponential backoff.
+    """
+
+    def __init__(self, access_token, api_url=GITHUB_API_URL, cache=None, pool_size=10,
+                 max_retries=3, backoff=1.0, min_remaining=50, max_wait=60, timeout=30):
+        self.api_url = api_url
+        self.cache = cache
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.min_remaining = min_remaining
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self._token_key = hashlib.sha256(access_token.encode()).hexdigest()[:16]
+        self._quota_lock = threading.Lock()
+        self._remaining = None
+        self._reset = None
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {access_token}",
+            "Accept": "application/vnd.github+json"
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _cache_key(self, url, params):
+        if params:
+            url = f"{url}?{urlencode(sorted(params.items()))}"
+        return f"{self._token_key}:{url}"
+
+    def _wait_for_quota(self):
+        """
+        Once the remaining quota drops to min_remaining, sleeps until the rate limit window resets, so the
+        requests after it don't wait again, or raises QuotaExhausted if that's more than max_wait away.
+        """
+        with self._quota_lock:
+            remaining, reset = self._remaining, self._reset
+        if remaining is None or reset is None or remaining > self.min_remaining:
+            return
+        delay = reset - time.time()
+        if delay > self.max_wait:
+            stats.incr("quota_exhausted")
+            raise QuotaExhausted(reset)
+        if delay > 0:
+            stats.incr("throttled_seconds", delay)
+            time.sleep(delay)
+
+    def _record_quota(self, headers):
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is None:
+            return
+        with self._quota_lock:
+            self._remaining = int(remaining)
+            self._reset = int(reset) if reset else None
+        stats.update_quota(self._remaining, self._reset)
+
+    def _retry_delay(self, response, attempt):
+        """
+        How long to wait before retrying a response, or None if it should not be retried. Raises QuotaExhausted
+        for a rate limited response whose window resets more than max_wait from now.
+        """
+        if response is None or response.status_code >= 500:
+            return self.backoff * (2 ** attempt)
+        if response.status_code in (403, 429):
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                return min(float(retry_after), self.max_wait)
+            if response.headers.get("X-RateLimit-Remaining") == "0":
+                reset = int(response.headers.get("X-RateLimit-Reset", time.time()))
+                if reset - time.time() > self.max_wait:
+                    stats.incr("quota_exhausted")
+                    raise QuotaExhausted(reset)
+                return max(reset - time.time(), 0)
+        return None
+
+    def _send(self, method, url, **kwargs):
+        """
+        Sends a request with method (self.session.get or .post), waiting for quota first and retrying what
+        _retry_delay allows. Returns the last response, or None if the connection kept failing.
+        """
+        response = None
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_quota()
+            try:
+                with metrics.timer("github_request"):
+                    response = method(url, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                response = None
+            else:
+                stats.incr("requests")
+                self._record_quota(response.headers)
+
+            delay = self._retry_delay(response, attempt)
+            if delay is None or attempt == self.max_retries:
+                break
+            stats.incr("retries")
+            time.sleep(delay)
+        return response
+
+    def graphql(self, query, variables=None):
+        """
+        POSTs a GraphQL query to {api_url}/graphql and returns a GitHubResponse whose json() is the whole body,
+        {"data": ..., "errors": ...}. Not cached. Adds the query's reported rateLimit cost to stats.
+        """
+        response = self._send(self.session.post, f"{self.api_url}/graphql",
+                              json={"query": query, "variables": variables or {}})
+        if response is None:
+            return GitHubResponse(503)
+        if response.status_code != 200:
+            return GitHubResponse(response.status_code)
+        body = response.json()
+        rate_limit = (body.get("data") or {}).get("rateLimit") or {}
+        if rate_limit.get("cost"):
+            stats.incr("graphql_cost", rate_limit["cost"])
+        return GitHubResponse(200, body)
+
+    def get(self, url, params=None):
+        """
+        GETs a path ("/user/repos") or absolute url and returns a GitHubResponse.
+        """
+        if not url.startswith("http"):
+            url = f"{self.api_url}{url}"
+        key = self._cache_key(url, params)
+        cached = self.cache.get(key) if self.cache else None
+
+        headers = {}
+        if cached:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        response = self._send(self.session.get, url, params=params, headers=headers)
+        if response is None:
+            return GitHubResponse(503)
+
+        if response.status_code == 304 and cached:
+            stats.incr("cache_hits")
+            return GitHubResponse(200, json.loads(cached["body"]), _parse_links(cached["link"]), from_cache=True)
+
+        if response.status_code != 200:
+            return GitHubResponse(response.status_code, links=response.links)
+
+        stats.incr("cache_misses")
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if self.cache and (etag or last_modified):
+            self.cache.set(key, etag, last_modified, response.headers.get("Link"), response.text)
+        return GitHubResponse(200, response.json(), response.links)
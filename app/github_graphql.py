@@ -0,0 +1,181 @@
+import math
+from collections import Counter
+
+# Fetches what github_handler needs through the GraphQL API instead of REST: the repo list, then each repo's
+# language sizes and commit messages for many repos per query, one alias per repo. Every per repo argument is a
+# query variable (name0, since0, after0, languages0, ...) so the query text only depends on the batch size.
+
+REPOS_PER_PAGE = 100
+COMMITS_PER_PAGE = 100
+
+REPOS_QUERY = """
+query($after: String) {
+  viewer {
+    id
+    repositories(first: %d, after: $after, ownerAffiliations: [OWNER, COLLABORATOR, ORGANIZATION_MEMBER],
+                 orderBy: {field: CREATED_AT, direction: ASC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes { name description isFork }
+    }
+  }
+  rateLimit { cost remaining resetAt }
+}
+""" % REPOS_PER_PAGE
+
+REPO_FIELDS = """
+  r%(i)d: repository(owner: $owner, name: $name%(i)d) {
+    languages(first: 100, orderBy: {field: SIZE, direction: DESC}) @include(if: $languages%(i)d) {
+      edges { size node { name } }
+    }
+    defaultBranchRef {
+      target {
+        ... on Commit {
+          history(first: %(per_page)d, since: $since%(i)d, after: $after%(i)d, author: $author) {
+            pageInfo { hasNextPage endCursor }
+            nodes { oid message committedDate }
+          }
+        }
+      }
+    }
+  }
+"""
+
+
+def batch_query(size):
+    """
+    The query for a batch of `size` repos.
+    """
+    variables = ["$owner: String!", "$author: CommitAuthor"]
+    fields = []
+    for i in range(size):
+        variables.append(f"$name{i}: String!, $since{i}: GitTimestamp, $after{i}: String, $languages{i}: Boolean!")
+        fields.append(REPO_FIELDS % {"i": i, "per_page": COMMITS_PER_PAGE})
+    return "query(%s) {%s  rateLimit { cost remaining resetAt }\n}" % (", ".join(variables), "".join(fields))
+
+
+def estimate_cost(size):
+    """
+    GitHub's point cost of a batch: one request per connection asked for (languages and history per repo, the
+    languages only on a repo's first page but counted anyway), divided by 100 and rounded up, at least 1.
+    """
+    return max(1, math.ceil(size * 2 / 100))
+
+
+class RepoFetch:
+    """
+    A repo being fetched, page by page: language byte sizes from the first page, the newest commit, and topic and
+    skill counts summed over the commit messages of every page. `summarize(messages)` gives a page's
+    ({topic: count}, {skill: count}) and its messages aren't kept. Stops after max_commits commits if given.
+    """
+
+    def __init__(self, name, description, since, last_sha, summarize, max_commits=None):
+        self.name = name
+        self.description = description
+        self.since = since
+        self.last_sha = last_sha
+        self.summarize = summarize
+        self.max_commits = max_commits
+        self.cursor = None
+        self.language_bytes = None
+        self.topic_counts = Counter()
+        self.skill_counts = Counter()
+        self.read = 0
+        self.head = None
+        self.failed = False
+        self.done = False
+
+    def variables(self, i):
+        return {f"name{i}": self.name, f"since{i}": self.since, f"after{i}": self.cursor,
+                f"languages{i}": self.cursor is None}
+
+    def add_page(self, repository):
+        """
+        Takes one aliased repository result. A missing repository fails the fetch, and so does an empty one (no
+        default branch) after its languages are read, as the REST commits endpoint does.
+        """
+        if repository is None:
+            self.failed = self.done = True
+            return
+        if repository.get("languages") is not None:
+            self.language_bytes = {edge["node"]["name"]: edge["size"] for edge in repository["languages"]["edges"]}
+        if repository.get("defaultBranchRef") is None:
+            self.failed = self.done = True
+            return
+        history = repository["defaultBranchRef"]["target"]["history"]
+        messages = []
+        for commit in history["nodes"]:
+            if commit["oid"] == self.last_sha:
+                continue
+            if self.max_commits and self.read >= self.max_commits:
+                break
+            self.read += 1
+            if self.head is None:
+                self.head = {"sha": commit["oid"], "date": commit["committedDate"]}
+            if commit["message"]:
+                messages.append(commit["message"])
+        topic_counts, skill_counts = self.summarize(messages)
+        self.topic_counts.update(topic_counts)
+        self.skill_counts.update(skill_counts)
+        if self.max_commits and self.read >= self.max_commits:
+            self.done = True
+        elif history["pageInfo"]["hasNextPage"]:
+            self.cursor = history["pageInfo"]["endCursor"]
+        else:
+            self.done = True
+
+
+def list_repos(client):
+    """
+    Every repo the token's user can see, as [{"name", "description", "fork"}] like the REST list, and the user's
+    node id (for filtering commits by author), or (None, None) if the query failed.
+    """
+    repos = []
+    after = None
+    while True:
+        response = client.graphql(REPOS_QUERY, {"after": after})
+        body = response.json() if response.status_code == 200 else None
+        if not body or not body.get("data"):
+            return None, None
+        viewer = body["data"]["viewer"]
+        page = viewer["repositories"]
+        repos.extend({"name": repo["name"], "description": repo["description"], "fork": repo["isFork"]}
+                     for repo in page["nodes"])
+        if not page["pageInfo"]["hasNextPage"]:
+            return repos, viewer["id"]
+        after = page["pageInfo"]["endCursor"]
+
+
+def fetch_repos(client, owner, to_fetch, summarize, batch_size=20, max_cost=None, author_id=None, max_commits=None,
+                progress=None):
+    """
+    Fetches languages and commits for to_fetch [(name, description, since, last_sha)] in batches of at most
+    batch_size repos and, if given, max_cost points per query. Repos with more commits than a page carry on in
+    later batches. With author_id only that user's commits are read, and at most max_commits per repo.
+    Returns a RepoFetch per repo in order. `progress(done, total)` is called as repos finish.
+    """
+    if max_cost:
+        while batch_size > 1 and estimate_cost(batch_size) > max_cost:
+            batch_size -= 1
+    fetches = [RepoFetch(*repo, summarize, max_commits) for repo in to_fetch]
+    author = {"id": author_id} if author_id else None
+    pending = list(fetches)
+    finished = 0
+    while pending:
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            variables = {"owner": owner, "author": author}
+            for i, fetch in enumerate(batch):
+                variables.update(fetch.variables(i))
+            response = client.graphql(batch_query(len(batch)), variables)
+            data = (response.json() or {}).get("data") if response.status_code == 200 else None
+            for i, fetch in enumerate(batch):
+                if data is None:
+                    fetch.failed = fetch.done = True
+                else:
+                    fetch.add_page(data.get(f"r{i}"))
+                if fetch.done:
+                    finished += 1
+                    if progress:
+                        progress(finished, len(fetches))
+        pending = [fetch for fetch in pending if not fetch.done]
+    return fetches
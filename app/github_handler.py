@@ -1,7 +1,13 @@
 from . import db
 from .models import User, Repository
-import requests
-import re
+from .github_client import GITHUB_API_URL, GitHubClient, get_cache
+from .topic_matcher import TopicMatcher
+from .upsert import upsert_repositories
+from .resume_checker import SKILL_LIST
+from . import github_graphql, metrics, rollups, tfidf, vocabulary
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
 
 # Topic keywords kindly provided by Chatham Grant-Parker-Turner (ChatGPT)
 TOPIC_KEYWORDS = {
@@ -81,108 +87,266 @@ TOPIC_KEYWORDS = {
     ]
 }
 
+TOPIC_MATCHER = TopicMatcher(TOPIC_KEYWORDS)
+# every resume skill and its aliases, for counting skill mentions in commits, ambiguous names by their aliases only
+SKILL_MATCHER = TopicMatcher({skill: ([] if skill in vocabulary.COMMIT_STOP_SKILLS else [skill])
+                              + vocabulary.aliases_of(skill) for skill in SKILL_LIST})
 
-def github_handler(username, access_token):
+# languages under this share of a repos bytes are left out of Repository.languages
+MAIN_LANGUAGE_SHARE = 0.05
+
+
+def make_client(access_token, pool_size=10):
     """
-    Adds all of a users repos into the repo model. 
-    Extracts information like name, description (if applicable), languages used, and a summary of skills shown in their commits
+    Creates the GitHub client for a single token from the app config. The client's connection pool is sized to the
+    number of workers and every client shares the persistent conditional request cache.
     """
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/vnd.github+json"
-    }
-    response = requests.get("https://api.github.com/user/repos", headers=headers)
+    config = current_app.config
+    cache_path = config.get("GITHUB_CACHE_PATH")
+    return GitHubClient(access_token,
+                        api_url = config.get("GITHUB_API_URL", GITHUB_API_URL),
+                        cache = get_cache(cache_path, config.get("GITHUB_CACHE_MAX_BYTES", 100 * 1024 * 1024),
+                                          config.get("GITHUB_CACHE_MAX_AGE", 30 * 24 * 3600)) if cache_path else None,
+                        pool_size = pool_size,
+                        max_retries = config.get("GITHUB_MAX_RETRIES", 3),
+                        min_remaining = config.get("GITHUB_MIN_REMAINING", 50))
+
+
+@metrics.timer("github_sync")
+def github_handler(username, access_token, concurrency=None, progress=None):
+    """
+    Adds all of a users repos into the repo model, or refreshes the ones already stored.
+    Extracts information like name, description (if applicable), languages used, and a summary of skills shown in their commits.
+    Stored repos only fetch commits newer than their last seen commit, and their new topic counts are added to the stored ones.
+    With GITHUB_FETCH_MODE "rest" the per repo fetches run on a pool of `concurrency` threads (GITHUB_CONCURRENCY
+    by default), with "graphql" they are batched into a few GraphQL queries. Both write the same rows, upserted in
+    bulk at the end. `progress(done, total)` is called as each repo is fetched.
+    GITHUB_MAX_COMMITS caps the commits read per repo and GITHUB_AUTHOR_ONLY skips other people's commits.
+    """
+    config = current_app.config
+    mode = config.get("GITHUB_FETCH_MODE", "rest")
+    if mode not in ("rest", "graphql"):
+        raise ValueError(f"Unknown GITHUB_FETCH_MODE {mode!r}, expected 'rest' or 'graphql'")
+    concurrency = concurrency or config.get("GITHUB_CONCURRENCY", 8)
+    max_commits = config.get("GITHUB_MAX_COMMITS") or None
+    author_only = config.get("GITHUB_AUTHOR_ONLY", False)
+    client = make_client(access_token, concurrency)
 
     user = User.query.filter_by(github_username = username).first()
+    if not user:
+        return
+
+    viewer_id = None
+    if mode == "graphql":
+        repos, viewer_id = github_graphql.list_repos(client)
+    else:
+        repos = iter_repos(client)
+
+    if repos is None:
+        return
 
-    if response.status_code != 200 or not user:
+    existing_repos = {repo.name: repo for repo in Repository.query.filter_by(user_id=user.id)}
+    to_fetch = []
+    try:
+        for repo in repos:
+            if repo.get("fork"):
+                continue
+            repo_name = repo.get("name")
+            existing = existing_repos.get(repo_name)
+            since = existing.last_commit_date if existing else None
+            last_sha = existing.last_commit_sha if existing else None
+            to_fetch.append((repo_name, repo.get("description"), since, last_sha))
+    except FetchError:
         return
-    repos = response.json()
-    for repo in repos:
-        fork = repo.get("fork")
-        repo_name = repo.get("name")
-        repo_description = repo.get("description")
-        existing = Repository.query.filter_by(name=repo_name).first()
-        if fork or existing:
-            continue
-        repo_name = repo.get("name")
-        repo_description = repo.get("description")
-        repo = Repository(user_id = user.id, 
-                          name = repo_name, 
-                          languages = get_languages(username, repo_name, access_token), 
-                          description = repo_description, 
-                          commit_summary = make_commit_summary(username, repo_name, access_token))
-        db.session.add(repo)
+
+    def fetch(repo_info):
+        # runs on the worker threads, only does HTTP
+        return fetch_repo(client, username, repo_info, author=username if author_only else None,
+                          max_commits=max_commits)
+
+    results = []
+    if mode == "graphql":
+        fetches = github_graphql.fetch_repos(client, username, to_fetch, summarize_commits,
+                                             batch_size=config.get("GITHUB_GRAPHQL_BATCH", 20),
+                                             max_cost=config.get("GITHUB_GRAPHQL_MAX_COST"),
+                                             author_id=viewer_id if author_only else None,
+                                             max_commits=max_commits, progress=progress)
+        for fetch in fetches:
+            topic_counts = skill_counts = head = language_shares = None
+            # a fetch that failed on a later page keeps the stored high-water mark, like a failed REST fetch,
+            # so the next sync reads the commits it didn't count
+            if not fetch.failed:
+                topic_counts, skill_counts = dict(fetch.topic_counts), dict(fetch.skill_counts)
+                head = fetch.head
+            # the REST path asks for languages under the same condition, after its commits request
+            if (fetch.since is None or head is not None) and fetch.language_bytes is not None:
+                language_shares = shares(fetch.language_bytes)
+            results.append((fetch.name, fetch.description, language_shares, topic_counts, skill_counts, head))
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for result in pool.map(fetch, to_fetch):
+                results.append(result)
+                if progress:
+                    progress(len(results), len(to_fetch))
+
+    rows = [repo_row(existing_repos.get(result[0]), *result) for result in results]
+    upsert_repositories(user.id, rows)
+    tfidf.index_users([user.id])
+    rollups.index_users([user.id])
     db.session.commit()
 
 
-def get_languages(username, repo_name, access_token):
+def fetch_repo(client, username, repo_info, author=None, max_commits=None):
     """
-    Gets languages used in a repo and returns a list of them. Langauges who are <5% of a repos total bytes are discarded.
+    Fetches one repo's new commits and, for a repo not stored yet or one with new commits, its languages.
+    repo_info is (name, description, since, last_sha) and the result is
+    (name, description, language_shares, topic_counts, skill_counts, head) for repo_row. Only does HTTP.
     """
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/vnd.github+json"
-    }
-    response = requests.get(f"https://api.github.com/repos/{username}/{repo_name}/languages", headers=headers)
+    repo_name, repo_description, since, last_sha = repo_info
+    topic_counts, skill_counts, head = make_commit_summary(username, repo_name, None, client=client, since=since,
+                                                           last_sha=last_sha, author=author, max_commits=max_commits)
+    language_shares = None
+    if since is None or head is not None:
+        language_shares = get_languages(username, repo_name, None, client=client)
+    return repo_name, repo_description, language_shares, topic_counts, skill_counts, head
+
+
+def repo_row(existing, repo_name, repo_description, language_shares, topic_counts, skill_counts, head):
+    """
+    The Repository columns to upsert for a fetched repo: its languages if they were fetched, the new topic and skill
+    counts added to the `existing` row's (None for a new repo), and the newest commit.
+    """
+    row = {"name": repo_name, "description": repo_description}
+    if language_shares is not None:
+        row["language_shares"] = language_shares
+        row["languages"] = main_languages(language_shares)
+    if topic_counts:
+        stored = existing.topic_counts if existing else None
+        merged = Counter(stored or {}) + Counter(topic_counts)
+        row["topic_counts"] = dict(merged)
+        row["commit_summary"] = sorted(merged)
+    if skill_counts:
+        stored = existing.skill_counts if existing else None
+        row["skill_counts"] = dict(Counter(stored or {}) + Counter(skill_counts))
+    if head:
+        row["last_commit_sha"] = head["sha"]
+        row["last_commit_date"] = head["date"]
+    return row
+
+
+class FetchError(Exception):
+    """
+    Raised by iter_pages when GitHub doesn't answer a page with a 200.
+    """
+
+    def __init__(self, status_code):
+        super().__init__(f"GitHub answered {status_code}")
+        self.status_code = status_code
+
+
+def iter_pages(client, url, params=None):
+    """
+    Yields each page of a paginated REST list, fetching the next one (from the Link header) only when it is
+    asked for. Raises FetchError on a failed page.
+    """
+    while url:
+        response = client.get(url, params=params)
+        if response.status_code != 200:
+            raise FetchError(response.status_code)
+        yield response.json()
+        url = response.links.get("next", {}).get("url")
+        params = None
+
+
+def iter_repos(client):
+    """
+    Every repo on every page of /user/repos, 100 a page instead of GitHub's default 30.
+    """
+    for page in iter_pages(client, "/user/repos", {"per_page": 100}):
+        yield from page
+
+
+@metrics.timer("github_languages")
+def get_languages(username, repo_name, access_token, client=None):
+    """
+    Gets languages used in a repo and returns each one's share of the repos total bytes, e.g. {"Python": 0.91, "HTML": 0.09}.
+    """
+    client = client or GitHubClient(access_token)
+    response = client.get(f"/repos/{username}/{repo_name}/languages")
 
     if response.status_code != 200:
         return
     
-    languages = response.json()
-    total = sum(languages.values())
-    main_languages = {
-        language: byte
-        for language, byte in languages.items()
-        if byte/total >= 0.05
-    }
-    lang_list = list(main_languages.keys())
-    return lang_list
+    return shares(response.json())
 
-def make_commit_summary(username, repo_name, access_token):
+def shares(language_bytes):
     """
-    Gets all of a users commit messages and returns a list of topic keywords (show above) that are shown by those messages.
+    Each language's share of a repo's bytes from GitHub's {language: bytes}.
     """
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/vnd.github+json"
+    total = sum(language_bytes.values())
+    return {
+        language: round(byte/total, 4)
+        for language, byte in language_bytes.items()
+        if byte
     }
 
-    url = f"https://api.github.com/repos/{username}/{repo_name}/commits"
-    params = {"per_page": 100}
-    commits = []
+def main_languages(language_shares):
+    """
+    Returns the languages that make up at least MAIN_LANGUAGE_SHARE of a repo. Smaller ones are discarded.
+    """
+    return [language for language, share in language_shares.items() if share >= MAIN_LANGUAGE_SHARE]
 
-    while url:
-        response = requests.get(url, headers=headers, params=params)
+@metrics.timer("github_commits")
+def make_commit_summary(username, repo_name, access_token, client=None, since=None, last_sha=None, author=None,
+                        max_commits=None):
+    """
+    Gets a users commit messages and returns how many of them show each topic (shown above) as {topic: count}
+    and how many mention each resume skill as {skill: count}, along with the newest commit as {"sha", "date"}
+    (None when there are no new commits).
+    With `since` only commits from that date on are fetched. GitHub includes the commit at `since` itself,
+    so `last_sha` is skipped. `author` (a login or email) leaves out other people's commits, and only the newest
+    `max_commits` are read. Pages are counted as they arrive and their messages dropped, so memory doesn't grow
+    with the history. Returns (None, None, None) if the commits could not be fetched.
+    """
+    client = client or GitHubClient(access_token)
 
-        if response.status_code != 200:
-            return ""
-
-        data = response.json()
-        for commit in data:
-            message = commit.get("commit", {}).get("message")
-            if message:
-                commits.append(message)
-
-        if "next" in response.links:
-            url = response.links["next"]["url"]
-            params = None
-        else:
-            break
-
-    def extract_topics_from_commits(commit_messages):
-        """
-        Helper function to match commit messages to topics.
-        """
-        matched = set()
-        for msg in commit_messages:
-            msg = msg.lower()
-            tokens = re.findall(r"\b[a-z]+\b", msg)
-            for topic, keywords in TOPIC_KEYWORDS.items():
-                if any(kw in tokens for kw in keywords):
-                    matched.add(topic)
-        return list(matched)
-    
-    return extract_topics_from_commits(commits)
+    params = {"per_page": 100}
+    if since:
+        params["since"] = since
+    if author:
+        params["author"] = author
+    topic_counts, skill_counts = Counter(), Counter()
+    head = None
+    read = 0
 
+    try:
+        for page in iter_pages(client, f"/repos/{username}/{repo_name}/commits", params):
+            messages = []
+            for commit in page:
+                if commit.get("sha") == last_sha:
+                    continue
+                if max_commits and read >= max_commits:
+                    break
+                read += 1
+                details = commit.get("commit", {})
+                if head is None:
+                    committer = details.get("committer") or details.get("author") or {}
+                    head = {"sha": commit.get("sha"), "date": committer.get("date")}
+                message = details.get("message")
+                if message:
+                    messages.append(message)
+            page_topics, page_skills = summarize_commits(messages)
+            topic_counts.update(page_topics)
+            skill_counts.update(page_skills)
+            if max_commits and read >= max_commits:
+                break
+    except FetchError:
+        return None, None, None
 
+    return dict(topic_counts), dict(skill_counts), head
+
+def summarize_commits(messages):
+    """
+    How many commit messages show each topic, and how many mention each resume skill.
+    """
+    return dict(TOPIC_MATCHER.count(messages)), dict(SKILL_MATCHER.count(messages))
\ No newline at end of file
@@ -0,0 +1,236 @@
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from . import db
+from .models import Job, JOB_ACTIVE_STATUSES, utcnow
+
+# kind -> function(job, **payload) returning a JSON serializable result
+JOB_HANDLERS = {}
+# kinds whose running jobs don't absorb new enqueues, see job_handler
+FRESH_AFTER_START = set()
+# functions run by sweep() to queue work that was lost, e.g. with a restart
+SWEEPERS = []
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def job_handler(kind, join_running=True):
+    """
+    Decorator that registers a function as the handler for a kind of job. With join_running=False an enqueue
+    only joins a job of this kind while it is queued, once it runs the next enqueue queues a new one (for handlers
+    that pick up their input when they start).
+    """
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        if not join_running:
+            FRESH_AFTER_START.add(kind)
+        return func
+    return register
+
+
+def sweeper(func):
+    """
+    Decorator that registers a function for sweep() to call.
+    """
+    SWEEPERS.append(func)
+    return func
+
+
+def get_executor(app):
+    """
+    Returns the process wide worker pool, created with JOB_WORKERS threads on first use.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=app.config.get("JOB_WORKERS", 2),
+                                           thread_name_prefix="skillsync-job")
+        return _executor
+
+
+def _expire_stale(dedupe_key):
+    """
+    Fails active jobs for a key that have not reported in JOB_STALE_SECONDS, e.g. because the
+    process running them was restarted, so they stop blocking new jobs.
+    """
+    cutoff = utcnow() - timedelta(seconds=current_app.config.get("JOB_STALE_SECONDS", 900))
+    stale = Job.query.filter(Job.dedupe_key == dedupe_key,
+                             Job.status.in_(JOB_ACTIVE_STATUSES),
+                             Job.updated_at < cutoff).all()
+    for job in stale:
+        job.status = "failed"
+        job.error = "interrupted"
+    if stale:
+        db.session.commit()
+
+
+def enqueue(kind, dedupe_key, payload, user_id=None, delay=0):
+    """
+    Queues a job and returns it. If a job with the same dedupe_key is already queued or running,
+    that job is returned instead of starting a second one. With delay the job only starts that many
+    seconds later (not in JOBS_EAGER), so whatever is enqueued under the key until then joins it.
+    """
+    _expire_stale(dedupe_key)
+    active = Job.query.filter(Job.dedupe_key == dedupe_key, Job.status.in_(JOB_ACTIVE_STATUSES)).first()
+    if active:
+        return active
+
+    job = Job(kind=kind, dedupe_key=dedupe_key, payload=payload, user_id=user_id, status="queued")
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # another request queued the same work between our check and insert
+        db.session.rollback()
+        return Job.query.filter(Job.dedupe_key == dedupe_key, Job.status.in_(JOB_ACTIVE_STATUSES)).first()
+
+    app = current_app._get_current_object()
+    if app.config.get("JOBS_EAGER"):
+        _execute(job.id)
+    elif delay:
+        # waits on a timer thread rather than holding a worker
+        timer = threading.Timer(delay, get_executor(app).submit, (_run, app, job.id))
+        timer.daemon = True
+        timer.start()
+    else:
+        get_executor(app).submit(_run, app, job.id)
+    return job
+
+
+def report_progress(job_id, done, total):
+    """
+    Stores a job's progress. Goes through its own connection so it doesn't commit or expire the handler's session.
+    """
+    with db.engine.begin() as connection:
+        connection.execute(
+            Job.__table__.update().where(Job.__table__.c.id == job_id)
+            .values(progress=done, total=total, updated_at=utcnow())
+        )
+
+
+def _claim(job_id):
+    """
+    Marks a queued job running and returns whether this call did, as sweep() may have submitted it twice.
+    Jobs of FRESH_AFTER_START kinds give up their dedupe_key here.
+    """
+    table = Job.__table__
+    kind, dedupe_key = db.session.execute(db.select(table.c.kind, table.c.dedupe_key)
+                                          .where(table.c.id == job_id)).one()
+    values = {"status": "running", "updated_at": utcnow()}
+    if kind in FRESH_AFTER_START:
+        values["dedupe_key"] = f"{dedupe_key}#{job_id}"
+    claimed = db.session.execute(table.update().where(table.c.id == job_id, table.c.status == "queued")
+                                 .values(**values)).rowcount
+    db.session.commit()
+    return claimed == 1
+
+
+def _execute(job_id):
+    if not _claim(job_id):
+        return
+    job = db.session.get(Job, job_id)
+
+    try:
+        result = JOB_HANDLERS[job.kind](job, **(job.payload or {}))
+    except Exception as e:
+        db.session.rollback()
+        traceback.print_exc()
+        job = db.session.get(Job, job_id)
+        job.status = "failed"
+        job.error = str(e)
+    else:
+        job = db.session.get(Job, job_id)
+        job.status = "done"
+        job.result = result
+    job.updated_at = utcnow()
+    db.session.commit()
+
+
+def _run(app, job_id):
+    """
+    Runs a job on a worker thread inside its own app context and session.
+    """
+    with app.app_context():
+        try:
+            _execute(job_id)
+        finally:
+            db.session.remove()
+
+
+def sweep():
+    """
+    Fails running jobs that haven't reported in JOB_STALE_SECONDS, submits queued jobs again that haven't started
+    in JOB_REQUEUE_SECONDS (their delay timer or worker went away with a restart), then runs the SWEEPERS.
+    Returns (failed, resubmitted).
+    """
+    config = current_app.config
+    now = utcnow()
+    stale = Job.query.filter(Job.status == "running",
+                             Job.updated_at < now - timedelta(seconds=config.get("JOB_STALE_SECONDS", 900))).all()
+    for job in stale:
+        job.status = "failed"
+        job.error = "interrupted"
+    waiting = Job.query.filter(Job.status == "queued",
+                               Job.updated_at < now - timedelta(seconds=config.get("JOB_REQUEUE_SECONDS", 60))).all()
+    for job in waiting:
+        job.updated_at = now
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    for job in waiting:
+        if config.get("JOBS_EAGER"):
+            _execute(job.id)
+        else:
+            get_executor(app).submit(_run, app, job.id)
+    for func in SWEEPERS:
+        func()
+    return len(stale), len(waiting)
+
+
+_sweeper_started = False
+
+
+def _sweep_forever(app, interval):
+    while True:
+        with app.app_context():
+            try:
+                sweep()
+            except Exception:
+                traceback.print_exc()
+            finally:
+                db.session.remove()
+        time.sleep(interval)
+
+
+def start_sweeper(app):
+    """
+    Starts a thread running sweep() every JOB_SWEEP_SECONDS in this process, once.
+    """
+    global _sweeper_started
+    with _executor_lock:
+        if _sweeper_started:
+            return
+        _sweeper_started = True
+    threading.Thread(target=_sweep_forever, args=(app, app.config["JOB_SWEEP_SECONDS"]),
+                     name="skillsync-job-sweeper", daemon=True).start()
+
+
+def init_app(app):
+    """
+    Starts the sweeper on the first request each process serves (after a preloading server forks), unless
+    JOB_SWEEP_SECONDS is 0 or jobs run eagerly.
+    """
+    if not app.config.get("JOB_SWEEP_SECONDS") or app.config.get("JOBS_EAGER"):
+        return
+
+    @app.before_request
+    def _start_sweeper():
+        if not _sweeper_started:
+            start_sweeper(app)
@@ -0,0 +1,215 @@
+import bisect
+import functools
+import json
+import logging
+import threading
+import time
+
+from flask import g, has_request_context, request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# seconds, from a fast SQL query to a full GitHub sync
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+trace_log = logging.getLogger("skillsync.trace")
+
+# flipped by init_app, timers cost one attribute check while off
+enabled = True
+tracing = False
+
+
+class Histogram:
+    """
+    Thread safe Prometheus style histogram with one series per tuple of label values.
+    """
+
+    def __init__(self, name, help, labels=(), buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, seconds, *label_values):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # per bucket counts (the last one is +Inf), sum, count
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+
+    def snapshot(self):
+        """
+        {label values: (cumulative bucket counts, sum, count)}.
+        """
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        result = {}
+        for labels, (counts, total, count) in series.items():
+            cumulative, running = [], 0
+            for bucket_count in counts:
+                running += bucket_count
+                cumulative.append(running)
+            result[labels] = (cumulative, total, count)
+        return result
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, (cumulative, total, count) in sorted(self.snapshot().items()):
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.labels, label_values)]
+            for bound, bucket_count in zip(list(self.buckets) + ["+Inf"], cumulative):
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{{{','.join(labels + [le])}}} {bucket_count}")
+            suffix = f"{{{','.join(labels)}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total:.6f}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+STAGE_SECONDS = Histogram("skillsync_stage_seconds",
+                          "Time spent in a pipeline stage: GitHub requests and syncs, text extraction, resume parsing.",
+                          ("stage",))
+REQUEST_SECONDS = Histogram("skillsync_request_seconds", "HTTP request latency by endpoint.",
+                            ("endpoint", "method", "status"))
+SQL_SECONDS = Histogram("skillsync_sql_seconds", "SQL statement execution time.")
+HISTOGRAMS = [STAGE_SECONDS, REQUEST_SECONDS, SQL_SECONDS]
+
+# (prefix, help, function returning {name: number}), rendered as gauges
+_collectors = []
+
+
+def register_collector(prefix, help, snapshot):
+    """
+    Exposes the numbers in an existing stats snapshot, e.g. github_client.stats.snapshot, as gauges.
+    """
+    _collectors.append((prefix, help, snapshot))
+
+
+def record_stage(stage, seconds):
+    STAGE_SECONDS.observe(seconds, stage)
+    if tracing and has_request_context():
+        stages = g.setdefault("trace_stages", {})
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+class timer:
+    """
+    Times a block, or a function when used as a decorator, as a pipeline stage.
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if enabled:
+            record_stage(self.stage, time.perf_counter() - self.start)
+
+    def __call__(self, func):
+        stage = self.stage
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record_stage(stage, time.perf_counter() - start)
+        return wrapper
+
+
+def render():
+    """
+    Every metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    for prefix, help, snapshot in _collectors:
+        for name, value in sorted(snapshot().items()):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            metric = f"skillsync_{prefix}_{name}"
+            lines.extend([f"# HELP {metric} {help}", f"# TYPE {metric} gauge", f"{metric} {value}"])
+    return "\n".join(lines) + "\n"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # kept on the statement's execution context, so a statement that fails leaves nothing behind
+    if enabled and context is not None:
+        context.skillsync_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "skillsync_query_start", None)
+    if start is None:
+        return
+    seconds = time.perf_counter() - start
+    SQL_SECONDS.observe(seconds)
+    if tracing and has_request_context():
+        g.trace_sql = getattr(g, "trace_sql", 0.0) + seconds
+        g.trace_queries = getattr(g, "trace_queries", 0) + 1
+
+
+def _before_request():
+    g.request_start = time.perf_counter()
+
+
+def _after_request(response):
+    start = g.pop("request_start", None)
+    if start is None:
+        return response
+    seconds = time.perf_counter() - start
+    REQUEST_SECONDS.observe(seconds, request.endpoint or "unmatched", request.method, response.status_code)
+    if tracing:
+        trace_log.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "ms": round(seconds * 1000, 3),
+            "sql_queries": g.get("trace_queries", 0),
+            "sql_ms": round(g.get("trace_sql", 0.0) * 1000, 3),
+            "stages_ms": {stage: round(value * 1000, 3) for stage, value in g.get("trace_stages", {}).items()},
+        }))
+    return response
+
+
+def metrics_view():
+    return Response(render(), mimetype="text/plain; version=0.0.4")
+
+
+def init_app(app):
+    """
+    Adds request and SQL timing and the /metrics endpoint when METRICS_ENABLED, and per-request trace log lines
+    when METRICS_TRACE is set too.
+    """
+    global enabled, tracing
+    enabled = app.config.get("METRICS_ENABLED", True)
+    tracing = enabled and app.config.get("METRICS_TRACE", False)
+    if not enabled:
+        return
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
@@ -1,12 +1,13 @@
-import os
-from cryptography.fernet import Fernet
+from datetime import datetime, timezone
+from sqlalchemy import event
 from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Session, validates
 from dotenv import load_dotenv
 
-from . import db
+from . import db, vocabulary
+from .token_vault import vault
 
 load_dotenv()
-fernet = Fernet(os.getenv("ENCRYPTION_KEY"))
 
 class User(db.Model):
     """
@@ -17,6 +18,8 @@ class User(db.Model):
     _access_token = db.Column("access_token", db.LargeBinary)
     github_username = db.Column(db.String(64), nullable = False, unique=True)
     resume_uploaded = db.Column(db.Boolean, default=False)
+    # bumped whenever the user's repositories or resume change, stored recommendations older than it are stale
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     # relationship
     repositories = db.relationship("Repository", backref="user",lazy=True)
@@ -25,26 +28,30 @@ class User(db.Model):
         for key, value in kwargs.items():
             setattr(self, key, value)
     
-    def serialize(self):
+    SERIALIZE_FIELDS = ("id", "github_username", "resume_uploaded", "repositories")
+
+    def serialize(self, fields=None):
         """
-        Serialized version of a user. Includes repositories
+        Serialized version of a user. Includes repositories unless `fields` leaves them out.
         """
-        return {
-            "id": self.id,
-            "github_username": self.github_username,
-            "resume_uploaded": self.resume_uploaded,
-            "repositories": [reps.serialize() for reps in self.repositories]
-        }
+        fields = fields or self.SERIALIZE_FIELDS
+        data = {}
+        for field in fields:
+            if field == "repositories":
+                data["repositories"] = [reps.serialize() for reps in self.repositories]
+            else:
+                data[field] = getattr(self, field)
+        return data
     
     @hybrid_property
     def access_token(self):
         if self._access_token:
-            return fernet.decrypt(self._access_token).decode()
+            return vault.decrypt(self._access_token)
         return None
     
     @access_token.setter
     def access_token(self, token_plaintext):
-        self._access_token = fernet.encrypt(token_plaintext.encode())
+        self._access_token = vault.encrypt(token_plaintext)
 
 class Repository(db.Model):
     """
@@ -57,6 +64,19 @@ class Repository(db.Model):
     languages = db.Column(db.JSON, default=list)
     description = db.Column(db.String, nullable=True)
     commit_summary = db.Column(db.JSON, default=list)
+    # {topic: number of commits showing it} and {language: share of the repos bytes}
+    topic_counts = db.Column(db.JSON, default=dict)
+    language_shares = db.Column(db.JSON, default=dict)
+    # {skill: number of commits mentioning it}
+    skill_counts = db.Column(db.JSON, default=dict)
+    # newest commit seen, so a re-sync only asks GitHub for commits after it
+    last_commit_sha = db.Column(db.String, nullable=True)
+    last_commit_date = db.Column(db.String, nullable=True)
+
+    # also serves every lookup by user_id, as its leading column
+    __table_args__ = (
+        db.Index("ix_repository_user_id_name", "user_id", "name", unique=True),
+    )
 
     def __init__(self, **kwargs):
         for key, value in kwargs.items():
@@ -68,7 +88,10 @@ class Repository(db.Model):
             "name": self.name,
             "languages": self.languages,
             "description": self.description,
-            "commit_summary": self.commit_summary
+            "commit_summary": self.commit_summary,
+            "topic_counts": self.topic_counts,
+            "language_shares": self.language_shares,
+            "skill_counts": self.skill_counts
         }
 
 class ResumeData(db.Model):
@@ -80,7 +103,12 @@ class ResumeData(db.Model):
     extracted_skills = db.Column(db.JSON, nullable=True)
     supported_skills = db.Column(db.JSON, nullable=True)
     skill_gaps = db.Column(db.JSON, nullable=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    # {skill: times mentioned in the resume}
+    skill_counts = db.Column(db.JSON, nullable=True)
+    # extracted_skills and supported_skills as vocabulary bitsets, kept in step by _set_bits
+    extracted_bits = db.Column(db.LargeBinary, nullable=True)
+    supported_bits = db.Column(db.LargeBinary, nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, unique=True, index=True)
 
     user = db.relationship("User", backref="resume_data")
 
@@ -88,6 +116,23 @@ class ResumeData(db.Model):
         for key, value in kwargs.items():
             setattr(self, key, value)
 
+    @validates("extracted_skills", "supported_skills")
+    def _set_bits(self, key, skills):
+        bits = vocabulary.pack(vocabulary.to_bits(skills or []))
+        if key == "extracted_skills":
+            self.extracted_bits = bits
+        else:
+            self.supported_bits = bits
+        return skills
+
+    def skill_bits(self):
+        """
+        (extracted, supported, gaps) as vocabulary bitsets.
+        """
+        extracted = vocabulary.stored_bits(self.extracted_bits, self.extracted_skills)
+        supported = vocabulary.stored_bits(self.supported_bits, self.supported_skills)
+        return extracted, supported, extracted & ~supported
+
     def serialize(self):
         return {
             "id": self.id,
@@ -96,4 +141,198 @@ class ResumeData(db.Model):
             "supported_skills": self.supported_skills,
             "skill_gaps": self.skill_gaps,
             "user_id": self.user_id
-        }
\ No newline at end of file
+        }
+
+JOB_ACTIVE_STATUSES = ("queued", "running")
+
+def utcnow():
+    """
+    Naive UTC timestamp, what the DateTime columns store.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class Job(db.Model):
+    """
+    Model to store background jobs (repo syncs, resume parsing) and their progress.
+    Only one active job may exist per dedupe_key.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(32), nullable=False)
+    dedupe_key = db.Column(db.String, nullable=False)
+    status = db.Column(db.String(16), nullable=False, default="queued")
+    progress = db.Column(db.Integer, default=0)
+    total = db.Column(db.Integer, nullable=True)
+    payload = db.Column(db.JSON, default=dict)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.String, nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
+    created_at = db.Column(db.DateTime, default=utcnow)
+    updated_at = db.Column(db.DateTime, default=utcnow)
+
+    __table_args__ = (
+        db.Index("ix_job_active_dedupe_key", "dedupe_key", unique=True,
+                 sqlite_where=db.text("status IN ('queued', 'running')"),
+                 postgresql_where=db.text("status IN ('queued', 'running')")),
+    )
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    def serialize(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "total": self.total,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class WebhookEvent(db.Model):
+    """
+    Model to store GitHub webhook deliveries until a job applies them to the repo they are about.
+    delivery_id is GitHub's X-GitHub-Delivery, so a redelivery is only stored once.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    delivery_id = db.Column(db.String(64), nullable=True, unique=True)
+    event = db.Column(db.String(32), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    repo_name = db.Column(db.String, nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    received_at = db.Column(db.DateTime, default=utcnow)
+    processed_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_webhook_event_user_id_repo_name", "user_id", "repo_name"),
+        db.Index("ix_webhook_event_processed_at", "processed_at"),
+    )
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+class ParsedResume(db.Model):
+    """
+    Content addressed cache of parsed resumes, keyed by the sha256 of the uploaded bytes and the skill taxonomy version.
+    """
+    key = db.Column(db.String(80), primary_key=True)
+    taxonomy_version = db.Column(db.String(12), nullable=False, index=True)
+    text = db.Column(db.Text)
+    extracted_skills = db.Column(db.JSON)
+    supported_skills = db.Column(db.JSON)
+    skill_gaps = db.Column(db.JSON)
+    skill_counts = db.Column(db.JSON)
+    size = db.Column(db.Integer, default=0)
+    last_used = db.Column(db.DateTime, default=utcnow, index=True)
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+class Recommendation(db.Model):
+    """
+    A user's last computed recommendations and the data_version they were computed from.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    data_version = db.Column(db.Integer, nullable=False)
+    result = db.Column(db.JSON)
+    computed_at = db.Column(db.DateTime, default=utcnow)
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+class SkillCorpus(db.Model):
+    """
+    Corpus wide TF-IDF document count, a single row, counted under taxonomy_version. The per skill document
+    frequencies are SkillFrequency rows.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    taxonomy_version = db.Column(db.String(12), nullable=False)
+    documents = db.Column(db.Integer, nullable=False, default=0)
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+class SkillFrequency(db.Model):
+    """
+    How many SkillCorpus documents mention one skill, by vocabulary ID. Skills no document mentioned may have no row.
+    """
+    term_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    documents = db.Column(db.Integer, nullable=False, default=0)
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+class SkillDocument(db.Model):
+    """
+    The skills a user's document (resume and commit messages) contributed to SkillCorpus, as an int32 array of
+    vocabulary IDs, so they can be taken back out when it changes.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    terms = db.Column(db.LargeBinary, nullable=False)
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+class Rollup(db.Model):
+    """
+    Org wide count of one skill, language or topic, kept up to date by rollups.index_users.
+    Resume kinds count users, repo kinds count repositories, and kind "total" holds the denominators.
+    """
+    kind = db.Column(db.String(16), primary_key=True)
+    name = db.Column(db.String, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    # top N of a kind is a range scan
+    __table_args__ = (
+        db.Index("ix_rollup_kind_count", "kind", "count"),
+    )
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+class RollupContribution(db.Model):
+    """
+    What a user's resume and repos last added to the rollups, {kind: {name: count}}, so it can be taken back out
+    when they change.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    counts = db.Column(db.JSON, nullable=False)
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+def bump_data_version(connection, user_ids):
+    """
+    Marks the users' stored recommendations as stale.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if user_ids:
+        table = User.__table__
+        connection.execute(table.update().where(table.c.id.in_(user_ids))
+                           .values(data_version=table.c.data_version + 1))
+
+@event.listens_for(Session, "before_flush")
+def _bump_changed_users(session, flush_context, instances):
+    """
+    Bumps data_version for every user whose Repository or ResumeData rows are about to be written.
+    Core statements skip this, see upsert_repositories.
+    """
+    user_ids = set()
+    for obj in list(session.new) + list(session.deleted) + list(session.dirty):
+        if not isinstance(obj, (Repository, ResumeData)):
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        user_ids.add(obj.user_id if obj.user_id is not None else getattr(obj.user, "id", None))
+    bump_data_version(session.connection(), user_ids)
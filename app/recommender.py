@@ -1,29 +1,122 @@
 
-from .models import Repository
+import threading
+import time
 from collections import Counter
 
+import numpy as np
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from . import adjacency, db, metrics, tfidf, vocabulary
+from .models import Recommendation, Repository, User, utcnow
+
+
+class RecommendationStats:
+    """
+    Thread safe hit/miss and recompute time counters for the stored recommendations, exposed for monitoring.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.recompute_seconds = 0.0
+
+    def record(self, hit, seconds=0.0):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+                self.recompute_seconds += seconds
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "recompute_seconds": round(self.recompute_seconds, 6),
+                "avg_recompute_ms": round(self.recompute_seconds / self.misses * 1000, 3) if self.misses else None,
+            }
+
+
+stats = RecommendationStats()
+metrics.register_collector("recommendations", "Stored recommendation lookups since the process started.", stats.snapshot)
+
+
+def get_recommendations(user, resume_data):
+    """
+    Returns the user's stored recommendations, recomputing and storing them with skill_recommender
+    if the user's repositories or resume changed since (their data_version moved on).
+    """
+    # read from the database, the user object may predate a bump from this session's flush
+    version = db.session.query(User.data_version).filter_by(id=user.id).scalar()
+    stored = db.session.get(Recommendation, user.id)
+    if stored is not None and stored.data_version == version:
+        stats.record(hit=True)
+        return stored.result
+
+    start = time.perf_counter()
+    result = skill_recommender(user, resume_data)
+    if stored is None:
+        stored = Recommendation(user_id=user.id)
+        db.session.add(stored)
+    stored.data_version = version
+    stored.result = result
+    stored.computed_at = utcnow()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # a concurrent request stored them first
+        db.session.rollback()
+    stats.record(hit=False, seconds=time.perf_counter() - start)
+    return result
+
+
+@metrics.timer("recommend")
 def skill_recommender(user, resume_data):
     recommendations = {}
-    resume_skills = set(resume_data.extracted_skills)
+    # the resume's skill sets as vocabulary bitsets
+    resume_bits, supported_bits, gap_bits = resume_data.skill_bits()
 
-    # skill gaps
-    skill_gaps = resume_data.skill_gaps
+    # skill gaps and supported skills, ranked by TF-IDF weight in the user's resume and commits
+    weights = tfidf.user_weights(user.id)
+    skill_gaps = sorted(vocabulary.from_bits(gap_bits), key=lambda skill: -weights.get(skill, 0))
     recommendations["skill_gaps"] = skill_gaps
+    recommendations["supported_skills"] = sorted(vocabulary.from_bits(supported_bits), key=lambda skill: -weights.get(skill, 0))
 
-    # skills in commites but not resume
+    # per topic commit counts and per language byte shares, summed over the user's repos
     repos = Repository.query.filter_by(user_id=user.id).all()
-    commit_summaries = set()
+    topic_weights = Counter()
+    language_weights = Counter()
+    main_languages = set()
     for repo in repos:
-        summary = repo.serialize().get("commit_summary")
-        commit_summaries.update(summary)
-    hidden_strengths = commit_summaries - resume_skills
-    recommendations["hidden_strengths"] = list(hidden_strengths)
+        # repos synced before topic counts were stored only have the flat topic list
+        topic_weights.update(repo.topic_counts or {topic: 1 for topic in repo.commit_summary or []})
+        language_weights.update(repo.language_shares or {})
+        main_languages.update(repo.languages or [])
+
+    # skills in commites but not resume, most committed first
+    hidden_strengths = [topic for topic, _ in topic_weights.most_common() if not vocabulary.to_bits([topic]) & resume_bits]
+    recommendations["hidden_strengths"] = hidden_strengths
+    recommendations["languages"] = {language: round(weight, 4) for language, weight in language_weights.most_common()}
 
-    # adjacent skills
+    # adjacent skills, ones that often come with the user's skills across all users
+    user_bits = resume_bits | vocabulary.to_bits(topic_weights) | vocabulary.to_bits(main_languages)
+    user_skills = np.array(vocabulary.ids_of(user_bits), dtype=np.int32)
+    graph = adjacency.get_graph(current_app.config.get("ADJACENCY_MAX_AGE", 3600))
+    graph.update_user(user.id, user_skills)
+    recommendations["adjacent_skills"] = [skill for skill, _ in graph.adjacent(user_skills)]
 
     # most demonstrated skills, boost these in the resume
-    skill_counts = Counter(resume_data.supported_skills) + Counter(list(commit_summaries))
-    recommendations["skill_counts"] = skill_counts
+    skill_counts = Counter(resume_data.supported_skills) + topic_weights
+    recommendations["skill_counts"] = dict(skill_counts.most_common())
 
 
 
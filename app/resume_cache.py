@@ -0,0 +1,74 @@
+import hashlib
+
+from flask import current_app
+
+from . import db
+from .models import ParsedResume, utcnow
+from .resume_checker import taxonomy_version
+
+
+def file_digest(path):
+    """
+    sha256 of a file's bytes, read in chunks.
+    """
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def cache_key(digest):
+    return f"{digest}:{taxonomy_version()}"
+
+
+def lookup(digest):
+    """
+    Returns the cached ParsedResume for an upload's digest, or None. Entries parsed under an older
+    SKILL_LIST/SECTION_HEADERS have a different key, so they never match, and entries cached before skill
+    mentions were counted are treated as misses.
+    """
+    entry = db.session.get(ParsedResume, cache_key(digest))
+    if entry and entry.skill_counts is None:
+        return None
+    if entry:
+        entry.last_used = utcnow()
+        db.session.commit()
+    return entry
+
+
+def store(digest, text, extracted_skills, supported_skills, skill_gaps, skill_counts=None):
+    """
+    Caches a parsed resume and evicts down to RESUME_CACHE_MAX_BYTES.
+    """
+    db.session.merge(ParsedResume(key=cache_key(digest),
+                                  taxonomy_version=taxonomy_version(),
+                                  text=text,
+                                  extracted_skills=extracted_skills,
+                                  supported_skills=supported_skills,
+                                  skill_gaps=skill_gaps,
+                                  skill_counts=skill_counts or {},
+                                  size=len(text.encode()),
+                                  last_used=utcnow()))
+    db.session.commit()
+    evict()
+
+
+def evict():
+    """
+    Drops entries from older taxonomy versions, then the least recently used entries until the cached text
+    fits in RESUME_CACHE_MAX_BYTES.
+    """
+    ParsedResume.query.filter(ParsedResume.taxonomy_version != taxonomy_version()).delete(synchronize_session=False)
+
+    max_bytes = current_app.config.get("RESUME_CACHE_MAX_BYTES", 50 * 1024 * 1024)
+    total = db.session.query(db.func.coalesce(db.func.sum(ParsedResume.size), 0)).scalar()
+    if total > max_bytes:
+        stale = []
+        for key, size in db.session.query(ParsedResume.key, ParsedResume.size).order_by(ParsedResume.last_used):
+            if total <= max_bytes:
+                break
+            stale.append(key)
+            total -= size
+        ParsedResume.query.filter(ParsedResume.key.in_(stale)).delete(synchronize_session=False)
+    db.session.commit()
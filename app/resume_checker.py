@@ -1,5 +1,11 @@
+import hashlib
+import json
+import os
 import spacy
 from spacy.matcher import PhraseMatcher
+from spacy.tokens import DocBin
+
+from . import metrics, vocabulary
 
 # Topic keywords kindly provided by Chatham Grant-Parker-Turner (ChatGPT)
 PROGRAMMING_LANGUAGES = [
@@ -118,101 +124,121 @@ SECTION_HEADERS = [
 ]
 
 # spaCy PhraseMatcher initialization
+# Only the tokenizer is needed for PhraseMatcher(attr="LOWER"), so the statistical components are never loaded
+SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_sm")
+UNUSED_COMPONENTS = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner", "senter"]
 nlp = None
 matcher = None
 
 def get_nlp():
     global nlp
     if nlp is None:
-        nlp = spacy.load("en_core_web_sm")
+        nlp = spacy.load(SPACY_MODEL, exclude=UNUSED_COMPONENTS)
     return nlp
 
-def get_matcher():
+def taxonomy_version():
+    """
+    Short hash of SKILL_LIST, SECTION_HEADERS and the skill aliases. Changes whenever the skill taxonomy does.
+    """
+    taxonomy = json.dumps([SKILL_LIST, SECTION_HEADERS, vocabulary.ALIASES], sort_keys=True).encode()
+    return hashlib.sha1(taxonomy).hexdigest()[:12]
+
+def pattern_docs(cache_dir=None):
+    """
+    Tokenized SKILL_LIST and SECTION_HEADERS patterns. With a cache_dir they are stored there as a DocBin named after
+    the taxonomy version, and later startups load them instead of tokenizing every pattern again.
+    """
+    nlp_instance = get_nlp()
+    cache_path = os.path.join(cache_dir, f"matcher-{taxonomy_version()}.spacy") if cache_dir else None
+
+    if cache_path and os.path.exists(cache_path):
+        docs = list(DocBin().from_disk(cache_path).get_docs(nlp_instance.vocab))
+    else:
+        docs = [nlp_instance.make_doc(pattern) for pattern in SKILL_LIST + SECTION_HEADERS]
+        if cache_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            DocBin(attrs=["ORTH"], docs=docs).to_disk(cache_path)
+
+    return docs[:len(SKILL_LIST)], docs[len(SKILL_LIST):]
+
+def get_matcher(cache_dir=None):
     global matcher
     if matcher is None:
         nlp_instance = get_nlp()
 
         matcher_instance = PhraseMatcher(nlp_instance.vocab, attr="LOWER")
 
-        patterns = [nlp_instance.make_doc(skill) for skill in SKILL_LIST]
-        sections = [nlp_instance.make_doc(section) for section in SECTION_HEADERS]
+        patterns, sections = pattern_docs(cache_dir)
 
         matcher_instance.add("SKILLS", patterns)
+        # alternative spellings match as skills too, parse_lines maps them back to the canonical name
+        matcher_instance.add("SKILLS", [nlp_instance.make_doc(alias) for alias in vocabulary.ALIASES])
         matcher_instance.add("SECTIONS", sections)
 
         matcher = matcher_instance
 
     return matcher
 
-def match_skills(text):
+def warm_up(cache_dir=None):
     """
-    Grabs a list of skills from the provided text. Skills are from the above skill list.
+    Loads the model and builds the matcher ahead of the first upload, and runs one small resume through the parser.
+    Called from create_app when NLP_WARM_UP is on, so with a preloading server (see gunicorn.conf.py) the model
+    is loaded once in the master and shared copy-on-write by the forked workers.
     """
-    doc = get_nlp()(text)
-    matches = get_matcher()(doc)
-    nlp_instance = get_nlp()
+    get_nlp()
+    get_matcher(cache_dir)
+    resume_parser("Skills\npython\n")
 
-    skill_matches =[(label, start, end) for (match_id, start, end) in matches
-                    if nlp_instance.vocab.strings[match_id] == "SKILLS"
-                    for label in [nlp_instance.vocab.strings[match_id]]]
 
-    found = set()
-    for _, start, end in skill_matches:
-        span = doc[start:end]
-        found.add(span.text.lower())
-    return list(found)
-
-
-def split_sections(text):
+def parse_lines(line_docs, counts=None):
     """
-    Split the resume into sections based on SECTION_HEADERS, anchored to line starts.
+    Sorts the skills in a tokenized resume into extracted skills, supported skills (mentioned outside of the skills section)
+    and skill gaps (only listed in the skills section). Takes the resume as an iterable of tokenized lines: a section
+    header is a SECTIONS match at the start of a line, and every skill after it belongs to that section until the next one.
+    Text before the first section header is ignored. If a Counter is passed as `counts`, every skill mention is counted in it.
     """
-    doc = get_nlp()(text)
-    matches = get_matcher()(doc)
-    nlp_instance = get_nlp()
-
-    section_matches = []
-    for match_id, start, end in matches:
-        label = nlp_instance.vocab.strings[match_id]
-        if label != "SECTIONS":
+    matcher = get_matcher()
+    strings = get_nlp().vocab.strings
+    # skill bitsets, see vocabulary
+    extracted_bits = supported_bits = 0
+    section = None
+
+    for doc in line_docs:
+        matches = matcher(doc)
+        header_end = 0
+        for match_id, start, end in matches:
+            if start == 0 and end > header_end and strings[match_id] == "SECTIONS":
+                section, header_end = doc[start:end].text.lower().strip(), end
+        if section is None:
             continue
-        
-        span = doc[start:end]
-        char_start = span.start_char
-        if char_start == 0 or text[char_start-1] in ["\n", "\r"]:
-            section_matches.append((span.text.lower().strip(), start, end))
-    
-    deduped_matches = []
-    seen_starts = {}
-    for name, start, end in section_matches:
-        if start not in seen_starts or (end - start) > (seen_starts[start][2] - seen_starts[start][1]):
-            seen_starts[start] = (name, start, end)
-    deduped_matches = list(seen_starts.values())
-
-    deduped_matches.sort(key=lambda x: x[1])
-
-    sections = {}
-    for i, (section_name, start, end) in enumerate(deduped_matches):
-        next_start = deduped_matches[i+1][1] if i+1 < len(deduped_matches) else len(doc)
-        sections[section_name] = doc[end:next_start].text.strip()
-
-    return sections
-
-
-def resume_parser(text):
+
+        for match_id, start, end in matches:
+            if start >= header_end and strings[match_id] == "SKILLS":
+                skill = vocabulary.canonical(doc[start:end].text)
+                bit = 1 << vocabulary.SKILL_IDS[skill]
+                extracted_bits |= bit
+                if counts is not None:
+                    counts[skill] += 1
+                if section != "skills":
+                    supported_bits |= bit
+
+    gap_bits = extracted_bits & ~supported_bits
+    return vocabulary.from_bits(extracted_bits), vocabulary.from_bits(supported_bits), vocabulary.from_bits(gap_bits)
+
+
+def tokenize_lines(text):
     """
-    extract skills...
+    Tokenizes a resume one line at a time, in a single pass over the text. Tokens never cross a line break so this
+    gives the same tokens as tokenizing the whole text, but spaCy stops caching tokenizations for the rest of a doc
+    after its first special case ("e.g.", "don't"), so one long doc mostly misses the tokenizer cache.
     """
-    sections = split_sections(text)
-    extracted_skills, supported_skills = set(), set()
-
-    for section, sec_text in sections.items():
-        found_skills = set(match_skills(sec_text))
-        extracted_skills |= found_skills 
-        if section != "skills":
-            supported_skills |= found_skills
+    return get_nlp().tokenizer.pipe(text.splitlines(keepends=True))
 
-    skill_gaps = extracted_skills - supported_skills
-    extracted_skills, supported_skills = list(set(extracted_skills)), list(set(supported_skills))
 
-    return extracted_skills, supported_skills, list(skill_gaps)
+@metrics.timer("resume_parse")
+def resume_parser(text, counts=None):
+    """
+    extract skills from a resume's text. Only the tokenizer runs, once over the text, with one matcher call per line.
+    Returns (extracted skills, supported skills, skill gaps), and counts every skill mention into `counts` if given.
+    """
+    return parse_lines(tokenize_lines(text), counts)
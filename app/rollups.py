@@ -0,0 +1,135 @@
+from collections import Counter
+
+from . import db, vocabulary
+from .models import Repository, ResumeData, Rollup, RollupContribution
+from .upsert import DIALECT_INSERTS
+
+# what each kind counts, and the "total" row it is a share of
+RESUME_KINDS = ("skill", "supported", "gap")
+REPO_KINDS = ("language", "topic")
+KINDS = RESUME_KINDS + REPO_KINDS
+TOTALS = dict.fromkeys(RESUME_KINDS, "resumes") | dict.fromkeys(REPO_KINDS, "repos")
+
+
+def user_contributions(user_ids):
+    """
+    {user_id: Counter of (kind, name)} for each user: one per resume skill, supported skill and skill gap, and one
+    per repo showing a language or topic. Reads the columns only, without loading ORM objects.
+    """
+    contributions = {user_id: Counter() for user_id in user_ids}
+    for user_id, extracted_bits, extracted, supported_bits, supported in db.session.query(
+            ResumeData.user_id, ResumeData.extracted_bits, ResumeData.extracted_skills,
+            ResumeData.supported_bits, ResumeData.supported_skills).filter(ResumeData.user_id.in_(user_ids)):
+        extracted = vocabulary.stored_bits(extracted_bits, extracted)
+        supported = vocabulary.stored_bits(supported_bits, supported)
+        counts = contributions[user_id]
+        counts["total", "resumes"] += 1
+        for kind, bits in (("skill", extracted), ("supported", supported), ("gap", extracted & ~supported)):
+            counts.update((kind, name) for name in vocabulary.from_bits(bits))
+    for user_id, languages, topics in db.session.query(
+            Repository.user_id, Repository.languages, Repository.commit_summary).filter(Repository.user_id.in_(user_ids)):
+        counts = contributions[user_id]
+        counts["total", "repos"] += 1
+        counts.update(("language", language) for language in set(languages or []))
+        counts.update(("topic", topic) for topic in set(topics or []))
+    return contributions
+
+
+def _to_json(counts):
+    stored = {}
+    for (kind, name), count in sorted(counts.items()):
+        stored.setdefault(kind, {})[name] = count
+    return stored
+
+
+def _from_json(stored):
+    return Counter({(kind, name): count for kind, names in stored.items() for name, count in names.items()})
+
+
+def _apply(delta):
+    """
+    Adds a Counter of (kind, name) changes to the stored rollups, in the database so concurrent writers don't
+    overwrite each other.
+    """
+    rows = [{"kind": kind, "name": name, "count": count} for (kind, name), count in sorted(delta.items()) if count]
+    if not rows:
+        return
+    insert = DIALECT_INSERTS[db.session.get_bind().dialect.name]
+    statement = insert(Rollup.__table__)
+    statement = statement.on_conflict_do_update(index_elements=["kind", "name"],
+                                                set_={"count": Rollup.__table__.c.count + statement.excluded.count})
+    db.session.execute(statement, rows)
+
+
+def index_users(user_ids):
+    """
+    Brings the rollups up to date after the users' resume or repos changed, by taking out what they contributed
+    before and adding what they contribute now. Doesn't commit.
+    """
+    user_ids = sorted(set(user_ids))
+    contributions = user_contributions(user_ids)
+    stored = {row.user_id: row for row in RollupContribution.query.filter(
+        RollupContribution.user_id.in_(user_ids)).with_for_update()}
+    delta = Counter()
+    for user_id in user_ids:
+        new = contributions[user_id]
+        row = stored.get(user_id)
+        if row is None:
+            db.session.add(RollupContribution(user_id=user_id, counts=_to_json(new)))
+        else:
+            delta.subtract(_from_json(row.counts))
+            row.counts = _to_json(new)
+        delta.update(new)
+    _apply(delta)
+
+
+def _all_user_ids():
+    return sorted({user_id for (user_id,) in db.session.query(ResumeData.user_id)}
+                  | {user_id for (user_id,) in db.session.query(Repository.user_id).distinct() if user_id is not None})
+
+
+def recount(batch_size=1000):
+    """
+    Counts the rollups from scratch, as a Counter of (kind, name), along with each user's contribution.
+    """
+    totals = Counter()
+    contributions = {}
+    user_ids = _all_user_ids()
+    for start in range(0, len(user_ids), batch_size):
+        for user_id, counts in user_contributions(user_ids[start:start + batch_size]).items():
+            totals.update(counts)
+            contributions[user_id] = counts
+    return totals, contributions
+
+
+def verify(batch_size=1000):
+    """
+    Differences between the stored rollups and a recount, as [(kind, name, stored, recounted)].
+    """
+    recounted, _ = recount(batch_size)
+    stored = Counter({(row.kind, row.name): row.count for row in Rollup.query if row.count})
+    return [(kind, name, stored[kind, name], recounted[kind, name])
+            for kind, name in sorted(set(stored) | set(recounted)) if stored[kind, name] != recounted[kind, name]]
+
+
+def rebuild(batch_size=1000):
+    """
+    Replaces the stored rollups and contributions with a recount. Doesn't commit.
+    """
+    totals, contributions = recount(batch_size)
+    Rollup.query.delete()
+    RollupContribution.query.delete()
+    db.session.add_all(RollupContribution(user_id=user_id, counts=_to_json(counts))
+                       for user_id, counts in contributions.items())
+    _apply(totals)
+    return totals
+
+
+def top(kind, limit=10):
+    """
+    The most common names of a kind with their counts, and the total they are counted out of, from the rollups.
+    """
+    rows = (Rollup.query.filter(Rollup.kind == kind, Rollup.count > 0)
+            .order_by(Rollup.count.desc(), Rollup.name).limit(limit).all())
+    total = db.session.get(Rollup, ("total", TOTALS[kind]))
+    return [(row.name, row.count) for row in rows], total.count if total else 0
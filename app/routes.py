@@ -1,19 +1,16 @@
 import os
+import uuid
 import requests
-from flask import Blueprint, jsonify, redirect, request, session, url_for, render_template
-from .models import User, Repository, ResumeData
+from flask import Blueprint, current_app, jsonify, redirect, request, session, url_for, render_template
+from .models import User, Repository, ResumeData, Job
 from . import db
-from .github_handler import github_handler
+from . import github_client, jobs, resume_cache, tasks, webhooks
+from sqlalchemy.orm import selectinload
 from flask_wtf import FlaskForm
 from wtforms import FileField, SubmitField
 from werkzeug.utils import secure_filename
-import os 
 from wtforms.validators import InputRequired
-from .resume_checker import resume_parser
-import fitz
-from docx import Document
-import io
-from .recommender import skill_recommender
+from . import recommender, rollups
 
 bp = Blueprint('main', __name__)
 
@@ -41,27 +38,6 @@ def allowed_file(filename):
     """
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def extract_text(filename, byte_content):
-    """
-    Extracts text from the document depending on what type of extension it has.
-    """
-    try:
-
-        if filename.lower().endswith(".pdf"):
-            with fitz.open(stream=byte_content, filetype="pdf") as doc:
-                text = "".join(page.get_text() for page in doc)
-        elif filename.lower().endswith(".docx"):
-            file_stream = io.BytesIO(byte_content)
-            document = Document(file_stream)
-            text = "\n".join([para.text for para in document.paragraphs])
-        elif filename.lower().endswith(".txt"):
-            text = byte_content.decode("utf-8")
-    except Exception as e:
-        print("Failed to parse resume:", e)
-        text = ""
-    
-    return text
-
 class UploadFileForm(FlaskForm):
     """
     Class to allow for file uploads on the frontend.
@@ -71,6 +47,27 @@ class UploadFileForm(FlaskForm):
 
 upload_folder = "static/files"
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def paginate(query, column):
+    """
+    Keyset pagination over an integer column. Reads `limit` and `after` (the last id of the previous page)
+    from the query string and returns (items, next cursor or None). Raises ValueError on bad arguments.
+    """
+    limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+    after = request.args.get("after")
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    if after is not None:
+        query = query.filter(column > int(after))
+    items = query.order_by(column).limit(limit + 1).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = getattr(items[-1], column.key)
+    return items, next_cursor
+
 @bp.route('/')
 def nuthin():
     """
@@ -82,22 +79,39 @@ def nuthin():
 @bp.route('/users')
 def all_user():
     """
-    Returns all users.
+    Returns a page of users. `fields` is a comma separated subset of User.SERIALIZE_FIELDS,
+    repositories are loaded for the whole page in one query when they are asked for.
     """
+    fields = request.args.get("fields")
+    fields = fields.split(",") if fields else User.SERIALIZE_FIELDS
+    unknown = set(fields) - set(User.SERIALIZE_FIELDS)
+    if unknown:
+        return failure_response(f"Unknown fields: {', '.join(sorted(unknown))}", 400)
+
+    query = User.query
+    if "repositories" in fields:
+        query = query.options(selectinload(User.repositories))
+    try:
+        page, next_cursor = paginate(query, User.id)
+    except ValueError as e:
+        return failure_response(str(e), 400)
 
-    users = [user.serialize() for user in User.query.all()]
+    users = [user.serialize(fields) for user in page]
 
-    return success_response({"users": users})
+    return success_response({"users": users, "next": next_cursor})
 
 @bp.route('/<int:user_id>/repos')
 def all_repos_for_user(user_id):
     """
-    Returns all repos for a user.
+    Returns a page of a user's repos.
     """
-    repos = Repository.query.filter_by(user_id=user_id).all()
+    try:
+        repos, next_cursor = paginate(Repository.query.filter_by(user_id=user_id), Repository.id)
+    except ValueError as e:
+        return failure_response(str(e), 400)
     repo_list = [repo.serialize() for repo in repos]
 
-    return success_response({"repos": repo_list})
+    return success_response({"repos": repo_list, "next": next_cursor})
 
 @bp.route('/<int:user_id>/resume')
 def user_resume(user_id):
@@ -146,7 +160,10 @@ def github_callback():
     if not exists:
         user = User(access_token = access_token, github_username = username)
         db.session.add(user)
-        db.session.commit()
+    else:
+        # background syncs use the stored token, keep it current
+        exists.access_token = access_token
+    db.session.commit()
     session['github_username'] = username
     session['access_token'] = access_token
     return redirect(url_for("main.dashboard"))
@@ -155,14 +172,91 @@ def github_callback():
 @bp.route('/github/repos', methods=["POST"])
 def github_repos():
     """
-    Adds a users repos to the database
+    Queues a sync of the user's repos into the database. Returns the job id to poll at /jobs/<job_id>.
+    A sync that is already queued or running is returned instead of starting another.
     """
     access_token = session.get("access_token")
     username = session.get("github_username")
     if not access_token:
         return failure_response("Unauthorized", 401)
-    github_handler(username, access_token)
-    return success_response({"message": "successfully added user's repos to the database."})
+    user = User.query.filter_by(github_username=username).first()
+    if not user:
+        return failure_response("User not found")
+    job = jobs.enqueue("github_sync", f"github_sync:{user.id}", {"username": username}, user_id=user.id)
+    return success_response({"message": "syncing user's repos to the database.", "job_id": job.id}, 202)
+
+@bp.route('/github/webhook', methods=["POST"])
+def github_webhook():
+    """
+    Receives GitHub push and repository webhooks signed with GITHUB_WEBHOOK_SECRET. Each delivery is stored and
+    its repo's update queued GITHUB_WEBHOOK_COALESCE_SECONDS later, so a burst of pushes to a repo is one update.
+    Deliveries for unknown users, forks and other events are acknowledged and dropped.
+    """
+    config = current_app.config
+    secret = config.get("GITHUB_WEBHOOK_SECRET")
+    if not secret:
+        return failure_response("Webhooks are not enabled")
+    if not webhooks.verify_signature(secret, request.get_data(), request.headers.get("X-Hub-Signature-256")):
+        return failure_response("Invalid signature", 401)
+
+    event = request.headers.get("X-GitHub-Event")
+    if event == "ping":
+        return success_response({"message": "pong"})
+    if event not in webhooks.EVENTS:
+        return success_response({"message": f"ignored {event} event"})
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get("repository"), dict):
+        return failure_response("Expected a JSON payload with a repository", 400)
+
+    repository = payload["repository"]
+    owner = repository.get("owner") or {}
+    user = User.query.filter_by(github_username=owner.get("login") or owner.get("name")).first()
+    if not user or repository.get("fork"):
+        return success_response({"message": "ignored, not a tracked repo"})
+    name = webhooks.repo_name(event, payload)
+    if not webhooks.record(request.headers.get("X-GitHub-Delivery"), event, user.id, name, payload):
+        return success_response({"message": "already received"})
+    job = webhooks.queue(user.id, name)
+    return success_response({"message": "queued", "job_id": job.id}, 202)
+
+@bp.route('/jobs/<int:job_id>')
+def job_status(job_id):
+    """
+    Returns the status and progress of one of the user's background jobs.
+    """
+    username = session.get("github_username")
+    if not username:
+        return failure_response("Unauthorized", 401)
+    user = User.query.filter_by(github_username=username).first()
+    job = db.session.get(Job, job_id)
+    if not job or not user or job.user_id != user.id:
+        return failure_response("Job not found")
+    return success_response(job.serialize())
+
+@bp.route('/github/stats')
+def github_stats():
+    """
+    Returns the GitHub client's cache hit/miss, retry and rate limit counters.
+    """
+    return success_response({"github": github_client.stats.snapshot()})
+
+@bp.route('/analytics/<kind>')
+def analytics(kind):
+    """
+    Returns the most common skills, supported skills or skill gaps across all resumes, or languages or commit
+    topics across all repos, with counts and the total they are out of. Read from the rollups, not the raw rows.
+    """
+    if kind not in rollups.KINDS:
+        return failure_response(f"Unknown kind, expected one of: {', '.join(rollups.KINDS)}", 400)
+    try:
+        limit = int(request.args.get("limit", 10))
+    except ValueError:
+        return failure_response("limit must be an integer", 400)
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        return failure_response(f"limit must be between 1 and {MAX_PAGE_SIZE}", 400)
+    counts, total = rollups.top(kind, limit)
+    return success_response({"kind": kind, "total": total,
+                             "top": [{"name": name, "count": count} for name, count in counts]})
 
 @bp.route('/dashboard', methods=["GET", "POST"])
 def dashboard():
@@ -170,9 +264,10 @@ def dashboard():
     if not username:
         return redirect(url_for("main.github_login"))
     user = User.query.filter_by(github_username=username).first()
-    existing_resume = ResumeData.query.filter_by(user_id=user.id).first()
 
     form = UploadFileForm()
+    job = None
+    parsed = False
 
     if form.validate_on_submit():
         file = form.file.data
@@ -181,45 +276,29 @@ def dashboard():
         if not allowed_file(filename):
             return "Invalid file type. Upload a PDF, DOCX, or TXT."
 
-        byte_content = file.read()
-        save_path = os.path.join(
-            os.path.abspath(os.path.dirname(__file__)),
-            upload_folder,
-            f"{user.id}_{filename}"
-        )
-        if existing_resume and os.path.exists(existing_resume.og_filename):
-            os.remove(existing_resume.og_filename)
-        
-        file.save(save_path)
-
-        
-        text = extract_text(filename, byte_content)
-        if text == "":
-            return "Resume could not be parsed"
-
-        extracted_skills, supported_skills, skill_gaps = resume_parser(text)
-
-        if existing_resume:
-            # Overwrite fields on existing record
-            existing_resume.og_filename = save_path
-            existing_resume.extracted_skills = extracted_skills
-            existing_resume.supported_skills = supported_skills
-            existing_resume.skill_gaps = skill_gaps
+        save_dir = current_app.config.get("UPLOAD_FOLDER") or os.path.join(os.path.abspath(os.path.dirname(__file__)), upload_folder)
+        os.makedirs(save_dir, exist_ok=True)
+        # named by the digest of its bytes, so a re-upload under the same name can't change the file a queued
+        # job will parse
+        upload_path = os.path.join(save_dir, f"{user.id}_{uuid.uuid4().hex}.upload")
+        file.save(upload_path)
+        digest = resume_cache.file_digest(upload_path)
+        save_path = os.path.join(save_dir, f"{user.id}_{digest[:16]}_{filename}")
+        os.replace(upload_path, save_path)
+
+        # the same file parsed before is stored straight from the cache, without touching spaCy
+        cached = resume_cache.lookup(digest)
+        if cached:
+            tasks.save_resume(user, save_path, cached.extracted_skills, cached.supported_skills, cached.skill_gaps,
+                              cached.skill_counts)
+            parsed = True
         else:
-            # Create new record
-            new_resume = ResumeData(
-                user_id=user.id,
-                og_filename=filename,
-                extracted_skills=extracted_skills,
-                supported_skills=supported_skills,
-                skill_gaps=skill_gaps
-            )
-            user.resume_uploaded = True
-            db.session.add(new_resume)
+            # parsing happens on the job workers, the page polls /jobs/<job_id>
+            job = jobs.enqueue("resume_parse", f"resume_parse:{user.id}:{digest}",
+                               {"user_id": user.id, "path": save_path, "filename": filename, "digest": digest},
+                               user_id=user.id)
 
-        db.session.commit()
-
-    return render_template("dashboard.html", username=username, form=form)
+    return render_template("dashboard.html", username=username, form=form, job=job, parsed=parsed)
 
 
 
@@ -227,6 +306,9 @@ def dashboard():
 # RECOMMENDER. WORK IN PROGRESS
 @bp.route('/recommendations', methods=["POST"])
 def recommendations():
+    """
+    Returns the logged in user's recommendations, recomputed only when their repos or resume changed.
+    """
     username = session.get("github_username")
     if not username:
         return failure_response("Unauthorized", 401)
@@ -237,5 +319,12 @@ def recommendations():
     if not resume_data:
         return failure_response("No resume found", 400)
 
-    recs = skill_recommender(user, resume_data) 
-    # return success_response({"recommendations": recs})
\ No newline at end of file
+    recs = recommender.get_recommendations(user, resume_data)
+    return success_response({"recommendations": recs})
+
+@bp.route('/recommendations/stats')
+def recommendation_stats():
+    """
+    Returns the stored recommendations' hit ratio and recompute time.
+    """
+    return success_response({"recommendations": recommender.stats.snapshot()})
\ No newline at end of file
@@ -0,0 +1,93 @@
+import os
+
+from flask import current_app
+
+from collections import Counter
+
+from . import db, resume_cache, rollups, tfidf, webhooks
+from .extraction import extract_file
+from .github_handler import github_handler
+from .jobs import job_handler, report_progress
+from .models import User, Repository, ResumeData
+from .resume_checker import resume_parser
+
+
+@job_handler("github_sync")
+def sync_github(job, username):
+    """
+    Background version of POST /github/repos. Uses the token stored on the user.
+    """
+    user = User.query.filter_by(github_username=username).first()
+    if not user or not user.access_token:
+        raise ValueError("User has no stored GitHub token")
+    job_id = job.id
+    user_id = user.id
+    github_handler(username, user.access_token,
+                   progress=lambda done, total: report_progress(job_id, done, total))
+    return {"repos": Repository.query.filter_by(user_id=user_id).count()}
+
+
+@job_handler("github_webhook", join_running=False)
+def apply_webhooks(job, user_id, repo_name):
+    """
+    Applies the webhook deliveries stored for one repo, queued by POST /github/webhook. A delivery that comes in
+    once this is running queues the next job rather than joining this one.
+    """
+    return {"events": webhooks.process_repo(user_id, repo_name)}
+
+
+@job_handler("resume_parse")
+def parse_resume(job, user_id, path, filename, digest=None):
+    """
+    Background version of the dashboard upload. Extracts the text of the saved file, parses it and stores the result.
+    Parsed uploads are cached by the digest of their bytes.
+    """
+    cached = resume_cache.lookup(digest) if digest else None
+    if cached:
+        extracted_skills, supported_skills, skill_gaps = cached.extracted_skills, cached.supported_skills, cached.skill_gaps
+        skill_counts = cached.skill_counts
+    else:
+        text = extract_file(path, filename, current_app.config)
+        if text == "":
+            raise ValueError("Resume could not be parsed")
+
+        skill_counts = Counter()
+        extracted_skills, supported_skills, skill_gaps = resume_parser(text, skill_counts)
+        skill_counts = dict(skill_counts)
+        # only cache under the digest the bytes actually have
+        if digest and resume_cache.file_digest(path) == digest:
+            resume_cache.store(digest, text, extracted_skills, supported_skills, skill_gaps, skill_counts)
+    save_resume(db.session.get(User, user_id), path, extracted_skills, supported_skills, skill_gaps, skill_counts)
+    return {"extracted_skills": len(extracted_skills), "skill_gaps": len(skill_gaps)}
+
+
+def save_resume(user, path, extracted_skills, supported_skills, skill_gaps, skill_counts=None):
+    """
+    Creates or overwrites the user's ResumeData row and updates the user's TF-IDF document and rollups.
+    """
+    existing_resume = ResumeData.query.filter_by(user_id=user.id).first()
+    if existing_resume:
+        if existing_resume.og_filename != path and os.path.exists(existing_resume.og_filename or ""):
+            os.remove(existing_resume.og_filename)
+        # Overwrite fields on existing record
+        existing_resume.og_filename = path
+        existing_resume.extracted_skills = extracted_skills
+        existing_resume.supported_skills = supported_skills
+        existing_resume.skill_gaps = skill_gaps
+        existing_resume.skill_counts = skill_counts
+    else:
+        # Create new record
+        new_resume = ResumeData(
+            user_id=user.id,
+            og_filename=path,
+            extracted_skills=extracted_skills,
+            supported_skills=supported_skills,
+            skill_gaps=skill_gaps,
+            skill_counts=skill_counts
+        )
+        user.resume_uploaded = True
+        db.session.add(new_resume)
+
+    tfidf.index_users([user.id])
+    rollups.index_users([user.id])
+    db.session.commit()
\ No newline at end of file
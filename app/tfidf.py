@@ -0,0 +1,169 @@
+import math
+from collections import Counter
+
+import numpy as np
+
+from . import db, vocabulary
+from .models import Repository, ResumeData, SkillCorpus, SkillDocument, SkillFrequency
+from .resume_checker import SKILL_LIST, taxonomy_version
+from .upsert import DIALECT_INSERTS, upsert
+
+# resume skills, indexed in the frequency arrays by their vocabulary ID
+VOCABULARY = list(dict.fromkeys(SKILL_LIST))
+INDEX = {skill: vocabulary.SKILL_IDS[skill] for skill in VOCABULARY}
+
+CORPUS_ID = 1
+
+
+def term_ids(term_counts):
+    """
+    Sorted vocabulary IDs of the skills with a positive count, as an int32 array.
+    """
+    return np.array(sorted(INDEX[skill] for skill, count in term_counts.items() if count > 0 and skill in INDEX),
+                    dtype=np.int32)
+
+
+class DocumentFrequencies:
+    """
+    Number of documents and, per vocabulary index, how many of them mention each skill. Updated one document at a
+    time by taking its old skills out and putting its new ones in, never recounted.
+    """
+
+    def __init__(self, documents=0, frequencies=None):
+        self.documents = documents
+        self.frequencies = np.zeros(vocabulary.SIZE, dtype=np.int64) if frequencies is None else frequencies
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        frequencies = np.zeros(vocabulary.SIZE, dtype=np.int64)
+        for term_id, documents in db.session.query(SkillFrequency.term_id, SkillFrequency.documents):
+            frequencies[term_id] = documents
+        return cls(corpus.documents, frequencies)
+
+    def replace(self, old_ids, new_ids):
+        """
+        Swaps a document's skills. old_ids is None for a new document.
+        """
+        if old_ids is None:
+            self.documents += 1
+        else:
+            self.frequencies[old_ids] -= 1
+        self.frequencies[new_ids] += 1
+
+    def idf(self):
+        """
+        Smoothed inverse document frequency of every skill, log((1 + N) / (1 + df)) + 1.
+        """
+        return np.log((1 + self.documents) / (1 + self.frequencies)) + 1
+
+    def weights(self, term_counts):
+        """
+        TF-IDF weight of every skill in a {skill: count} document, with a log scaled term frequency.
+        """
+        idf = self.idf()
+        return {skill: round((1 + math.log(count)) * float(idf[INDEX[skill]]), 4)
+                for skill, count in term_counts.items() if count > 0 and skill in INDEX}
+
+
+def user_term_counts(user_ids):
+    """
+    {user_id: Counter} of skill mentions in each user's resume plus the commits in their repos.
+    """
+    counts = {user_id: Counter() for user_id in user_ids}
+    for user_id, skill_counts in db.session.query(ResumeData.user_id, ResumeData.skill_counts).filter(
+            ResumeData.user_id.in_(user_ids)):
+        counts[user_id].update(skill_counts or {})
+    for user_id, skill_counts in db.session.query(Repository.user_id, Repository.skill_counts).filter(
+            Repository.user_id.in_(user_ids)):
+        counts[user_id].update(skill_counts or {})
+    return counts
+
+
+def load_corpus():
+    return db.session.execute(db.select(SkillCorpus).filter_by(id=CORPUS_ID)).scalar_one_or_none()
+
+
+def _create_corpus():
+    """
+    The corpus row, inserted empty if there is none yet. A concurrent insert wins instead of failing.
+    """
+    insert = DIALECT_INSERTS[db.session.get_bind().dialect.name]
+    db.session.execute(insert(SkillCorpus.__table__).values(id=CORPUS_ID, taxonomy_version=taxonomy_version(),
+                                                            documents=0).on_conflict_do_nothing(index_elements=["id"]))
+    return load_corpus()
+
+
+def _index(frequencies, user_ids):
+    counts = user_term_counts(user_ids)
+    stored = dict(db.session.query(SkillDocument.user_id, SkillDocument.terms).filter(
+        SkillDocument.user_id.in_(user_ids)).with_for_update())
+    rows = []
+    for user_id in user_ids:
+        new_ids = term_ids(counts[user_id])
+        terms = stored.get(user_id)
+        frequencies.replace(None if terms is None else np.frombuffer(terms, dtype=np.int32), new_ids)
+        rows.append({"user_id": user_id, "terms": new_ids.tobytes()})
+    upsert(SkillDocument, rows, ["user_id"])
+
+
+def _apply(frequencies, replace=False):
+    """
+    Adds a DocumentFrequencies of changes to the stored corpus, in the database so concurrent writers don't
+    overwrite each other. With replace, stores it as the whole corpus instead.
+    """
+    table = SkillFrequency.__table__
+    rows = [{"term_id": int(term_id), "documents": int(frequencies.frequencies[term_id])}
+            for term_id in np.flatnonzero(frequencies.frequencies)]
+    if rows:
+        insert = DIALECT_INSERTS[db.session.get_bind().dialect.name]
+        statement = insert(table)
+        documents = statement.excluded.documents if replace else table.c.documents + statement.excluded.documents
+        db.session.execute(statement.on_conflict_do_update(index_elements=["term_id"], set_={"documents": documents}),
+                           rows)
+    documents = frequencies.documents if replace else SkillCorpus.documents + frequencies.documents
+    db.session.execute(db.update(SkillCorpus).where(SkillCorpus.id == CORPUS_ID).values(documents=documents))
+
+
+def index_users(user_ids):
+    """
+    Brings the users' documents up to date in the corpus document frequencies after their resume or repos changed.
+    Rebuilds the corpus instead if the skill taxonomy changed since it was built. Doesn't commit.
+    """
+    user_ids = sorted(set(user_ids))
+    corpus = load_corpus()
+    if corpus is None or corpus.taxonomy_version != taxonomy_version():
+        return rebuild()
+    # counted from zero, so it holds only these users' changes
+    delta = DocumentFrequencies()
+    _index(delta, user_ids)
+    _apply(delta)
+
+
+def rebuild(batch_size=1000):
+    """
+    Recounts the corpus from every user with a resume or repos. Doesn't commit.
+    """
+    SkillDocument.query.delete()
+    SkillFrequency.query.delete()
+    corpus = load_corpus() or _create_corpus()
+
+    user_ids = sorted({user_id for (user_id,) in db.session.query(ResumeData.user_id)}
+                      | {user_id for (user_id,) in db.session.query(Repository.user_id).distinct() if user_id is not None})
+    frequencies = DocumentFrequencies()
+    for start in range(0, len(user_ids), batch_size):
+        _index(frequencies, user_ids[start:start + batch_size])
+    corpus.taxonomy_version = taxonomy_version()
+    _apply(frequencies, replace=True)
+    return frequencies
+
+
+def user_weights(user_id):
+    """
+    TF-IDF weight of each skill in a user's resume and commits against the stored corpus.
+    """
+    corpus = load_corpus()
+    if corpus is not None and corpus.taxonomy_version == taxonomy_version():
+        frequencies = DocumentFrequencies.from_corpus(corpus)
+    else:
+        frequencies = DocumentFrequencies()
+    return frequencies.weights(user_term_counts([user_id])[user_id])
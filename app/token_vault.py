@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from cryptography.fernet import Fernet, MultiFernet
+
+
+class TokenVaultError(Exception):
+    pass
+
+
+def load_keys():
+    """
+    Fernet keys from ENCRYPTION_KEYS (comma separated, newest first) or ENCRYPTION_KEY.
+    """
+    keys = [key.strip() for key in (os.getenv("ENCRYPTION_KEYS") or os.getenv("ENCRYPTION_KEY") or "").split(",")]
+    keys = [key for key in keys if key]
+    if not keys:
+        raise TokenVaultError("ENCRYPTION_KEYS or ENCRYPTION_KEY must be set to store access tokens")
+    return keys
+
+
+class TokenVault:
+    """
+    Encrypts access tokens with the first key and decrypts with any of them, so keys can be rotated by putting a
+    new one in front. Decrypted tokens are cached for ttl seconds by ciphertext, at most max_size of them, and the
+    plaintext is overwritten when an entry is evicted or expires. The keys are only loaded on first use.
+    """
+
+    def __init__(self, keys=None, ttl=300, max_size=1024):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._keys = keys
+        self._fernet = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def fernet(self):
+        if self._fernet is None:
+            keys = self._keys or load_keys()
+            self._fernet = MultiFernet([Fernet(key) for key in keys])
+        return self._fernet
+
+    def encrypt(self, token):
+        return self.fernet.encrypt(token.encode())
+
+    def decrypt(self, ciphertext):
+        ciphertext = bytes(ciphertext)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(ciphertext)
+            if entry is not None and entry[0] > now:
+                self._cache.move_to_end(ciphertext)
+                self.hits += 1
+                return entry[1].decode()
+            if entry is not None:
+                self._evict(ciphertext)
+            self.misses += 1
+
+        plaintext = bytearray(self.fernet.decrypt(ciphertext))
+        token = plaintext.decode()
+        if self.ttl > 0 and self.max_size > 0:
+            with self._lock:
+                if ciphertext in self._cache:
+                    self._evict(ciphertext)
+                self._cache[ciphertext] = (now + self.ttl, plaintext)
+                # least recently used first, which also drops expired tokens nobody asked for again
+                while self._cache and (len(self._cache) > self.max_size or next(iter(self._cache.values()))[0] <= now):
+                    self._evict(next(iter(self._cache)))
+        return token
+
+    def rotate(self, ciphertext):
+        """
+        The token re-encrypted under the first key.
+        """
+        return self.fernet.rotate(bytes(ciphertext))
+
+    def _evict(self, ciphertext):
+        _, plaintext = self._cache.pop(ciphertext)
+        plaintext[:] = bytes(len(plaintext))
+
+    def clear(self):
+        with self._lock:
+            for ciphertext in list(self._cache):
+                self._evict(ciphertext)
+
+
+vault = TokenVault()
+
+
+def init_app(app):
+    """
+    Applies the app's cache settings and forgets loaded keys and cached tokens.
+    """
+    vault.clear()
+    vault.ttl = app.config.get("TOKEN_CACHE_TTL", vault.ttl)
+    vault.max_size = app.config.get("TOKEN_CACHE_SIZE", vault.max_size)
+    vault._fernet = None
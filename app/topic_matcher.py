@@ -0,0 +1,65 @@
+import re
+from collections import Counter
+
+TOKEN_RE = re.compile(r"\b[a-z]+\b")
+
+
+class TopicMatcher:
+    """
+    Matches commit messages to topics. Built once from a {topic: [keywords]} dict:
+    single word keywords go into an inverted keyword -> topics index that is probed with set lookups,
+    and keywords with spaces or punctuation ("foreign key", "package.json") are compiled into one combined regex.
+    """
+
+    def __init__(self, topic_keywords):
+        self.topics = frozenset(topic_keywords)
+        word_topics = {}
+        phrase_topics = {}
+        for topic, keywords in topic_keywords.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                index = word_topics if TOKEN_RE.fullmatch(keyword) else phrase_topics
+                index.setdefault(keyword, set()).add(topic)
+
+        self.word_topics = {word: frozenset(topics) for word, topics in word_topics.items()}
+        self.words = frozenset(self.word_topics)
+        self.phrase_topics = {phrase: frozenset(topics) for phrase, topics in phrase_topics.items()}
+        self.phrase_re = None
+        if phrase_topics:
+            # longest first so "github actions" wins over any shorter phrase sharing its start
+            alternation = "|".join(re.escape(phrase) for phrase in sorted(phrase_topics, key=len, reverse=True))
+            self.phrase_re = re.compile(rf"(?<![a-z0-9])(?:{alternation})(?![a-z0-9])")
+
+    def topics_in(self, message):
+        """
+        Returns the set of topics a single message mentions.
+        """
+        message = message.lower()
+        found = set()
+        for word in self.words.intersection(TOKEN_RE.findall(message)):
+            found |= self.word_topics[word]
+        if self.phrase_re:
+            for match in self.phrase_re.finditer(message):
+                found |= self.phrase_topics[match.group(0)]
+        return found
+
+    def match(self, messages):
+        """
+        Returns the set of topics mentioned across an iterable of messages.
+        Consumes the messages lazily and stops as soon as every topic has been seen.
+        """
+        matched = set()
+        for message in messages:
+            matched |= self.topics_in(message)
+            if len(matched) == len(self.topics):
+                break
+        return matched
+
+    def count(self, messages):
+        """
+        Returns a Counter of how many messages mention each topic, in one pass over an iterable of messages.
+        """
+        counts = Counter()
+        for message in messages:
+            counts.update(self.topics_in(message))
+        return counts
@@ -0,0 +1,48 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+from . import db
+from .models import Repository, bump_data_version
+
+DIALECT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def upsert(model, rows, conflict_columns, session=None):
+    """
+    Inserts rows (dicts of column values) into model's table in bulk, updating the row that already has the same
+    conflict_columns instead. Only the columns present in a row are written, so callers can leave out what they
+    don't want to change. There must be a unique index on conflict_columns. Doesn't commit.
+    """
+    session = session or db.session
+    dialect = session.get_bind().dialect.name
+    if dialect not in DIALECT_INSERTS:
+        raise NotImplementedError(f"upsert is not supported on {dialect}")
+    insert = DIALECT_INSERTS[dialect]
+
+    # every row of a statement has to set the same columns
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+
+    for columns, group in groups.items():
+        statement = insert(model.__table__)
+        updates = {column: statement.excluded[column] for column in columns if column not in conflict_columns}
+        if updates:
+            statement = statement.on_conflict_do_update(index_elements=conflict_columns, set_=updates)
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=conflict_columns)
+        # compiled once and sent with executemany
+        session.execute(statement, group)
+
+
+def upsert_repositories(user_id, rows, session=None):
+    """
+    Upserts a user's repositories by name. Each row needs a "name" and any other Repository columns to write.
+    Bumps the user's data_version, which the ORM flush hook can't see core writes do.
+    """
+    session = session or db.session
+    upsert(Repository, [dict(row, user_id=user_id) for row in rows], ["user_id", "name"], session)
+    if rows:
+        bump_data_version(session.connection(), [user_id])
@@ -0,0 +1,151 @@
+# Canonical skill vocabulary. Every resume skill (resume_checker.SKILL_LIST) and commit topic
+# (github_handler.TOPIC_KEYWORDS) has a stable integer ID, so a set of skills can be held as a bitset:
+# a Python int in memory, its little-endian bytes in the database.
+
+# Append only: never renumber or reuse an ID, new skills and topics take the next free one
+SKILL_IDS = {
+    "python": 0, "java": 1, "javascript": 2, "typescript": 3, "c": 4, "c++": 5, "c#": 6, "go": 7, "ruby": 8,
+    "rust": 9, "kotlin": 10, "swift": 11, "perl": 12, "php": 13, "scala": 14, "bash": 15, "shell": 16,
+    "objective-c": 17, "dart": 18, "r": 19, "matlab": 20, "lua": 21, "sas": 22, "stata": 23, "julia": 24,
+    "groovy": 25, "fortran": 26, "abap": 27, "powershell": 28, "haskell": 29, "ocaml": 30, "clojure": 31,
+    "flask": 32, "django": 33, "fastapi": 34, "spring": 35, "spring boot": 36, "express": 37, "nest.js": 38,
+    "rails": 39, "laravel": 40, "symfony": 41, "adonisjs": 42, "hapi": 43, "micronaut": 44, "react": 45, "vue": 46,
+    "angular": 47, "next.js": 48, "nuxt.js": 49, "svelte": 50, "ember.js": 51, "gatsby": 52, "preact": 53,
+    "alpine.js": 54, "tailwind": 55, "bootstrap": 56, "material-ui": 57, "chakra ui": 58, "ant design": 59,
+    "foundation": 60, "redux": 61, "mobx": 62, "vuex": 63, "pinia": 64, "node.js": 65, "npm": 66, "yarn": 67,
+    "vite": 68, "webpack": 69, "rollup": 70, "parcel": 71, "socket.io": 72, "electron": 73, "jest": 74, "mocha": 75,
+    "chai": 76, "enzyme": 77, "cypress": 78, "playwright": 79, "puppeteer": 80, "pandas": 81, "numpy": 82,
+    "matplotlib": 83, "seaborn": 84, "scikit-learn": 85, "tensorflow": 86, "keras": 87, "pytorch": 88, "openai": 89,
+    "huggingface": 90, "nltk": 91, "spacy": 92, "opencv": 93, "cv2": 94, "statsmodels": 95, "xgboost": 96,
+    "lightgbm": 97, "catboost": 98, "mlflow": 99, "scipy": 100, "plotly": 101, "dash": 102, "altair": 103,
+    "streamlit": 104, "bokeh": 105, "dask": 106, "polars": 107, "ray": 108, "pyarrow": 109, "modin": 110,
+    "prophet": 111, "statsforecast": 112, "spark": 113, "pyspark": 114, "hadoop": 115, "databricks": 116,
+    "flink": 117, "kafka": 118, "postgresql": 119, "mysql": 120, "sqlite": 121, "mariadb": 122, "oracle": 123,
+    "mssql": 124, "mongodb": 125, "redis": 126, "cassandra": 127, "dynamodb": 128, "couchdb": 129, "cosmos db": 130,
+    "neo4j": 131, "arangodb": 132, "janusgraph": 133, "elasticsearch": 134, "solr": 135, "opensearch": 136,
+    "influxdb": 137, "timescaledb": 138, "questdb": 139, "firebase": 140, "supabase": 141, "planetscale": 142,
+    "aws": 143, "azure": 144, "gcp": 145, "digitalocean": 146, "linode": 147, "oracle cloud": 148, "ibm cloud": 149,
+    "docker": 150, "kubernetes": 151, "podman": 152, "openshift": 153, "rancher": 154, "jenkins": 155,
+    "circleci": 156, "travisci": 157, "github actions": 158, "gitlab ci": 159, "bitbucket pipelines": 160,
+    "terraform": 161, "ansible": 162, "pulumi": 163, "chef": 164, "saltstack": 165, "nginx": 166, "apache": 167,
+    "vercel": 168, "netlify": 169, "heroku": 170, "render": 171, "fly.io": 172, "linux": 173, "ubuntu": 174,
+    "debian": 175, "centos": 176, "arch": 177, "rest": 178, "graphql": 179, "grpc": 180, "soap": 181,
+    "websockets": 182, "mqtt": 183, "oauth": 184, "oauth2": 185, "jwt": 186, "saml": 187, "openid connect": 188,
+    "openapi": 189, "swagger": 190, "postman": 191, "insomnia": 192, "asyncapi": 193, "json": 194, "xml": 195,
+    "protobuf": 196, "avro": 197, "unit testing": 198, "integration testing": 199, "pytest": 200, "unittest": 201,
+    "nose": 202, "pen testing": 203, "penetration testing": 204, "ssl": 205, "tls": 206, "https": 207, "csrf": 208,
+    "csp": 209, "rate limiting": 210, "vulnerability scanning": 211, "burp suite": 212, "owasp zap": 213,
+    "fuzz testing": 214, "sonarqube": 215, "git": 216, "github": 217, "gitlab": 218, "bitbucket": 219, "svn": 220,
+    "mercurial": 221, "vscode": 222, "pycharm": 223, "intellij": 224, "eclipse": 225, "netbeans": 226,
+    "android studio": 227, "xcode": 228, "jira": 229, "trello": 230, "asana": 231, "notion": 232, "slack": 233,
+    "monday.com": 234, "miro": 235, "figma": 236, "adobe xd": 237, "sketch": 238, "canva": 239, "testing": 240,
+    "auth": 241, "api design": 242, "frontend": 243, "database": 244, "devops": 245, "refactoring": 246,
+    "dependencies": 247, "bugfix": 248, "security": 249, "machine learning": 250, "data engineering": 251,
+    "analytics": 252, "documentation": 253, "cicd": 254
+}
+
+# Other spellings found in resumes and commits, mapped to the canonical name
+ALIASES = {
+    "nodejs": "node.js", "node js": "node.js",
+    "postgres": "postgresql", "psql": "postgresql",
+    "golang": "go",
+    "k8s": "kubernetes",
+    "js": "javascript", "ecmascript": "javascript",
+    "reactjs": "react", "react.js": "react",
+    "vuejs": "vue", "vue.js": "vue",
+    "nextjs": "next.js", "nuxtjs": "nuxt.js", "nestjs": "nest.js",
+    "expressjs": "express", "express.js": "express",
+    "mongo": "mongodb",
+    "sklearn": "scikit-learn",
+    "torch": "pytorch",
+    "tailwindcss": "tailwind",
+    "sql server": "mssql",
+    "amazon web services": "aws", "google cloud": "gcp",
+    "cpp": "c++", "csharp": "c#",
+    "vs code": "vscode",
+    "restful": "rest",
+    "websocket": "websockets",
+}
+
+# Skills named by an everyday word or a single letter ("go back", "rest of", "render the page", "merge into arch").
+# In a resume they only count after a section header, commit messages have none, so these are only counted there
+# by their unambiguous aliases ("golang", "restful", "expressjs")
+COMMIT_STOP_SKILLS = frozenset({
+    "c", "r", "go", "rest", "render", "dash", "ray", "express", "spring", "json", "slack", "notion", "chef", "arch",
+    "git", "github", "shell", "swift", "sketch", "foundation", "bootstrap", "oracle", "apache", "nose", "prophet",
+    "parcel", "rollup", "chai", "mocha", "enzyme", "eclipse", "rails", "spark", "electron", "insomnia", "julia",
+    "dart",
+})
+
+NAMES = {skill_id: name for name, skill_id in SKILL_IDS.items()}
+SIZE = max(SKILL_IDS.values()) + 1
+# 64 bit words in a stored bitset
+WORDS = (SIZE + 63) // 64
+
+
+def canonical(name):
+    """
+    Lowercased canonical name for a skill or topic, resolving aliases.
+    """
+    name = name.lower().strip()
+    return ALIASES.get(name, name)
+
+
+def skill_id(name):
+    """
+    The ID of a skill or topic name, or None if it isn't in the vocabulary.
+    """
+    return SKILL_IDS.get(canonical(name))
+
+
+def aliases_of(name):
+    return [alias for alias, target in ALIASES.items() if target == name]
+
+
+def to_bits(names):
+    """
+    Bitset of the known names in an iterable. Unknown names are dropped.
+    """
+    bits = 0
+    for name in names:
+        i = skill_id(name)
+        if i is not None:
+            bits |= 1 << i
+    return bits
+
+
+def ids_of(bits):
+    """
+    The IDs set in a bitset, ascending.
+    """
+    ids = []
+    while bits:
+        low = bits & -bits
+        ids.append(low.bit_length() - 1)
+        bits ^= low
+    return ids
+
+
+def from_bits(bits):
+    """
+    Names in a bitset, in ID order.
+    """
+    return [NAMES[i] for i in ids_of(bits)]
+
+
+def pack(bits):
+    """
+    Bitset as WORDS little-endian 64 bit words, what the *_bits columns store.
+    """
+    return bits.to_bytes(WORDS * 8, "little")
+
+
+def unpack(data):
+    return int.from_bytes(data, "little") if data else 0
+
+
+def stored_bits(data, names):
+    """
+    Bitset from a stored column, falling back to the JSON list for rows written before bitsets were stored.
+    """
+    return unpack(data) if data is not None else to_bits(names or [])
@@ -0,0 +1,222 @@
+import hashlib
+import hmac
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from . import db, jobs, rollups, tfidf
+from .github_handler import fetch_repo, get_languages, make_client, repo_row, summarize_commits
+from .models import Repository, User, WebhookEvent, utcnow
+from .upsert import upsert_repositories
+
+# Keeps stored repos current from GitHub's push and repository webhooks instead of full syncs. Deliveries are
+# stored as WebhookEvent rows, and a job per repo applies everything stored for it: the pushed commit messages are
+# classified and added to the repo's counts, the same way a sync adds the commits it finds new.
+
+EVENTS = ("push", "repository")
+# GitHub puts at most this many commits in a push payload, a push that may have had more is read from the API
+PUSH_COMMIT_LIMIT = 20
+# applied events are kept this long, so a redelivery of one is still recognized
+KEEP_APPLIED = timedelta(days=7)
+
+
+def sign(secret, body):
+    """
+    The X-Hub-Signature-256 header GitHub sends for body.
+    """
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret, body, signature):
+    """
+    Checks a delivery's X-Hub-Signature-256 header, in constant time.
+    """
+    if not signature:
+        return False
+    return hmac.compare_digest(sign(secret, body).encode(), signature.encode())
+
+
+def repo_name(event, payload):
+    """
+    The stored name of the repo an event is about, which for a rename is the old name.
+    """
+    repository = payload.get("repository") or {}
+    if event == "repository" and payload.get("action") == "renamed":
+        return ((payload.get("changes") or {}).get("repository", {}).get("name", {}).get("from")
+                or repository.get("name"))
+    return repository.get("name")
+
+
+def record(delivery_id, event, user_id, name, payload):
+    """
+    Stores a delivery until its repo's job applies it. Returns None for a delivery already stored (GitHub
+    redelivers on timeouts, and redeliveries can be triggered by hand).
+    """
+    webhook_event = WebhookEvent(delivery_id=delivery_id, event=event, user_id=user_id, repo_name=name,
+                                 payload=payload)
+    db.session.add(webhook_event)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return None
+    return webhook_event
+
+
+def queue(user_id, name):
+    """
+    Queues the job applying a repo's stored events GITHUB_WEBHOOK_COALESCE_SECONDS from now, or returns the one
+    already queued for it.
+    """
+    return jobs.enqueue("github_webhook", f"github_webhook:{user_id}:{name}", {"user_id": user_id, "repo_name": name},
+                        user_id=user_id, delay=current_app.config.get("GITHUB_WEBHOOK_COALESCE_SECONDS", 5))
+
+
+@jobs.sweeper
+def requeue_pending():
+    """
+    Queues a job for every repo with events still unapplied well after their job should have run, e.g. because
+    the process it was queued in restarted, and deletes events applied more than KEEP_APPLIED ago.
+    Returns how many repos were queued.
+    """
+    config = current_app.config
+    now = utcnow()
+    waited = timedelta(seconds=config.get("GITHUB_WEBHOOK_COALESCE_SECONDS", 5) + config.get("JOB_REQUEUE_SECONDS", 60))
+    WebhookEvent.query.filter(WebhookEvent.processed_at < now - KEEP_APPLIED).delete(synchronize_session=False)
+    db.session.commit()
+    pending = db.session.execute(db.select(WebhookEvent.user_id, WebhookEvent.repo_name)
+                                 .where(WebhookEvent.processed_at.is_(None), WebhookEvent.received_at < now - waited)
+                                 .distinct()).all()
+    for user_id, name in pending:
+        queue(user_id, name)
+    return len(pending)
+
+
+def utc_date(timestamp):
+    """
+    A push payload timestamp like "2025-01-01T10:15:00-05:00" in the UTC form the REST API gives, which
+    last_commit_date stores.
+    """
+    return datetime.fromisoformat(timestamp).astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def pushed_commits(payloads, existing, author=None):
+    """
+    The commits of push payloads the stored repo hasn't counted, as [(sha, date, message)] in push order. Only
+    pushes to the default branch count, each commit once, and not the last seen commit or anything older, so
+    deliveries that a sync got to first add nothing. With author (a login) only their commits.
+    Returns None if a push may have had more commits than its payload lists.
+    """
+    seen = set()
+    commits = []
+    for payload in payloads:
+        default_branch = (payload.get("repository") or {}).get("default_branch")
+        if payload.get("deleted") or payload.get("ref") != f"refs/heads/{default_branch}":
+            continue
+        if len(payload.get("commits") or []) >= PUSH_COMMIT_LIMIT:
+            return None
+        for commit in payload.get("commits") or []:
+            sha = commit.get("id")
+            if sha in seen:
+                continue
+            seen.add(sha)
+            date = utc_date(commit["timestamp"])
+            if sha == existing.last_commit_sha or (existing.last_commit_date and date < existing.last_commit_date):
+                continue
+            if author and (commit.get("author") or {}).get("username") != author:
+                continue
+            commits.append((sha, date, commit.get("message")))
+    return commits
+
+
+def apply_pushes(user, name, payloads):
+    """
+    Adds a run of pushes to the repo's row: its topic and skill counts, newest commit and, since the code changed,
+    languages. A repo that isn't stored yet, or a push too big for its payload, is fetched from the API like a sync
+    would. Returns whether the row was written.
+    """
+    config = current_app.config
+    existing = Repository.query.filter_by(user_id=user.id, name=name).first()
+    author = user.github_username if config.get("GITHUB_AUTHOR_ONLY") else None
+    description = (payloads[-1].get("repository") or {}).get("description")
+    commits = pushed_commits(payloads, existing, author) if existing else None
+    if commits == []:
+        return False
+
+    client = make_client(user.access_token, 1)
+    if commits is None:
+        repo_info = (name, description, existing.last_commit_date if existing else None,
+                     existing.last_commit_sha if existing else None)
+        result = fetch_repo(client, user.github_username, repo_info, author=author,
+                            max_commits=config.get("GITHUB_MAX_COMMITS") or None)
+    else:
+        topic_counts, skill_counts = summarize_commits([message for _, _, message in commits if message])
+        head = None
+        for sha, date, _ in commits:
+            if head is None or date >= head["date"]:
+                head = {"sha": sha, "date": date}
+        language_shares = get_languages(user.github_username, name, None, client=client)
+        result = (name, description, language_shares, topic_counts, skill_counts, head)
+    upsert_repositories(user.id, [repo_row(existing, *result)])
+    return True
+
+
+def apply_repository(user, name, payload):
+    """
+    Applies a repository event: a created repo is fetched, a deleted one removed, and renames and description
+    edits copied to the row. Other actions (archived, publicized, ...) change nothing that is stored.
+    """
+    action = payload.get("action")
+    repository = payload.get("repository") or {}
+    if action == "created":
+        if not repository.get("fork"):
+            apply_pushes(user, name, [payload])
+        return
+    existing = Repository.query.filter_by(user_id=user.id, name=name).first()
+    if not existing:
+        return
+    if action == "deleted":
+        db.session.delete(existing)
+    elif action == "renamed":
+        if Repository.query.filter_by(user_id=user.id, name=repository.get("name")).first():
+            # a push under the new name got there first and fetched the repo again
+            db.session.delete(existing)
+        else:
+            existing.name = repository.get("name")
+    elif action == "edited":
+        existing.description = repository.get("description")
+    db.session.flush()
+
+
+def process_repo(user_id, name):
+    """
+    Applies the repo's stored events in the order they came, each run of pushes at once, then updates the
+    user's TF-IDF document and rollups. Events stored while this runs are applied before it returns.
+    Returns how many events were applied.
+    """
+    user = db.session.get(User, user_id)
+    applied = 0
+    while True:
+        events = (WebhookEvent.query.filter_by(user_id=user_id, repo_name=name, processed_at=None)
+                  .order_by(WebhookEvent.id).all())
+        if not events:
+            return applied
+        pushes = []
+        for event in events:
+            if event.event == "push":
+                pushes.append(event.payload)
+                continue
+            if pushes:
+                apply_pushes(user, name, pushes)
+                pushes = []
+            apply_repository(user, name, event.payload)
+        if pushes:
+            apply_pushes(user, name, pushes)
+        now = utcnow()
+        for event in events:
+            event.processed_at = now
+        tfidf.index_users([user_id])
+        rollups.index_users([user_id])
+        db.session.commit()
+        applied += len(events)
@@ -0,0 +1,73 @@
+"""
+Build time of the skill co-occurrence graph and per-user adjacent skill scoring, including right after
+one user's skills change, for synthetic users over the full skill vocabulary. Skill popularity is Zipf-like
+so the matrix is as dense as real data gets.
+
+    python benchmarks/bench_adjacency.py --users 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+if not os.getenv("ENCRYPTION_KEY"):
+    from cryptography.fernet import Fernet
+    os.environ["ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+
+from app.adjacency import VOCABULARY, SkillGraph
+
+
+def random_skills(rng, popularity, count):
+    return np.unique(rng.choice(len(VOCABULARY), size=count, p=popularity)).astype(np.int32)
+
+
+def percentiles(samples):
+    samples = np.array(samples) * 1000
+    return f"p50 {np.percentile(samples, 50):7.3f}ms  p99 {np.percentile(samples, 99):7.3f}ms  max {samples.max():7.3f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--skills-per-user", type=int, default=25)
+    parser.add_argument("--samples", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    popularity = 1 / np.arange(1, len(VOCABULARY) + 1)
+    popularity /= popularity.sum()
+    users = {user_id: random_skills(rng, popularity, rng.integers(5, args.skills_per_user * 2))
+             for user_id in range(args.users)}
+
+    start = time.perf_counter()
+    graph = SkillGraph(users)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    graph.similarity()
+    normalise = time.perf_counter() - start
+    print(f"{args.users} users, {len(VOCABULARY)} skills, {graph.cooccurrence.nnz} nonzero pairs")
+    print(f"build {build:.2f}s, normalise {normalise * 1000:.1f}ms")
+
+    samples = []
+    for user_id in rng.integers(0, args.users, args.samples):
+        start = time.perf_counter()
+        graph.adjacent(users[user_id])
+        samples.append(time.perf_counter() - start)
+    print(f"score            {percentiles(samples)}")
+
+    samples = []
+    for user_id in rng.integers(0, args.users, args.samples):
+        skills = random_skills(rng, popularity, args.skills_per_user)
+        start = time.perf_counter()
+        graph.update_user(int(user_id), skills)
+        graph.adjacent(skills)
+        samples.append(time.perf_counter() - start)
+    print(f"update + score   {percentiles(samples)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Peak memory and time of summarizing one repo's commit history, reading every page into a list first (as
+make_commit_summary used to) against counting each page as it arrives, at growing history lengths, against the
+local fake GitHub server. Memory is traced with tracemalloc, so it counts Python allocations only, and timed in
+separate untraced runs.
+
+    python benchmarks/bench_commit_stream.py --commits 1000 10000 50000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.github_client import GitHubClient
+from app.github_handler import iter_pages, make_commit_summary, summarize_commits
+from fake_github import FakeGitHub
+
+
+def collect_all(client, name):
+    """
+    The old way: every message of every page in one list, matched at the end.
+    """
+    messages = []
+    for page in iter_pages(client, f"/repos/octocat/{name}/commits", {"per_page": 100}):
+        messages.extend(commit["commit"]["message"] for commit in page)
+    return summarize_commits(messages)
+
+
+def stream(client, name):
+    return make_commit_summary("octocat", name, None, client=client)[:2]
+
+
+def traced(func):
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak
+
+
+def timed(func, repeat=3):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commits", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    print(f"{'commits':>8} {'list peak':>12} {'stream peak':>12} {'list':>9} {'stream':>9}")
+    for commits in args.commits:
+        with FakeGitHub(repos=1, commits=commits, latency=0) as fake:
+            client = GitHubClient("token-octocat", api_url=fake.url)
+            # warms up the matchers and the connection
+            stream(client, "repo-0")
+            old, old_peak = traced(lambda: collect_all(client, "repo-0"))
+            new, new_peak = traced(lambda: stream(client, "repo-0"))
+            assert old == new
+            old_time = timed(lambda: collect_all(client, "repo-0"))
+            new_time = timed(lambda: stream(client, "repo-0"))
+            print(f"{commits:>8} {old_peak / 1024:>10.0f}KB {new_peak / 1024:>10.0f}KB "
+                  f"{old_time * 1000:>7.0f}ms {new_time * 1000:>7.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Peak memory and time of resume text extraction for a large PDF: the old in-memory extraction
+(whole file read into bytes, every page joined) against extract_file (opened from disk, page ranges on worker
+processes, page and character caps). Each run happens in a fresh interpreter so ru_maxrss is its own peak.
+Linux only.
+
+    python benchmarks/bench_extraction.py --pages 500
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LINE = "Built Flask and PostgreSQL services, deployed with Docker and Kubernetes on AWS. "
+
+
+def make_pdf(path, pages, image_size):
+    """
+    Writes a PDF with a page of resume-like text on every page, plus a distinct noise image of
+    image_size x image_size pixels so the file is as big as scanned or padded uploads get.
+    """
+    import fitz
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 550, 500), f"Page {i}\n" + LINE * 20, fontsize=9)
+        if image_size:
+            pixmap = fitz.Pixmap(fitz.csRGB, image_size, image_size, os.urandom(image_size * image_size * 3), False)
+            page.insert_image(fitz.Rect(50, 520, 300, 770), pixmap=pixmap)
+    doc.save(path)
+
+
+def run(mode, path, max_pages):
+    """
+    Runs in a fresh interpreter. Prints one JSON line.
+    """
+    sys.path.insert(0, ROOT)
+    from app.extraction import extract_file
+    from resume_corpus import extract_bytes
+
+    def extract():
+        if mode == "legacy":
+            with open(path, "rb") as f:
+                return extract_bytes(path, f.read())
+        return extract_file(path, config={"EXTRACT_MAX_PAGES": max_pages, "EXTRACT_MAX_CHARS": 10 ** 9})
+
+    # the first call pays for starting the worker processes, a running server only does that once
+    start = time.perf_counter()
+    text = extract()
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    extract()
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux, RUSAGE_CHILDREN only covers the workers once they have exited
+    self_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    from app import extraction
+    extraction.shutdown()
+    worker_peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    print(json.dumps({"first": first, "seconds": seconds, "chars": len(text), "rss": self_peak, "worker_rss": worker_peak}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--image-size", type=int, default=256, help="noise image per page, 0 for text only")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        mode, path, max_pages = args.child
+        return run(mode, path, int(max_pages))
+
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///:memory:")
+    if not env.get("ENCRYPTION_KEY"):
+        from cryptography.fernet import Fernet
+        env["ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "resume.pdf")
+        make_pdf(path, args.pages, args.image_size)
+        print(f"{args.pages} pages, {os.path.getsize(path) / 1024 / 1024:.1f} MiB")
+        for label, mode, max_pages in [("in-memory (old)", "legacy", args.pages),
+                                       ("extract_file (all pages)", "stream", args.pages),
+                                       ("extract_file (default cap)", "stream", 50)]:
+            out = subprocess.run([sys.executable, __file__, "--child", mode, path, str(max_pages)],
+                                 env=env, capture_output=True, text=True, check=True).stdout
+            data = json.loads(out.strip().splitlines()[-1])
+            print(f"{label:<27} first {data['first'] * 1000:8.1f}ms  then {data['seconds'] * 1000:8.1f}ms  {data['chars']:>9} chars  "
+                  f"peak rss {data['rss'] / 1024:6.1f} MiB  worker peak {data['worker_rss'] / 1024:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmarks github_handler against the local fake GitHub server at several concurrency settings.
+
+    python benchmarks/bench_ingestion.py --repos 60 --latency 0.05
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+if not os.getenv("ENCRYPTION_KEY"):
+    from cryptography.fernet import Fernet
+    os.environ["ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+
+from app import create_app, db
+from app.github_handler import github_handler
+from app.models import Repository, User
+from fake_github import FakeGitHub
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repos", type=int, default=40)
+    parser.add_argument("--commits", type=int, default=150)
+    parser.add_argument("--latency", type=float, default=0.03)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    with FakeGitHub(repos=args.repos, commits=args.commits, latency=args.latency) as fake:
+        app = create_app()
+        app.config["GITHUB_API_URL"] = fake.url
+        app.config["GITHUB_CACHE_PATH"] = None
+        with app.app_context():
+            db.create_all()
+            db.session.add(User(github_username="octocat", access_token="token"))
+            db.session.commit()
+
+            print(f"{args.repos} repos, {args.commits} commits each, {args.latency * 1000:.0f}ms latency")
+            for concurrency in args.concurrency:
+                Repository.query.delete()
+                db.session.commit()
+                fake.request_count = 0
+                start = time.perf_counter()
+                github_handler("octocat", "token", concurrency=concurrency)
+                elapsed = time.perf_counter() - start
+                print(f"concurrency={concurrency:<3} {elapsed:7.2f}s  requests={fake.request_count}  repos={Repository.query.count()}")
+            db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Latency of the hot lookups (a user's repos, one repo by user and name, a user's resume) on a SQLite database
+with 1M repository rows, with and without the lookup indexes.
+
+    python benchmarks/bench_lookups.py --users 10000 --repos-per-user 100
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not os.getenv("ENCRYPTION_KEY"):
+    from cryptography.fernet import Fernet
+    os.environ["ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+
+from sqlalchemy import create_engine, text
+
+from app.models import Repository, ResumeData, db
+
+INDEXES = [index for table in (Repository.__table__, ResumeData.__table__) for index in table.indexes]
+
+QUERIES = {
+    "repos by user_id": "SELECT id, name FROM repository WHERE user_id = :user_id",
+    "repo by (user_id, name)": "SELECT id FROM repository WHERE user_id = :user_id AND name = :name",
+    "resume by user_id": "SELECT id FROM resume_data WHERE user_id = :user_id",
+}
+
+
+def fill(engine, users, repos_per_user):
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO user (id, github_username) VALUES (:id, :name)"),
+                           [{"id": i, "name": f"user{i}"} for i in range(1, users + 1)])
+        for start in range(1, users + 1, 1000):
+            connection.execute(
+                text("INSERT INTO repository (user_id, name, languages, commit_summary) VALUES (:user_id, :name, '[]', '[]')"),
+                [{"user_id": user_id, "name": f"repo{j}"}
+                 for user_id in range(start, min(start + 1000, users + 1)) for j in range(repos_per_user)]
+            )
+        connection.execute(text("INSERT INTO resume_data (user_id, og_filename) VALUES (:user_id, 'cv.pdf')"),
+                           [{"user_id": i} for i in range(1, users + 1)])
+
+
+def run_queries(engine, users, repos_per_user, lookups):
+    rng = random.Random(0)
+    targets = [(rng.randint(1, users), f"repo{rng.randrange(repos_per_user)}") for _ in range(lookups)]
+    results = {}
+    with engine.connect() as connection:
+        for label, sql in QUERIES.items():
+            plan = " / ".join(row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"),
+                                                                     {"user_id": 1, "name": "repo0"}))
+            start = time.perf_counter()
+            for user_id, name in targets:
+                connection.execute(text(sql), {"user_id": user_id, "name": name}).fetchall()
+            results[label] = ((time.perf_counter() - start) / lookups * 1e6, plan)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--repos-per-user", type=int, default=100)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.sqlite3')}")
+        db.metadata.create_all(engine, tables=[db.metadata.tables[name] for name in ("user", "repository", "resume_data")])
+        for index in INDEXES:
+            index.drop(engine)
+
+        start = time.perf_counter()
+        fill(engine, args.users, args.repos_per_user)
+        print(f"{args.users * args.repos_per_user} repository rows, {args.users} resumes "
+              f"(filled in {time.perf_counter() - start:.1f}s)")
+
+        without = run_queries(engine, args.users, args.repos_per_user, args.lookups)
+        start = time.perf_counter()
+        for index in INDEXES:
+            index.create(engine)
+        print(f"indexes built in {time.perf_counter() - start:.1f}s")
+        with_indexes = run_queries(engine, args.users, args.repos_per_user, args.lookups)
+
+        for label in QUERIES:
+            print(f"{label:<24} no index {without[label][0]:10.1f}us  indexed {with_indexes[label][0]:8.1f}us  "
+                  f"({with_indexes[label][1]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Instrumentation overhead: a cheap JSON route (/users, a handful of SQL statements) served with metrics off, on,
+and on with trace logging, plus the cost of a single histogram observation and a timed stage.
+
+    python benchmarks/bench_metrics.py --requests 3000
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+if not os.getenv("ENCRYPTION_KEY"):
+    from cryptography.fernet import Fernet
+    os.environ["ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+
+from app import create_app, db, metrics
+from app.config import Config
+from app.models import User
+
+
+def serve(requests, enabled, trace):
+    Config.METRICS_ENABLED = enabled
+    Config.METRICS_TRACE = trace
+    app = create_app()
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(User(github_username=f"user{i}") for i in range(20))
+        db.session.commit()
+        for _ in range(100):
+            client.get("/users?limit=10&fields=id,github_username")
+        start = time.perf_counter()
+        for _ in range(requests):
+            client.get("/users?limit=10&fields=id,github_username")
+        elapsed = time.perf_counter() - start
+        db.drop_all()
+    return elapsed / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    # trace lines go nowhere, the cost measured is building them
+    logging.getLogger("skillsync.trace").addHandler(logging.NullHandler())
+    logging.getLogger("skillsync.trace").setLevel(logging.INFO)
+    logging.getLogger("skillsync.trace").propagate = False
+
+    # interleaved and the best round kept, so warm up and noise don't land on one setting
+    results = {setting: [] for setting in [(False, False), (True, False), (True, True)]}
+    for _ in range(args.rounds):
+        for setting, samples in results.items():
+            samples.append(serve(args.requests, *setting))
+    off, on, traced = (min(samples) for samples in results.values())
+    print(f"/users, {args.requests} requests, best of {args.rounds}")
+    print(f"  metrics off         {off:8.1f}us/request")
+    print(f"  metrics on          {on:8.1f}us/request  {(on - off) / off * 100:+.1f}%")
+    print(f"  metrics and trace   {traced:8.1f}us/request  {(traced - off) / off * 100:+.1f}%")
+
+    n = 200_000
+    start = time.perf_counter()
+    for _ in range(n):
+        metrics.STAGE_SECONDS.observe(0.003, "bench")
+    print(f"  histogram observe   {(time.perf_counter() - start) / n * 1e9:8.0f}ns")
+
+    @metrics.timer("bench")
+    def stage():
+        pass
+
+    start = time.perf_counter()
+    for _ in range(n):
+        stage()
+    print(f"  timed stage call    {(time.perf_counter() - start) / n * 1e9:8.0f}ns")
+
+    # the request hooks on their own, what every request pays whatever its work
+    app = create_app()
+    response = app.response_class("")
+    for trace in (False, True):
+        metrics.tracing = trace
+        with app.test_request_context("/users"):
+            start = time.perf_counter()
+            for _ in range(n // 10):
+                metrics._before_request()
+                metrics._after_request(response)
+        label = "request hooks, trace" if trace else "request hooks"
+        print(f"  {label:<20}{(time.perf_counter() - start) / (n // 10) * 1e9:8.0f}ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Per-resume latency and peak memory of resume_parser, before (full pipeline run over the resume and again over
+every section) and after (tokenizer only, one matcher pass).
+
+    python benchmarks/bench_resume_parser.py --resumes 200
+
+Needs en_core_web_sm for a fair "before" number. Without it both sides fall back to a blank English pipeline,
+which only measures the double tokenization and matching.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import spacy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import resume_checker
+from app.resume_checker import SKILL_LIST, SECTION_HEADERS
+
+FILLER = "Worked with the team to design build and ship features used by thousands of customers every day".split()
+
+
+def load_full_pipeline():
+    try:
+        return spacy.load(resume_checker.SPACY_MODEL), True
+    except OSError:
+        return spacy.blank("en"), False
+
+
+def legacy_resume_parser(text, nlp, matcher):
+    """
+    The parser before the single pass rewrite: the whole pipeline over the resume, then again over every section.
+    """
+    def run(text):
+        doc = nlp(text)
+        return doc, matcher(doc)
+
+    doc, matches = run(text)
+    section_matches = {}
+    for match_id, start, end in matches:
+        if nlp.vocab.strings[match_id] != "SECTIONS":
+            continue
+        span = doc[start:end]
+        if span.start_char == 0 or text[span.start_char - 1] in ["\n", "\r"]:
+            if start not in section_matches or (end - start) > (section_matches[start][2] - section_matches[start][1]):
+                section_matches[start] = (span.text.lower().strip(), start, end)
+    ordered = sorted(section_matches.values(), key=lambda x: x[1])
+    sections = {}
+    for i, (name, start, end) in enumerate(ordered):
+        next_start = ordered[i + 1][1] if i + 1 < len(ordered) else len(doc)
+        sections[name] = doc[end:next_start].text.strip()
+
+    extracted, supported = set(), set()
+    for name, sec_text in sections.items():
+        sec_doc, sec_matches = run(sec_text)
+        found = {sec_doc[s:e].text.lower() for m, s, e in sec_matches if nlp.vocab.strings[m] == "SKILLS"}
+        extracted |= found
+        if name != "skills":
+            supported |= found
+    return list(extracted), list(supported), list(extracted - supported)
+
+
+def synthetic_resume(rng):
+    lines = []
+    for header in ["skills", "work experience", "projects"]:
+        lines.append(header.title())
+        for _ in range(rng.randint(5, 15)):
+            words = rng.sample(FILLER, 8) + rng.sample(SKILL_LIST, 3)
+            rng.shuffle(words)
+            lines.append(" ".join(words))
+    return "\n".join(lines)
+
+
+def measure(parse, texts):
+    """
+    Returns (ms per resume, peak MiB allocated while parsing). Memory is traced in a separate pass since
+    tracemalloc slows down the timing.
+    """
+    start = time.perf_counter()
+    for text in texts:
+        parse(text)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for text in texts:
+        parse(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / len(texts) * 1000, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resumes", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    texts = [synthetic_resume(rng) for _ in range(args.resumes)]
+
+    full_nlp, has_model = load_full_pipeline()
+    legacy_matcher = spacy.matcher.PhraseMatcher(full_nlp.vocab, attr="LOWER")
+    legacy_matcher.add("SKILLS", [full_nlp.make_doc(skill) for skill in SKILL_LIST])
+    legacy_matcher.add("SECTIONS", [full_nlp.make_doc(section) for section in SECTION_HEADERS])
+
+    if not has_model:
+        print(f"{resume_checker.SPACY_MODEL} not installed, using a blank English pipeline for both")
+        resume_checker.nlp = spacy.blank("en")
+
+    # build the matcher, warm both tokenizer caches (a running server's steady state) and
+    # check both produce the same skills before timing
+    for text in texts:
+        old = legacy_resume_parser(text, full_nlp, legacy_matcher)
+        new = resume_checker.resume_parser(text)
+        assert [sorted(x) for x in old] == [sorted(x) for x in new]
+
+    before = measure(lambda text: legacy_resume_parser(text, full_nlp, legacy_matcher), texts)
+    after = measure(resume_checker.resume_parser, texts)
+
+    print(f"{args.resumes} resumes")
+    print(f"before  {before[0]:8.2f} ms/resume  peak {before[1]:7.2f} MiB")
+    print(f"after   {after[0]:8.2f} ms/resume  peak {after[1]:7.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
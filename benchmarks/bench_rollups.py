@@ -0,0 +1,116 @@
+"""
+Org wide analytics over synthetic users: the top skill gaps and repo languages computed by loading every
+ResumeData and Repository row, against reading them from the rollups, and the cost of keeping the rollups
+current when one user changes.
+
+    python benchmarks/bench_rollups.py --users 50000
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+if not os.getenv("ENCRYPTION_KEY"):
+    from cryptography.fernet import Fernet
+    os.environ["ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+
+from sqlalchemy import insert
+
+from app import create_app, db
+from app import rollups, vocabulary
+from app.models import Repository, ResumeData, User
+
+LANGUAGES = ["Python", "JavaScript", "TypeScript", "Go", "Rust", "Java", "C++", "Ruby", "Shell", "HTML"]
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return np.median(samples) * 1000
+
+
+def random_skills(rng, popularity, size):
+    return [vocabulary.NAMES[i] for i in np.unique(rng.choice(vocabulary.SIZE, size=size, p=popularity))]
+
+
+def scan_top_gaps():
+    """
+    What answering "top skill gaps" took before: every resume, decoded in Python.
+    """
+    gaps = Counter()
+    for resume in ResumeData.query:
+        gaps.update(resume.skill_gaps or [])
+    return gaps.most_common(10)
+
+
+def scan_top_languages():
+    languages = Counter()
+    for repo in Repository.query:
+        languages.update(repo.languages or [])
+    return languages.most_common(10)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--repos-per-user", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    popularity = 1 / np.arange(1, vocabulary.SIZE + 1)
+    popularity /= popularity.sum()
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        # core inserts, the ORM bulk path trips over the access_token hybrid
+        db.session.execute(insert(User.__table__),
+                           [{"id": i, "github_username": f"user{i}"} for i in range(1, args.users + 1)])
+        resumes = []
+        for i in range(1, args.users + 1):
+            extracted = random_skills(rng, popularity, 20)
+            supported = extracted[::2]
+            resumes.append({"user_id": i, "extracted_skills": extracted, "supported_skills": supported,
+                            "skill_gaps": extracted[1::2], "extracted_bits": vocabulary.pack(vocabulary.to_bits(extracted)),
+                            "supported_bits": vocabulary.pack(vocabulary.to_bits(supported))})
+        db.session.execute(insert(ResumeData.__table__), resumes)
+        db.session.execute(insert(Repository.__table__),
+                           [{"user_id": i, "name": f"repo{j}",
+                             "languages": list(rng.choice(LANGUAGES, size=2, replace=False)),
+                             "commit_summary": random_skills(rng, popularity, 3)}
+                            for i in range(1, args.users + 1) for j in range(args.repos_per_user)])
+        db.session.commit()
+
+        start = time.perf_counter()
+        rollups.rebuild()
+        db.session.commit()
+        print(f"{args.users} users, {args.users * args.repos_per_user} repos")
+        print(f"rebuild rollups        {(time.perf_counter() - start) * 1000:10.1f}ms")
+        print(f"scan: top gaps         {timed(scan_top_gaps, 3):10.1f}ms")
+        print(f"scan: top languages    {timed(scan_top_languages, 3):10.1f}ms")
+        print(f"rollup: top gaps       {timed(lambda: rollups.top('gap'), args.repeat):10.3f}ms")
+        print(f"rollup: top languages  {timed(lambda: rollups.top('language'), args.repeat):10.3f}ms")
+
+        resume = db.session.get(ResumeData, 1)
+
+        def update_one():
+            resume.extracted_skills = random_skills(rng, popularity, 20)
+            rollups.index_users([resume.user_id])
+            db.session.commit()
+
+        print(f"update one user        {timed(update_one, args.repeat):10.3f}ms")
+        assert rollups.verify() == []
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
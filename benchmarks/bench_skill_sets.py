@@ -0,0 +1,95 @@
+"""
+Skill set algebra across many users: Python sets of skill names (what the code did before) against vocabulary
+bitsets, both as Python ints per user and as one packed NumPy array of 64 bit words for the whole population.
+Operations: skill gaps (extracted - supported), users showing a skill, and overlap with a target skill set.
+
+    python benchmarks/bench_skill_sets.py --users 1000000 --set-users 100000
+
+Sets of strings for a million users take gigabytes, so they run on --set-users and are scaled up.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import vocabulary
+
+
+def random_users(rng, count, popularity):
+    """
+    (extracted, supported) ID arrays per user, supported a subset of extracted.
+    """
+    users = []
+    for _ in range(count):
+        extracted = np.unique(rng.choice(vocabulary.SIZE, size=rng.integers(5, 30), p=popularity))
+        users.append((extracted, extracted[rng.random(len(extracted)) < 0.6]))
+    return users
+
+
+def timed(label, func, users, scale=1.0):
+    start = time.perf_counter()
+    result = func()
+    elapsed = (time.perf_counter() - start) * scale
+    print(f"  {label:<24} {elapsed * 1000:10.1f}ms  {elapsed / users * 1e9:8.1f}ns/user")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--set-users", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    popularity = 1 / np.arange(1, vocabulary.SIZE + 1)
+    popularity /= popularity.sum()
+    sample = random_users(rng, args.set_users, popularity)
+    target_names = ["python", "docker", "kubernetes", "aws", "postgresql"]
+    target_bits = vocabulary.to_bits(target_names)
+    skill = vocabulary.SKILL_IDS["docker"]
+    scale = args.users / args.set_users
+
+    print(f"{args.users} users, {vocabulary.SIZE} skills ({vocabulary.WORDS} words per bitset)")
+
+    print(f"python sets of names ({args.set_users} users, scaled x{scale:g})")
+    tracemalloc.start()
+    sets = [({vocabulary.NAMES[i] for i in extracted}, {vocabulary.NAMES[i] for i in supported})
+            for extracted, supported in sample]
+    memory = tracemalloc.get_traced_memory()[0] * scale
+    tracemalloc.stop()
+    target_set = set(target_names)
+    timed("gaps", lambda: [extracted - supported for extracted, supported in sets], args.users, scale)
+    timed("users with docker", lambda: sum("docker" in extracted for extracted, _ in sets), args.users, scale)
+    timed("overlap with target", lambda: [len(extracted & target_set) for extracted, _ in sets], args.users, scale)
+    print(f"  memory {memory / 2 ** 20:.0f} MiB")
+
+    print(f"python int bitsets ({args.set_users} users, scaled x{scale:g})")
+    ints = [(sum(1 << int(i) for i in extracted), sum(1 << int(i) for i in supported)) for extracted, supported in sample]
+    timed("gaps", lambda: [extracted & ~supported for extracted, supported in ints], args.users, scale)
+    timed("users with docker", lambda: sum((extracted >> skill) & 1 for extracted, _ in ints), args.users, scale)
+    timed("overlap with target", lambda: [(extracted & target_bits).bit_count() for extracted, _ in ints],
+          args.users, scale)
+
+    print(f"packed numpy bitsets ({args.users} users)")
+    # the stored column format: WORDS little-endian uint64 per user
+    extracted = np.zeros((args.users, vocabulary.WORDS), dtype="<u8")
+    supported = np.zeros((args.users, vocabulary.WORDS), dtype="<u8")
+    for row in range(args.users):
+        user_extracted, user_supported = ints[row % len(ints)]
+        extracted[row] = np.frombuffer(vocabulary.pack(user_extracted), dtype="<u8")
+        supported[row] = np.frombuffer(vocabulary.pack(user_supported), dtype="<u8")
+    target = np.frombuffer(vocabulary.pack(target_bits), dtype="<u8")
+    word, bit = divmod(skill, 64)
+    timed("gaps", lambda: extracted & ~supported, args.users)
+    timed("users with docker", lambda: int(((extracted[:, word] >> np.uint64(bit)) & np.uint64(1)).sum()), args.users)
+    timed("overlap with target", lambda: np.bitwise_count(extracted & target).sum(axis=1), args.users)
+    print(f"  memory {(extracted.nbytes + supported.nbytes) / 2 ** 20:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Startup time, first upload latency and per-worker memory with and without NLP_WARM_UP.
+Forks workers after create_app the way gunicorn's preload_app does and reports each worker's RSS and
+its private (unshared) memory. Linux only, reads /proc.
+
+    python benchmarks/bench_startup.py --workers 4
+
+Uses SPACY_MODEL (en_core_web_sm by default), falling back to "blank:en" if it is not installed.
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def memory_kib():
+    """
+    (Rss, Private_Clean + Private_Dirty) of this process in KiB.
+    """
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return values["Rss"], values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)
+
+
+def run(workers):
+    """
+    Runs in a fresh interpreter with NLP_WARM_UP set by the parent. Prints one JSON line.
+    """
+    sys.path.insert(0, ROOT)
+    start = time.perf_counter()
+    from app import create_app
+    from app.resume_checker import resume_parser
+    create_app()
+    startup = time.perf_counter() - start
+    gc.freeze()
+
+    children = []
+    for _ in range(workers):
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read)
+            first = time.perf_counter()
+            resume_parser("Skills\npython, docker\nProjects\nflask api in python\n")
+            first = time.perf_counter() - first
+            rss, private = memory_kib()
+            os.write(write, json.dumps({"first_parse": first, "rss": rss, "private": private}).encode())
+            os._exit(0)
+        os.close(write)
+        children.append((pid, read))
+
+    results = []
+    for pid, read in children:
+        results.append(json.loads(os.read(read, 4096)))
+        os.waitpid(pid, 0)
+    print(json.dumps({"startup": startup, "workers": results}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return run(args.workers)
+
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///:memory:")
+    if not env.get("ENCRYPTION_KEY"):
+        from cryptography.fernet import Fernet
+        env["ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+    try:
+        import spacy
+        spacy.load(env.get("SPACY_MODEL", "en_core_web_sm"))
+    except OSError:
+        env["SPACY_MODEL"] = "blank:en"
+    print(f"model {env.get('SPACY_MODEL', 'en_core_web_sm')}, {args.workers} workers")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env["MATCHER_CACHE_DIR"] = cache_dir
+        for label, warm in [("lazy", "0"), ("warm (cold matcher cache)", "1"), ("warm (matcher cache)", "1")]:
+            env["NLP_WARM_UP"] = warm
+            out = subprocess.run([sys.executable, __file__, "--child", "--workers", str(args.workers)],
+                                 env=env, capture_output=True, text=True, check=True).stdout
+            data = json.loads(out.strip().splitlines()[-1])
+            workers = data["workers"]
+            first = max(w["first_parse"] for w in workers) * 1000
+            rss = sum(w["rss"] for w in workers) / len(workers) / 1024
+            private = sum(w["private"] for w in workers) / len(workers) / 1024
+            print(f"{label:<26} startup {data['startup']:6.2f}s  first parse {first:8.1f}ms  "
+                  f"worker rss {rss:6.1f} MiB  private {private:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+TF-IDF document frequency upkeep and scoring at a corpus of synthetic users (one document each): a full
+recount against updating the corpus for one changed user, and scoring one user.
+
+    python benchmarks/bench_tfidf.py --documents 50000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+if not os.getenv("ENCRYPTION_KEY"):
+    from cryptography.fernet import Fernet
+    os.environ["ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+
+from sqlalchemy import insert
+
+from app import create_app, db
+from app import tfidf
+from app.models import ResumeData, User
+
+
+def random_counts(rng, popularity):
+    skills = rng.choice(len(tfidf.VOCABULARY), size=rng.integers(5, 40), p=popularity)
+    ids, counts = np.unique(skills, return_counts=True)
+    return {tfidf.VOCABULARY[i]: int(count) for i, count in zip(ids, counts)}
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return np.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    popularity = 1 / np.arange(1, len(tfidf.VOCABULARY) + 1)
+    popularity /= popularity.sum()
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        # core inserts, the ORM bulk path trips over the access_token hybrid
+        db.session.execute(insert(User.__table__),
+                           [{"id": i, "github_username": f"user{i}"} for i in range(1, args.documents + 1)])
+        db.session.execute(insert(ResumeData.__table__),
+                           [{"user_id": i, "skill_counts": random_counts(rng, popularity)}
+                            for i in range(1, args.documents + 1)])
+        db.session.commit()
+
+        start = time.perf_counter()
+        tfidf.rebuild()
+        db.session.commit()
+        print(f"{args.documents} documents, {len(tfidf.VOCABULARY)} skills")
+        print(f"full recount           {(time.perf_counter() - start) * 1000:10.1f}ms")
+
+        resume = db.session.get(ResumeData, 1)
+
+        def update_one():
+            resume.skill_counts = random_counts(rng, popularity)
+            tfidf.index_users([resume.user_id])
+            db.session.commit()
+
+        print(f"update one document    {timed(update_one, args.repeat):10.3f}ms")
+        print(f"score one user         {timed(lambda: tfidf.user_weights(2), args.repeat):10.3f}ms")
+        frequencies = tfidf.DocumentFrequencies.from_corpus(tfidf.load_corpus())
+        counts = random_counts(rng, popularity)
+        print(f"  in memory: update    {timed(lambda: frequencies.replace(tfidf.term_ids(counts), tfidf.term_ids(counts)), args.repeat):10.3f}ms")
+        print(f"  in memory: weights   {timed(lambda: frequencies.weights(counts), args.repeat):10.3f}ms")
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Access token decryption per sync: a Fernet decrypt on every read of User.access_token (what the model did before)
+against the TokenVault cache, over many users whose token is read several times per sync.
+
+    python benchmarks/bench_token_vault.py --users 2000 --reads-per-sync 10
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptography.fernet import Fernet, MultiFernet
+
+from app.token_vault import TokenVault
+
+
+def run(label, decrypt, tokens, reads, syncs):
+    start = time.perf_counter()
+    for _ in range(syncs):
+        for token in tokens:
+            for _ in range(reads):
+                decrypt(token)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<34} {elapsed * 1000:9.1f}ms  {elapsed / (syncs * len(tokens)) * 1e6:7.1f}us/sync")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--reads-per-sync", type=int, default=10)
+    parser.add_argument("--syncs", type=int, default=3)
+    args = parser.parse_args()
+
+    keys = [Fernet.generate_key() for _ in range(2)]
+    # tokens written under the older key, so MultiFernet has to try both
+    tokens = [Fernet(keys[1]).encrypt(f"gho_{i:036d}".encode()) for i in range(args.users)]
+    print(f"{args.users} users, {args.reads_per_sync} token reads per sync, {args.syncs} syncs each")
+
+    single = Fernet(keys[1])
+    run("Fernet.decrypt per read", single.decrypt, tokens, args.reads_per_sync, args.syncs)
+    multi = MultiFernet([Fernet(key) for key in keys])
+    run("MultiFernet.decrypt per read", multi.decrypt, tokens, args.reads_per_sync, args.syncs)
+    vault = TokenVault(keys=keys, ttl=300, max_size=args.users)
+    run("TokenVault, cache holds every user", vault.decrypt, tokens, args.reads_per_sync, args.syncs)
+    vault = TokenVault(keys=keys, ttl=300, max_size=args.users // 10)
+    run("TokenVault, cache holds 10%", vault.decrypt, tokens, args.reads_per_sync, args.syncs)
+    vault = TokenVault(keys=keys, ttl=0)
+    run("TokenVault, cache off", vault.decrypt, tokens, args.reads_per_sync, args.syncs)
+
+
+if __name__ == "__main__":
+    main()
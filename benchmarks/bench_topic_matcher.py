@@ -0,0 +1,75 @@
+"""
+Compares the old per-message keyword scan with TopicMatcher over synthetic commit messages.
+
+    python benchmarks/bench_topic_matcher.py --messages 100000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not os.getenv("ENCRYPTION_KEY"):
+    from cryptography.fernet import Fernet
+    os.environ["ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+
+from app.github_handler import TOPIC_KEYWORDS
+from app.topic_matcher import TopicMatcher
+
+FILLER = ["update", "add", "change", "the", "of", "for", "in", "new", "small", "some", "make", "work", "wip"]
+
+
+def legacy_extract_topics(commit_messages):
+    """
+    The matcher make_commit_summary used before TopicMatcher.
+    """
+    matched = set()
+    for msg in commit_messages:
+        msg = msg.lower()
+        tokens = re.findall(r"\b[a-z]+\b", msg)
+        for topic, keywords in TOPIC_KEYWORDS.items():
+            if any(kw in tokens for kw in keywords):
+                matched.add(topic)
+    return matched
+
+
+def synthetic_messages(count, seed=0):
+    rng = random.Random(seed)
+    keywords = [kw for kws in TOPIC_KEYWORDS.values() for kw in kws]
+    messages = []
+    for _ in range(count):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(3, 12))]
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+        messages.append(" ".join(words).capitalize())
+    return messages
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=100_000)
+    args = parser.parse_args()
+
+    messages = synthetic_messages(args.messages)
+    matcher, build = timed(TopicMatcher, TOPIC_KEYWORDS)
+    old, old_time = timed(legacy_extract_topics, messages)
+    new_full, new_time = timed(lambda msgs: set().union(*map(matcher.topics_in, msgs)), messages)
+    new_early, early_time = timed(matcher.match, iter(messages))
+
+    print(f"{args.messages} messages, matcher built in {build * 1000:.2f}ms")
+    print(f"legacy scan          {old_time:8.3f}s  topics={len(old)}")
+    print(f"TopicMatcher (all)   {new_time:8.3f}s  topics={len(new_full)}  speedup={old_time / new_time:5.1f}x")
+    print(f"TopicMatcher (early) {early_time:8.3f}s  topics={len(new_early)}")
+    print(f"only matched by phrases: {sorted(new_full - old)}")
+
+
+if __name__ == "__main__":
+    main()
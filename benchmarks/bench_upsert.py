@@ -0,0 +1,74 @@
+"""
+Writing a user's repos one ORM object at a time (a lookup per repo, then session.add) against the bulk
+upsert in app/upsert.py, for a first sync and a refresh that changes every description.
+
+    python benchmarks/bench_upsert.py --repos 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+if not os.getenv("ENCRYPTION_KEY"):
+    from cryptography.fernet import Fernet
+    os.environ["ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+
+from app import create_app, db
+from app.models import Repository, User
+from app.upsert import upsert_repositories
+
+
+def make_rows(repos, version):
+    return [{"name": f"repo{i}", "description": f"description {version}", "languages": ["Python"],
+             "language_shares": {"Python": 1.0}, "topic_counts": {"testing": i % 7},
+             "commit_summary": ["testing"]} for i in range(repos)]
+
+
+def write_per_row(user_id, rows):
+    """
+    The old way: one query per repo to find it, updating or adding ORM objects.
+    """
+    for row in rows:
+        repo = Repository.query.filter_by(user_id=user_id, name=row["name"]).first()
+        if repo is None:
+            repo = Repository(user_id=user_id, name=row["name"])
+            db.session.add(repo)
+        for key, value in row.items():
+            setattr(repo, key, value)
+    db.session.commit()
+
+
+def write_upsert(user_id, rows):
+    upsert_repositories(user_id, rows)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repos", type=int, default=10_000)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        print(f"{args.repos} repos")
+        for label, write in [("per row", write_per_row), ("bulk upsert", write_upsert)]:
+            user = User(github_username=label)
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+            for phase, version in [("first sync", 1), ("refresh", 2)]:
+                rows = make_rows(args.repos, version)
+                start = time.perf_counter()
+                write(user_id, rows)
+                elapsed = time.perf_counter() - start
+                db.session.expire_all()
+                updated = Repository.query.filter_by(user_id=user_id, description=f"description {version}").count()
+                print(f"{label:<12} {phase:<11} {elapsed:8.2f}s  rows with new description={updated}")
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Keeping one user's repos current after a burst of pushes to one repo: a full sync against applying the push
+webhooks, each on its own and coalesced into one update, against the local fake GitHub server with 20ms latency.
+
+    python benchmarks/bench_webhooks.py --repos 30 --pushes 10
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+if not os.getenv("ENCRYPTION_KEY"):
+    from cryptography.fernet import Fernet
+    os.environ["ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+
+from app import create_app, db, webhooks
+from app.github_handler import github_handler
+from app.models import User
+from fake_github import FakeGitHub
+
+FIXTURE = os.path.join(ROOT, "tests", "fixtures", "webhooks", "push.json")
+
+
+def burst(count):
+    """
+    count pushes of one commit each to repo-0, a minute apart, starting after the fake server's history.
+    """
+    with open(FIXTURE) as f:
+        template = json.load(f)
+    pushes = []
+    for i in range(count):
+        commit = dict(template["commits"][0], id=f"{i:040x}", timestamp=f"2030-01-01T00:{i:02d}:00Z")
+        pushes.append(dict(template, commits=[commit], head_commit=commit, after=commit["id"]))
+    return pushes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repos", type=int, default=30)
+    parser.add_argument("--commits", type=int, default=200)
+    parser.add_argument("--pushes", type=int, default=10)
+    args = parser.parse_args()
+
+    with FakeGitHub(repos=args.repos, commits=args.commits, latency=0.02) as fake:
+        app = create_app()
+        app.config.update(GITHUB_API_URL=fake.url, GITHUB_CACHE_PATH=None)
+        with app.app_context():
+            db.create_all()
+            user = User(github_username="octocat", access_token="token-octocat")
+            db.session.add(user)
+            db.session.commit()
+            github_handler("octocat", "token-octocat")
+
+            def timed(func):
+                before = fake.request_count
+                start = time.perf_counter()
+                func()
+                return (time.perf_counter() - start) * 1000, fake.request_count - before
+
+            fake.commits += args.pushes
+            results = {"full sync": timed(lambda: github_handler("octocat", "token-octocat"))}
+
+            def one_by_one():
+                for i, payload in enumerate(burst(args.pushes)):
+                    webhooks.record(f"single-{i}", "push", user.id, "repo-0", payload)
+                    webhooks.process_repo(user.id, "repo-0")
+
+            def coalesced():
+                for i, payload in enumerate(burst(args.pushes * 2)[args.pushes:]):
+                    webhooks.record(f"burst-{i}", "push", user.id, "repo-0", payload)
+                webhooks.process_repo(user.id, "repo-0")
+
+            results[f"{args.pushes} webhooks, one by one"] = timed(one_by_one)
+            results[f"{args.pushes} webhooks, coalesced"] = timed(coalesced)
+            db.drop_all()
+
+    print(f"{args.repos} repos, {args.commits} commits each, a burst of {args.pushes} pushes to one repo")
+    for name, (ms, requests) in results.items():
+        print(f"  {name:<28} {ms:9.1f}ms  {requests:4d} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Local stand-in for the parts of the GitHub REST and GraphQL APIs that SkillSync uses.
+Data is generated deterministically from the owner and repo name, and every response can be delayed to simulate
+network latency. A token of the form "token-<login>" is that user, any other token is `owner`.
+The GraphQL endpoint answers the queries app/github_graphql.py sends, from their variables, with the same data.
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlencode, urlparse
+
+WORDS = [
+    "fix", "bug", "add", "test", "api", "endpoint", "refactor", "docker", "readme", "model",
+    "migration", "login", "css", "layout", "pipeline", "deploy", "update", "cleanup", "data", "log"
+]
+LANGUAGES = ["Python", "JavaScript", "HTML", "CSS", "Shell", "Dockerfile"]
+# commit n of every repo is n minutes after this
+FIRST_COMMIT = datetime(2025, 1, 1)
+# author of every fifth commit
+COLLABORATOR = "collaborator"
+
+
+class FakeGitHub:
+    """
+    Fake GitHub server. `repos` repositories with `commits` commits each for every user, `latency` seconds added to
+    every request. Commit lists are paginated `per_page` at a time. The repo list is only paginated when the request
+    asks for a per_page, or when `repos_per_page` is set (GitHub's own default is 30).
+    """
+
+    def __init__(self, repos=20, commits=150, latency=0.02, per_page=100, owner="octocat", repos_per_page=None):
+        self.repos = repos
+        self.commits = commits
+        self.latency = latency
+        self.per_page = per_page
+        self.owner = owner
+        self.repos_per_page = repos_per_page
+        self.request_count = 0
+        self._commit_lists = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def repo_names(self):
+        return [f"repo-{i}" for i in range(self.repos)]
+
+    def login(self, authorization):
+        token = (authorization or "").split(" ")[-1]
+        return token[len("token-"):] if token.startswith("token-") else self.owner
+
+    def repo_payload(self, name, owner=None):
+        return {"name": name, "fork": False, "description": f"Description of {name}",
+                "owner": {"login": owner or self.owner}}
+
+    def _seed(self, kind, owner, name):
+        # the default owner keeps the seeds data was generated from before there were several users
+        return f"{kind}-{name}" if owner == self.owner else f"{kind}-{owner}/{name}"
+
+    def languages(self, name, owner=None):
+        rng = random.Random(self._seed("lang", owner or self.owner, name))
+        sizes = {lang: rng.randint(100, 50000) for lang in rng.sample(LANGUAGES, 3)}
+        # biggest first, as GitHub lists them
+        return dict(sorted(sizes.items(), key=lambda item: -item[1]))
+
+    def commit_list(self, name, owner=None, since=None, author=None):
+        """
+        Newest first. Commit n (1 to `commits`) is always the same, a minute after n - 1, so raising `commits`
+        adds newer commits. With since (an ISO timestamp) only the commits from then on, GitHub includes since itself.
+        Every fifth commit is by COLLABORATOR, the rest by the repo's owner; with author (a login) only theirs.
+        """
+        owner = owner or self.owner
+        # built once per history, long ones are served as hundreds of pages
+        key = (name, owner, since, author, self.commits)
+        if key in self._commit_lists:
+            return self._commit_lists[key]
+        rng = random.Random(self._seed("commits", owner, name))
+        commits = []
+        for n in range(1, self.commits + 1):
+            message = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6)))
+            date = (FIRST_COMMIT + timedelta(minutes=n)).strftime("%Y-%m-%dT%H:%M:%SZ")
+            login = COLLABORATOR if n % 5 == 0 else owner
+            if (since and date < since) or (author and login != author):
+                continue
+            commits.append({
+                "sha": f"{name}-{n:08d}",
+                "author": {"login": login},
+                "commit": {"message": message, "author": {"date": date}, "committer": {"date": date}}
+            })
+        commits.reverse()
+        self._commit_lists[key] = commits
+        return commits
+
+    def paginate(self, path, items, query, default_per_page):
+        """
+        One page of items and the Link header pointing at the next, as GitHub pages list endpoints.
+        """
+        per_page = int(query.get("per_page", [default_per_page or len(items) or 1])[0])
+        page = int(query.get("page", [1])[0])
+        headers = {}
+        if page * per_page < len(items):
+            params = {key: values[0] for key, values in query.items()}
+            next_url = f"{self.url}{path}?{urlencode(dict(params, per_page=per_page, page=page + 1))}"
+            headers["Link"] = f'<{next_url}>; rel="next"'
+        return 200, items[(page - 1) * per_page: page * per_page], headers
+
+    def handle(self, path, query, authorization=None):
+        """
+        Returns (status, body, extra headers) for a GET request.
+        """
+        parts = [part for part in path.split("/") if part]
+        login = self.login(authorization)
+        if parts == ["user"]:
+            return 200, {"login": login}, {}
+        if parts == ["user", "repos"]:
+            repos = [self.repo_payload(name, login) for name in self.repo_names()]
+            return self.paginate(path, repos, query, self.repos_per_page)
+        if len(parts) == 4 and parts[0] == "repos" and parts[3] == "languages":
+            return 200, self.languages(parts[2], parts[1]), {}
+        if len(parts) == 4 and parts[0] == "repos" and parts[3] == "commits":
+            since = query.get("since", [None])[0]
+            author = query.get("author", [None])[0]
+            return self.paginate(path, self.commit_list(parts[2], parts[1], since, author), query, self.per_page)
+        return 404, {"message": "Not Found"}, {}
+
+    def graphql(self, query, variables, authorization=None):
+        """
+        Answers the repo list query and the batched repository queries by their variables: name0, since0,
+        after0, languages0, ... for aliases r0, r1, ... Cursors are offsets, and a user's node id is U_<login>.
+        """
+        def page(items, after, first):
+            start = int(after or 0)
+            return items[start:start + first], {"hasNextPage": start + first < len(items), "endCursor": str(start + first)}
+
+        data = {"rateLimit": {"cost": 1, "remaining": 5000, "resetAt": "2030-01-01T00:00:00Z"}}
+        if "viewer" in query:
+            first = int(re.search(r"repositories\(first: (\d+)", query).group(1))
+            names, info = page(self.repo_names(), variables.get("after"), first)
+            data["viewer"] = {"id": f"U_{self.login(authorization)}", "repositories": {"pageInfo": info, "nodes": [
+                {"name": name, "description": f"Description of {name}", "isFork": False} for name in names]}}
+            return {"data": data}
+
+        first = int(re.search(r"history\(first: (\d+)", query).group(1))
+        owner = variables["owner"]
+        author = (variables.get("author") or {}).get("id", "")[len("U_"):] or None
+        i = 0
+        while f"name{i}" in variables:
+            name = variables[f"name{i}"]
+            if name not in self.repo_names():
+                data[f"r{i}"] = None
+            else:
+                commits, info = page(self.commit_list(name, owner, variables.get(f"since{i}"), author),
+                                     variables.get(f"after{i}"), first)
+                repo = {"defaultBranchRef": {"target": {"history": {"pageInfo": info, "nodes": [
+                    {"oid": commit["sha"], "message": commit["commit"]["message"],
+                     "committedDate": commit["commit"]["committer"]["date"]} for commit in commits]}}}}
+                if variables.get(f"languages{i}"):
+                    repo["languages"] = {"edges": [{"size": size, "node": {"name": language}}
+                                                   for language, size in self.languages(name, owner).items()]}
+                data[f"r{i}"] = repo
+            i += 1
+        return {"data": data}
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with fake._lock:
+                    fake.request_count += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                parsed = urlparse(self.path)
+                status, body, headers = fake.handle(parsed.path, parse_qs(parsed.query), self.headers.get("Authorization"))
+                payload = json.dumps(body).encode()
+                etag = '"%s"' % hashlib.sha1(payload).hexdigest()
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    status, payload = 304, b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.send_header("ETag", etag)
+                self.send_header("X-RateLimit-Remaining", "5000")
+                self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                with fake._lock:
+                    fake.request_count += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if urlparse(self.path).path != "/graphql":
+                    status, body = 404, {"message": "Not Found"}
+                else:
+                    request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                    status, body = 200, fake.graphql(request["query"], request.get("variables") or {},
+                                                     self.headers.get("Authorization"))
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.send_header("X-RateLimit-Remaining", "5000")
+                self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        ThreadingHTTPServer.request_queue_size = 128
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
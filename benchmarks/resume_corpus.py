@@ -0,0 +1,118 @@
+"""
+Deterministic synthetic resumes for benchmarks, as plain text or written out as PDF, DOCX and TXT files.
+The same seed always gives the same corpus. Also has the in-memory extraction the app used before extract_file,
+as the baseline it is measured against.
+
+    python benchmarks/resume_corpus.py /tmp/resumes --count 30
+"""
+import argparse
+import io
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import vocabulary
+from app.resume_checker import SECTION_HEADERS, SKILL_LIST
+
+FORMATS = ("pdf", "docx", "txt")
+FILLER = ("Worked with the team to design build and ship features used by thousands of customers every day "
+          "while improving reliability latency and cost across services owned by the group").split()
+NAMES = ["Alex Kim", "Sam Rivera", "Jordan Lee", "Taylor Chen", "Morgan Patel", "Casey Nguyen", "Riley Smith"]
+
+
+def synthetic_resume(rng, lines_per_section=(5, 15)):
+    """
+    A resume with a name line, a skills section and two or three experience sections. Skills are written as they
+    are listed or under one of their aliases, and the experience sections mention a subset of them.
+    """
+    skills = rng.sample(SKILL_LIST, rng.randint(8, 25))
+    lines = [rng.choice(NAMES), f"{rng.choice(NAMES).split()[0].lower()}@example.com", "", "Skills"]
+    for start in range(0, len(skills), 6):
+        lines.append(", ".join(rng.choice([skill] + vocabulary.aliases_of(skill)) for skill in skills[start:start + 6]))
+    shown = skills[:max(1, len(skills) * 2 // 3)]
+    for header in rng.sample([header for header in SECTION_HEADERS if header != "skills"], rng.randint(2, 3)):
+        lines.extend(["", header.title()])
+        for _ in range(rng.randint(*lines_per_section)):
+            words = rng.sample(FILLER, 10) + rng.sample(shown, min(2, len(shown)))
+            rng.shuffle(words)
+            lines.append(" ".join(words))
+    return "\n".join(lines)
+
+
+def write_resume(path, text):
+    """
+    Writes text as a PDF (one text box per page, about 45 lines a page), DOCX (one paragraph per line) or TXT,
+    by the extension of path.
+    """
+    extension = path.rsplit(".", 1)[-1].lower()
+    if extension == "pdf":
+        import fitz
+        doc = fitz.open()
+        lines = text.split("\n")
+        for start in range(0, len(lines), 45):
+            page = doc.new_page()
+            page.insert_textbox(fitz.Rect(50, 50, 550, 800), "\n".join(lines[start:start + 45]), fontsize=10)
+        doc.save(path)
+        doc.close()
+    elif extension == "docx":
+        from docx import Document
+        doc = Document()
+        for line in text.split("\n"):
+            doc.add_paragraph(line)
+        doc.save(path)
+    elif extension == "txt":
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        raise ValueError(f"unsupported resume format: {extension}")
+
+
+def extract_bytes(filename, byte_content):
+    """
+    The old in-memory extract_text: the whole upload as bytes, every page of a PDF joined, by the extension of
+    filename.
+    """
+    extension = filename.rsplit(".", 1)[-1].lower()
+    if extension == "pdf":
+        import fitz
+        with fitz.open(stream=byte_content, filetype="pdf") as doc:
+            return "".join(page.get_text() for page in doc)
+    if extension == "docx":
+        from docx import Document
+        return "\n".join(para.text for para in Document(io.BytesIO(byte_content)).paragraphs)
+    if extension == "txt":
+        return byte_content.decode("utf-8")
+    raise ValueError(f"unsupported resume format: {extension}")
+
+
+def build_corpus(directory, count, seed=0, formats=FORMATS):
+    """
+    Writes count resumes named resume-<n>.<format> into directory, cycling through formats, and returns
+    [(path, text)]. Files already there from the same seed are reused.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        text = synthetic_resume(rng)
+        path = os.path.join(directory, f"resume-{seed}-{i}.{formats[i % len(formats)]}")
+        if not os.path.exists(path):
+            write_resume(path, text)
+        corpus.append((path, text))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory")
+    parser.add_argument("--count", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    corpus = build_corpus(args.directory, args.count, args.seed)
+    print(f"{len(corpus)} resumes in {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
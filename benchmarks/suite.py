@@ -0,0 +1,304 @@
+"""
+Benchmark suite: GitHub ingestion against the local fake GitHub server, text extraction and resume_parser over a
+synthetic resume corpus, skill_recommender, and the JSON routes, each at several data sizes. Results are written
+as JSON so two runs (say, two commits) can be compared.
+
+    python benchmarks/suite.py --sizes small medium --output results.json
+    python benchmarks/suite.py compare before.json after.json --threshold 0.15
+
+Everything is generated from fixed seeds. resume_parser uses en_core_web_sm when it is installed and a blank
+English pipeline otherwise, recorded as "spacy_model" in the results since the numbers differ.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import spacy
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+if not os.getenv("ENCRYPTION_KEY"):
+    from cryptography.fernet import Fernet
+    os.environ["ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+
+from sqlalchemy import insert
+
+from app import create_app, db, resume_checker, rollups, tfidf, vocabulary
+from app.extraction import extract_file
+from app.github_handler import TOPIC_KEYWORDS, github_handler
+from app.models import Repository, ResumeData, User
+from app.recommender import skill_recommender
+from fake_github import LANGUAGES, FakeGitHub
+from resume_corpus import FORMATS, build_corpus, extract_bytes
+
+# users and repos in the database, GitHub repos and commits per repo for ingestion, resumes in the corpus
+SIZES = {
+    "small": {"users": 200, "repos_per_user": 5, "github_repos": 10, "commits": 100, "resumes": 15},
+    "medium": {"users": 2000, "repos_per_user": 10, "github_repos": 30, "commits": 300, "resumes": 60},
+    "large": {"users": 20000, "repos_per_user": 20, "github_repos": 80, "commits": 600, "resumes": 150},
+}
+
+
+def summarize(samples, items=1):
+    """
+    Timing statistics for a list of durations in seconds, each covering `items` units of work.
+    """
+    ordered = sorted(samples)
+    return {
+        "runs": len(samples),
+        "median_ms": round(statistics.median(ordered) * 1000, 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 4),
+        "min_ms": round(ordered[0] * 1000, 4),
+        "per_item_ms": round(statistics.median(ordered) / items * 1000, 4),
+    }
+
+
+def measure(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def make_app(**config):
+    app = create_app()
+    app.config.update(TESTING=True, GITHUB_CACHE_PATH=None, **config)
+    return app
+
+
+def load_nlp():
+    try:
+        resume_checker.get_nlp()
+        return resume_checker.SPACY_MODEL
+    except OSError:
+        resume_checker.nlp = spacy.blank("en")
+        resume_checker.matcher = None
+        return "blank"
+
+
+def bench_ingestion(size, params, repeat):
+    """
+    A first sync of every repo, then a re-sync with nothing new, against the fake server with 20ms latency, in
+    each GITHUB_FETCH_MODE.
+    """
+    results = []
+    with FakeGitHub(repos=params["github_repos"], commits=params["commits"], latency=0.02) as fake:
+        for mode in ("rest", "graphql"):
+            app = make_app(GITHUB_API_URL=fake.url, GITHUB_FETCH_MODE=mode)
+            with app.app_context():
+                db.create_all()
+                db.session.add(User(github_username="octocat", access_token="token-octocat"))
+                db.session.commit()
+                requests_before = fake.request_count
+                start = time.perf_counter()
+                github_handler("octocat", "token-octocat")
+                first = time.perf_counter() - start
+                assert Repository.query.count() == params["github_repos"]
+                results.append({"benchmark": f"ingestion.{mode}.first_sync", "items": params["github_repos"],
+                                "requests": fake.request_count - requests_before,
+                                **summarize([first], params["github_repos"])})
+                requests_before = fake.request_count
+                samples = measure(lambda: github_handler("octocat", "token-octocat"), repeat)
+                results.append({"benchmark": f"ingestion.{mode}.resync", "items": params["github_repos"],
+                                "requests": (fake.request_count - requests_before) // repeat,
+                                **summarize(samples, params["github_repos"])})
+                db.drop_all()
+    return results
+
+
+def bench_resumes(size, params, repeat, corpus_dir):
+    """
+    Text extraction per format, through extract_file and the old in-memory extraction, and resume_parser.
+    """
+    corpus = build_corpus(corpus_dir, params["resumes"])
+    results = []
+    for extension in FORMATS:
+        paths = [path for path, _ in corpus if path.endswith(extension)]
+        blobs = []
+        for path in paths:
+            with open(path, "rb") as f:
+                blobs.append((path, f.read()))
+        samples = measure(lambda: [extract_file(path) for path in paths], repeat)
+        results.append({"benchmark": f"extract_file.{extension}", "items": len(paths), **summarize(samples, len(paths))})
+        samples = measure(lambda: [extract_bytes(path, blob) for path, blob in blobs], repeat)
+        results.append({"benchmark": f"extract_text.{extension}", "items": len(paths), **summarize(samples, len(paths))})
+
+    texts = [text for _, text in corpus]
+    # builds the matcher outside the timing
+    resume_checker.resume_parser(texts[0])
+    samples = measure(lambda: [resume_checker.resume_parser(text) for text in texts], repeat)
+    results.append({"benchmark": "resume_parser", "items": len(texts), **summarize(samples, len(texts))})
+    return results
+
+
+def populate(params, seed=0):
+    """
+    Synthetic users, each with a resume and repos, written with core inserts, then the TF-IDF corpus and rollups.
+    """
+    rng = np.random.default_rng(seed)
+    skills = list(dict.fromkeys(resume_checker.SKILL_LIST))
+    popularity = 1 / np.arange(1, len(skills) + 1)
+    popularity /= popularity.sum()
+    topics = list(TOPIC_KEYWORDS)
+    languages = list(LANGUAGES)
+    users = range(1, params["users"] + 1)
+
+    # core inserts, the ORM bulk path trips over the access_token hybrid
+    db.session.execute(insert(User.__table__), [{"id": i, "github_username": f"user{i}"} for i in users])
+    resumes, repos = [], []
+    for i in users:
+        extracted = sorted({skills[j] for j in rng.choice(len(skills), size=rng.integers(5, 30), p=popularity)})
+        supported = extracted[::2]
+        resumes.append({"user_id": i, "extracted_skills": extracted, "supported_skills": supported,
+                        "skill_gaps": extracted[1::2], "skill_counts": {skill: int(rng.integers(1, 4)) for skill in extracted},
+                        "extracted_bits": vocabulary.pack(vocabulary.to_bits(extracted)),
+                        "supported_bits": vocabulary.pack(vocabulary.to_bits(supported))})
+        for j in range(params["repos_per_user"]):
+            shown = sorted({str(topic) for topic in rng.choice(topics, size=3)})
+            repos.append({"user_id": i, "name": f"repo-{j}", "languages": sorted({str(language) for language in rng.choice(languages, size=2)}),
+                          "commit_summary": shown, "topic_counts": {topic: int(rng.integers(1, 20)) for topic in shown},
+                          "skill_counts": {skills[int(rng.integers(len(skills)))]: int(rng.integers(1, 10))}})
+    db.session.execute(insert(ResumeData.__table__), resumes)
+    db.session.execute(insert(Repository.__table__), repos)
+    tfidf.rebuild()
+    rollups.rebuild()
+    db.session.commit()
+
+
+def bench_database(size, params, repeat):
+    """
+    skill_recommender for a sample of users, and the JSON routes, against a populated database.
+    """
+    results = []
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        populate(params)
+        results.append({"benchmark": "setup.populate", "items": params["users"],
+                        **summarize([time.perf_counter() - start], params["users"])})
+
+        sample = random.Random(0).sample(range(1, params["users"] + 1), min(50, params["users"]))
+        pairs = [(db.session.get(User, user_id), ResumeData.query.filter_by(user_id=user_id).one()) for user_id in sample]
+        # the first call builds the co-occurrence graph
+        skill_recommender(*pairs[0])
+        samples = measure(lambda: [skill_recommender(user, resume) for user, resume in pairs], repeat)
+        results.append({"benchmark": "skill_recommender", "items": len(pairs), **summarize(samples, len(pairs))})
+
+        client = app.test_client()
+        user_id = sample[0]
+        routes = {
+            "route.users": "/users?limit=50",
+            "route.users_fields": "/users?limit=200&fields=id,github_username",
+            "route.repos": f"/{user_id}/repos",
+            "route.resume": f"/{user_id}/resume",
+            "route.analytics": "/analytics/gap?limit=20",
+        }
+        for name, url in routes.items():
+            assert client.get(url).status_code == 200, url
+            samples = measure(lambda: client.get(url), repeat * 5)
+            results.append({"benchmark": name, "items": 1, **summarize(samples)})
+        db.drop_all()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    spacy_model = load_nlp()
+    corpus_dir = args.corpus or os.path.join(tempfile.gettempdir(), "skillsync-resume-corpus")
+    benches = {
+        "ingestion": bench_ingestion,
+        "resumes": lambda size, params, repeat: bench_resumes(size, params, repeat, corpus_dir),
+        "database": bench_database,
+    }
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "spacy_model": spacy_model,
+        "results": [],
+    }
+    for size in args.sizes:
+        for group in args.only or benches:
+            print(f"{size} {group}", file=sys.stderr)
+            for result in benches[group](size, SIZES[size], args.repeat):
+                result = {"size": size, **result}
+                report["results"].append(result)
+                print(f"  {result['benchmark']:<28} median {result['median_ms']:10.3f}ms  "
+                      f"per item {result['per_item_ms']:9.3f}ms", file=sys.stderr)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+def compare(args):
+    """
+    Prints every benchmark's median change from the first report to the second and exits 1 if any got slower by
+    more than the threshold.
+    """
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    old = {(result["size"], result["benchmark"]): result for result in before["results"]}
+    regressions = 0
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    for result in after["results"]:
+        key = (result["size"], result["benchmark"])
+        if key not in old:
+            continue
+        change = result["median_ms"] / old[key]["median_ms"] - 1 if old[key]["median_ms"] else 0.0
+        flag = ""
+        if change > args.threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"  {key[0]:<7} {key[1]:<24} {old[key]['median_ms']:10.3f}ms -> {result['median_ms']:10.3f}ms "
+              f"{change:+7.1%}{flag}")
+    if regressions:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    subcommands = parser.add_subparsers(dest="command")
+    compare_parser = subcommands.add_parser("compare", help="Compare two JSON reports.")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown of a median.")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium"])
+    parser.add_argument("--only", nargs="+", choices=["ingestion", "resumes", "database"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--corpus", help="Directory for the resume corpus, reused between runs.")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args()
+    if args.command == "compare":
+        compare(args)
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
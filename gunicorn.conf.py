@@ -0,0 +1,18 @@
+# gunicorn -c gunicorn.conf.py run:app
+import gc
+import os
+
+# Import the app (and with NLP_WARM_UP, spaCy and the skill matcher) once in the master before forking,
+# so every worker shares those pages copy-on-write instead of loading its own copy on the first upload.
+os.environ.setdefault("NLP_WARM_UP", "1")
+preload_app = True
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the collector's generations. Otherwise the first collection in each
+    # worker writes to the header of every preloaded object and unshares most of the model's pages.
+    gc.freeze()
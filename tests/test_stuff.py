@@ -1,13 +1,38 @@
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import time
+from collections import Counter
+from datetime import datetime
 import pytest
+import spacy
 from app import create_app
-from app.models import User, db, Repository
+from app.models import User, db, Repository, Job, ResumeData, ParsedResume, WebhookEvent
+from app.recommender import skill_recommender
+from app import adjacency, metrics, recommender, rollups, tfidf, vocabulary
+from app.batch_resume import parse_resumes, user_id_from_filename
+from app import jobs, resume_cache, resume_checker, tasks, webhooks
 from unittest.mock import patch
+from app.github_handler import github_handler, summarize_commits, TOPIC_KEYWORDS
+from app.topic_matcher import TopicMatcher
+from app.github_client import GitHubClient, QuotaExhausted, ResponseCache, USED_AT_PRECISION
+from app.extraction import extract_file
+from app.upsert import upsert_repositories
+from benchmarks.fake_github import FakeGitHub
+from app import token_vault
+from app.token_vault import TokenVault
+from app.commands import rotate_tokens_command
+from cryptography.fernet import Fernet
 
 @pytest.fixture
 def app():
     app = create_app()
     app.config["TESTING"] = True
     app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    app.config["GITHUB_CACHE_PATH"] = None
+    app.config["JOBS_EAGER"] = True
     with app.app_context():
         db.create_all()
         yield app
@@ -18,6 +43,14 @@ def app():
 def client(app):
     return app.test_client()
 
+@pytest.fixture
+def blank_nlp(monkeypatch):
+    """
+    The parser only uses the tokenizer, so a blank English pipeline stands in for en_core_web_sm
+    """
+    monkeypatch.setattr(resume_checker, "nlp", spacy.blank("en"))
+    monkeypatch.setattr(resume_checker, "matcher", None)
+
 def test_slash_route(client):
     """
     Tests that the index route works
@@ -54,4 +87,931 @@ def test_serialize(client, app):
         data = user.serialize()
         assert "id" in data
         assert "github_username" in data
-        assert "access_token" not in data
\ No newline at end of file
+        assert "access_token" not in data
+
+class FakeResponse:
+    """
+    Minimal stand-in for requests.Response
+    """
+    def __init__(self, data, status_code=200, links=None, headers=None):
+        self._data = data
+        self.status_code = status_code
+        self.links = links or {}
+        self.headers = headers or {}
+        self.text = json.dumps(data)
+
+    def json(self):
+        return self._data
+
+
+class FakeSession:
+    """
+    Stand-in for a requests.Session that serves canned GitHub responses keyed by path
+    """
+    def __init__(self, routes, etag=None):
+        self.routes = routes
+        self.etag = etag
+        self.calls = []
+
+    def get(self, url, params=None, headers=None, **kwargs):
+        path = url.split("api.github.com", 1)[-1]
+        self.calls.append(path)
+        if path not in self.routes:
+            return FakeResponse({}, 404)
+        if self.etag and (headers or {}).get("If-None-Match") == self.etag:
+            return FakeResponse(None, 304)
+        return FakeResponse(self.routes[path], headers={"ETag": self.etag} if self.etag else {})
+
+
+def fake_client(fake_session, cache=None):
+    client = GitHubClient("TPAB", cache=cache)
+    client.session = fake_session
+    return client
+
+
+def fake_github_routes(repo_names):
+    routes = {"/user/repos": [{"name": name, "fork": False, "description": None} for name in repo_names]}
+    for name in repo_names:
+        routes[f"/repos/mcalero123/{name}/languages"] = {"Python": 900, "HTML": 100}
+        routes[f"/repos/mcalero123/{name}/commits"] = [
+            {"sha": f"{name}-1", "commit": {"message": "fix login bug", "committer": {"date": "2025-08-01T00:00:00Z"}}}
+        ]
+    return routes
+
+
+def test_github_handler_concurrent(client, app):
+    """
+    Tests that github_handler fetches every repo on the worker pool and writes them in one batch
+    """
+    with app.app_context():
+        db.session.add(User(github_username = "mcalero123", access_token = "TPAB"))
+        db.session.commit()
+
+        fake_session = FakeSession(fake_github_routes([f"repo{i}" for i in range(10)]))
+        with patch("app.github_handler.make_client", return_value=fake_client(fake_session)):
+            github_handler("mcalero123", "TPAB", concurrency=4)
+
+        repos = Repository.query.all()
+        assert len(repos) == 10
+        assert all(repo.languages == ["Python", "HTML"] for repo in repos)
+        assert all(set(repo.commit_summary) == {"auth", "bugfix"} for repo in repos)
+        assert len(fake_session.calls) == 21
+
+
+def test_github_handler_incremental_resync(client, app):
+    """
+    Tests that a re-sync of unchanged repos only asks for commits since the stored high-water mark
+    """
+    with app.app_context():
+        db.session.add(User(github_username = "mcalero123", access_token = "TPAB"))
+        db.session.commit()
+
+        routes = fake_github_routes(["repo0", "repo1"])
+        with patch("app.github_handler.make_client", return_value=fake_client(FakeSession(routes))):
+            github_handler("mcalero123", "TPAB")
+        assert Repository.query.filter_by(name="repo0").first().last_commit_sha == "repo0-1"
+
+        routes["/repos/mcalero123/repo0/commits"].insert(0, {
+            "sha": "repo0-2", "commit": {"message": "add docker build", "committer": {"date": "2025-08-02T00:00:00Z"}}
+        })
+        fake_session = FakeSession(routes)
+        with patch("app.github_handler.make_client", return_value=fake_client(fake_session)):
+            github_handler("mcalero123", "TPAB")
+
+        # repos list, two commits pages and languages for the one repo with new commits
+        assert len(fake_session.calls) == 4
+        repo0 = Repository.query.filter_by(name="repo0").first()
+        assert repo0.last_commit_sha == "repo0-2"
+        assert repo0.commit_summary == ["auth", "bugfix", "devops"]
+        assert repo0.topic_counts == {"auth": 1, "bugfix": 1, "devops": 1}
+        assert repo0.language_shares == {"Python": 0.9, "HTML": 0.1}
+        assert Repository.query.count() == 2
+
+
+def test_github_client_low_quota():
+    """
+    Tests that a low quota is waited out once when the window resets soon, and fails the fetch with the time to
+    retry at when it doesn't
+    """
+    clock = [1000.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    class QuotaSession:
+        def __init__(self, reset):
+            self.reset = reset
+
+        def get(self, url, params=None, headers=None, **kwargs):
+            return FakeResponse([], headers={"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": str(self.reset)})
+
+    with patch("app.github_client.time.time", lambda: clock[0]), patch("app.github_client.time.sleep", sleep):
+        client = fake_client(QuotaSession(1030))
+        for _ in range(3):
+            assert client.get("/user/repos").status_code == 200
+        assert sleeps == [30.0]
+
+        client = fake_client(QuotaSession(int(clock[0]) + 3600))
+        client.get("/user/repos")
+        with pytest.raises(QuotaExhausted, match="retry after"):
+            client.get("/user/repos")
+        assert sleeps == [30.0]
+
+
+def test_github_client_conditional_cache():
+    """
+    Tests that a repeated request is sent with If-None-Match and served from the cache on a 304
+    """
+    fake_session = FakeSession({"/user/repos": [{"name": "repo0"}]}, etag='"abc"')
+    client = fake_client(fake_session, cache=ResponseCache(":memory:"))
+
+    first = client.get("/user/repos")
+    second = client.get("/user/repos")
+
+    assert not first.from_cache
+    assert second.from_cache
+    assert second.json() == [{"name": "repo0"}]
+
+
+def test_github_response_cache_bounded(tmp_path):
+    """
+    Tests that the response cache drops the least recently used bodies past max_bytes and unused ones past
+    max_age, and upgrades a cache file from before it was bounded
+    """
+    legacy = sqlite3.connect(tmp_path / "cache.sqlite3")
+    legacy.execute("CREATE TABLE github_cache (key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, link TEXT, body TEXT)")
+    legacy.execute("INSERT INTO github_cache VALUES ('old', 'e', NULL, NULL, 'x')")
+    legacy.commit()
+    legacy.close()
+
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), max_bytes=1000, max_age=3600)
+    assert cache.get("old")["body"] == "x"
+    for i in range(3):
+        cache.set(f"page{i}", f'"{i}"', None, None, "x" * 400)
+        with patch("app.github_client.time.time", return_value=time.time() + 2 * USED_AT_PRECISION * (i + 1)):
+            cache.get("page0")
+    assert cache.get("old") is None and cache.get("page1") is None
+    assert cache.get("page0") is not None and cache.get("page2") is not None
+
+    # unused for longer than max_age
+    with patch("app.github_client.time.time", return_value=time.time() + 10 * 3600):
+        assert ResponseCache(str(tmp_path / "cache.sqlite3"), max_age=3600).get("page0") is None
+
+
+def test_github_repos_job(client, app):
+    """
+    Tests that POST /github/repos runs the sync as a job and that an active job is reused instead of queued twice
+    """
+    with app.app_context():
+        db.session.add(User(github_username = "mcalero123", access_token = "TPAB"))
+        db.session.commit()
+        with client.session_transaction() as sess:
+            sess["github_username"] = "mcalero123"
+            sess["access_token"] = "TPAB"
+
+        fake_session = FakeSession(fake_github_routes(["repo0", "repo1"]))
+        with patch("app.github_handler.make_client", return_value=fake_client(fake_session)):
+            response = client.post("/github/repos")
+        assert response.status_code == 202
+
+        status = client.get(f"/jobs/{response.json['job_id']}").json
+        assert status["status"] == "done"
+        assert status["progress"] == status["total"] == 2
+        assert status["result"] == {"repos": 2}
+
+        running = Job(kind="github_sync", dedupe_key="github_sync:1", status="running", payload={"username": "mcalero123"}, user_id=1)
+        db.session.add(running)
+        db.session.commit()
+        assert jobs.enqueue("github_sync", "github_sync:1", {"username": "mcalero123"}, user_id=1).id == running.id
+
+
+def test_topic_matcher_phrases():
+    """
+    Tests that the compiled matcher finds single words and multi-word / punctuated keywords
+    """
+    matcher = TopicMatcher(TOPIC_KEYWORDS)
+    assert matcher.topics_in("Add foreign key to orders") == {"database"}
+    assert matcher.topics_in("Set up GitHub Actions") == {"cicd"}
+    assert matcher.topics_in("Bump package.json") == {"dependencies"}
+    assert matcher.topics_in("Fix login") == {"bugfix", "auth"}
+    assert matcher.match(iter(["nothing here", "fix login"])) == {"bugfix", "auth"}
+
+
+def test_commit_skill_counts_skip_everyday_words():
+    """
+    Tests that skills named by everyday words aren't counted in commit messages, but their aliases are
+    """
+    _, skill_counts = summarize_commits(["Go back to the old layout", "Rest of the fix", "render the page",
+                                         "Merge branch main into arch", "Spring cleaning", "Express the total as JSON"])
+    assert skill_counts == {}
+    _, skill_counts = summarize_commits(["Port the worker to golang", "Add a RESTful endpoint", "Add pytest fixtures"])
+    assert skill_counts == {"go": 1, "rest": 1, "pytest": 1}
+
+
+def test_recommender_weights(client, app):
+    """
+    Tests that hidden strengths and skill counts are ranked by commit counts summed over repos
+    """
+    with app.app_context():
+        user = User(github_username = "mcalero123", access_token = "TPAB")
+        db.session.add(user)
+        db.session.commit()
+        db.session.add_all([
+            Repository(user_id=user.id, name="a", topic_counts={"testing": 5, "frontend": 1}, language_shares={"Python": 1.0}),
+            Repository(user_id=user.id, name="b", topic_counts={"frontend": 1, "devops": 3}, language_shares={"Python": 0.5, "CSS": 0.5}),
+            Repository(user_id=user.id, name="c", commit_summary=["database"]),
+        ])
+        resume = ResumeData(user_id=user.id, extracted_skills=["python", "docker"], supported_skills=["python"], skill_gaps=["docker"])
+        db.session.add(resume)
+        db.session.commit()
+
+        recs = skill_recommender(user, resume)
+        assert recs["hidden_strengths"] == ["testing", "devops", "frontend", "database"]
+        assert recs["languages"] == {"Python": 1.5, "CSS": 0.5}
+        assert recs["skill_counts"]["testing"] == 5
+        assert recs["skill_counts"]["python"] == 1
+
+
+def test_resume_parser_sections(blank_nlp):
+    """
+    Tests that skills are bucketed into the section whose header precedes them
+    """
+    text = (
+        "Jane Doe, knows Haskell\n"
+        "Skills: Python, Docker, Kubernetes\n"
+        "Work Experience\n"
+        "Built Flask APIs in python on AWS\n"
+        "Projects\n"
+        "Deployed with docker\n"
+    )
+    extracted, supported, gaps = resume_checker.resume_parser(text)
+    assert set(extracted) == {"python", "docker", "kubernetes", "flask", "aws"}
+    assert set(supported) == {"python", "docker", "flask", "aws"}
+    assert gaps == ["kubernetes"]
+
+
+def test_batch_parse_resumes_checkpoint(app, blank_nlp, tmp_path):
+    """
+    Tests that batch parsing stores every resume and that a rerun with the same checkpoint skips them
+    """
+    with app.app_context():
+        users = [User(github_username = f"user{i}", access_token = "TPAB") for i in range(3)]
+        db.session.add_all(users)
+        db.session.commit()
+        paths = []
+        for user in users:
+            path = tmp_path / f"{user.id}_resume.txt"
+            path.write_text("Skills\nPython, Rust\nProjects\nA python CLI\n")
+            paths.append((user_id_from_filename(str(path)), str(path)))
+        checkpoint = str(tmp_path / "checkpoint.jsonl")
+
+        stats = parse_resumes(paths, commit_every=2, checkpoint_path=checkpoint)
+        assert stats["parsed"] == 3
+        assert ResumeData.query.count() == 3
+        assert all(user.resume_uploaded for user in User.query.all())
+        assert ResumeData.query.first().skill_gaps == ["rust"]
+
+        stats = parse_resumes(paths, checkpoint_path=checkpoint)
+        assert stats["parsed"] == 0
+        assert stats["skipped"] == 3
+
+
+def test_matcher_pattern_cache(blank_nlp, tmp_path):
+    """
+    Tests that warm_up stores the tokenized patterns and that a later startup loads them from disk
+    """
+    resume_checker.warm_up(str(tmp_path))
+    cached = tmp_path / f"matcher-{resume_checker.taxonomy_version()}.spacy"
+    assert cached.exists()
+
+    resume_checker.matcher = None
+    patterns, sections = resume_checker.pattern_docs(str(tmp_path))
+    assert [doc.text for doc in patterns] == resume_checker.SKILL_LIST
+    assert [doc.text for doc in sections] == resume_checker.SECTION_HEADERS
+    assert resume_checker.parse_lines(resume_checker.tokenize_lines("Skills\nI know python\n")) == (["python"], [], ["python"])
+
+
+def test_duplicate_upload_served_from_cache(client, app, blank_nlp, tmp_path):
+    """
+    Tests that uploading the same resume twice only parses it once
+    """
+    app.config["WTF_CSRF_ENABLED"] = False
+    app.config["UPLOAD_FOLDER"] = str(tmp_path)
+    with app.app_context():
+        db.session.add(User(github_username = "mcalero123", access_token = "TPAB"))
+        db.session.commit()
+        with client.session_transaction() as sess:
+            sess["github_username"] = "mcalero123"
+
+        resume = b"Skills\nPython, Go\nExperience\nGo services\n"
+        with patch("app.tasks.resume_parser", wraps=resume_checker.resume_parser) as parser:
+            for _ in range(2):
+                response = client.post("/dashboard", data={"file": (io.BytesIO(resume), "cv.txt")},
+                                       content_type="multipart/form-data")
+                assert response.status_code == 200
+        assert parser.call_count == 1
+
+        assert ParsedResume.query.count() == 1
+        saved = ResumeData.query.filter_by(user_id=1).one()
+        assert set(saved.extracted_skills) == {"python", "go"}
+        assert saved.skill_gaps == ["python"]
+
+
+def test_reupload_before_parse_keeps_cache_correct(client, app, blank_nlp, tmp_path):
+    """
+    Tests that re-uploading a different file under the same name before the first upload's job runs doesn't
+    cache one file's skills under the other's digest
+    """
+    app.config["WTF_CSRF_ENABLED"] = False
+    app.config["UPLOAD_FOLDER"] = str(tmp_path)
+    db.session.add(User(github_username = "mcalero123", access_token = "TPAB"))
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess["github_username"] = "mcalero123"
+
+    queued = []
+    uploads = {"python": b"Skills\nPython\n", "rust": b"Skills\nRust\n"}
+    with patch("app.routes.jobs.enqueue", side_effect=lambda kind, key, payload, **kwargs: queued.append(payload)):
+        for resume in uploads.values():
+            client.post("/dashboard", data={"file": (io.BytesIO(resume), "cv.txt")}, content_type="multipart/form-data")
+    for payload in queued:
+        tasks.parse_resume(None, **payload)
+
+    for skill, resume in uploads.items():
+        digest = hashlib.sha256(resume).hexdigest()
+        assert resume_cache.lookup(digest).extracted_skills == [skill]
+
+
+def test_extract_file_limits(tmp_path):
+    """
+    Tests that PDF pages are extracted in order across processes up to the page cap, and text is cut at the character cap
+    """
+    import fitz
+    pdf = fitz.open()
+    for i in range(20):
+        pdf.new_page().insert_text((72, 72), f"page {i}")
+    pdf.save(str(tmp_path / "cv.pdf"))
+
+    text = extract_file(str(tmp_path / "cv.pdf"), config={"EXTRACT_MAX_PAGES": 12})
+    assert [line for line in text.splitlines() if line] == [f"page {i}" for i in range(12)]
+
+    (tmp_path / "cv.txt").write_text("python " * 1000)
+    assert extract_file(str(tmp_path / "cv.txt"), config={"EXTRACT_MAX_CHARS": 70}) == "python " * 10
+    assert extract_file(str(tmp_path / "cv.exe")) == ""
+
+
+def test_users_pagination_query_count(client, app):
+    """
+    Tests that a page of 100 users with 50 repos each takes a constant number of queries, and the cursor walks every user
+    """
+    from sqlalchemy import event
+    with app.app_context():
+        db.session.add_all(User(github_username = f"user{i}") for i in range(150))
+        db.session.commit()
+        db.session.add_all(Repository(user_id = user_id, name = f"repo{j}")
+                           for user_id in range(1, 151) for j in range(50))
+        db.session.commit()
+        db.session.expire_all()
+
+        statements = []
+        def count(*args):
+            statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", count)
+        response = client.get("/users?limit=100")
+        event.remove(db.engine, "before_cursor_execute", count)
+        assert len(statements) == 2
+        assert len(response.json["users"]) == 100
+        assert all(len(user["repositories"]) == 50 for user in response.json["users"])
+
+        response = client.get(f"/users?limit=100&after={response.json['next']}&fields=id,github_username")
+        assert [user["id"] for user in response.json["users"]] == list(range(101, 151))
+        assert set(response.json["users"][0]) == {"id", "github_username"}
+        assert response.json["next"] is None
+
+        assert client.get("/users?fields=password").status_code == 400
+        assert client.get("/1/repos?limit=20").json["next"] == 20
+
+
+def test_upsert_repositories(app):
+    """
+    Tests that upserting inserts new repos, updates only the given columns of stored ones and keeps users apart
+    """
+    with app.app_context():
+        db.session.add_all([User(github_username = "mcalero123"), User(github_username = "octocat")])
+        db.session.commit()
+        upsert_repositories(1, [{"name": "api", "description": "old", "languages": ["Go"]}, {"name": "web"}])
+        upsert_repositories(2, [{"name": "api", "description": "theirs"}])
+        db.session.commit()
+
+        upsert_repositories(1, [{"name": "api", "description": "new"}, {"name": "cli", "description": None}])
+        db.session.commit()
+
+        repos = {repo.name: repo for repo in Repository.query.filter_by(user_id = 1)}
+        assert set(repos) == {"api", "web", "cli"}
+        assert repos["api"].description == "new"
+        assert repos["api"].languages == ["Go"]
+        assert repos["cli"].commit_summary == []
+        assert Repository.query.filter_by(user_id = 2).one().description == "theirs"
+
+
+def test_recommendations_cached_until_data_changes(client, app):
+    """
+    Tests that recommendations are served from the stored result until the user's repos or resume change
+    """
+    recommender.stats.reset()
+    with app.app_context():
+        user = User(github_username = "mcalero123", access_token = "TPAB")
+        db.session.add(user)
+        db.session.commit()
+        db.session.add(ResumeData(user_id=user.id, extracted_skills=["python"], supported_skills=["python"], skill_gaps=[]))
+        db.session.add(Repository(user_id=user.id, name="a", topic_counts={"testing": 2}))
+        db.session.commit()
+        with client.session_transaction() as sess:
+            sess["github_username"] = "mcalero123"
+
+        with patch("app.recommender.skill_recommender", wraps=skill_recommender) as compute:
+            first = client.post("/recommendations")
+            assert first.status_code == 200
+            assert first.json["recommendations"]["hidden_strengths"] == ["testing"]
+            client.post("/recommendations")
+            assert compute.call_count == 1
+
+            ResumeData.query.filter_by(user_id=1).one().extracted_skills = ["python", "testing"]
+            db.session.commit()
+            assert client.post("/recommendations").json["recommendations"]["hidden_strengths"] == []
+            assert compute.call_count == 2
+
+            upsert_repositories(1, [{"name": "b", "topic_counts": {"devops": 1}}])
+            db.session.commit()
+            assert client.post("/recommendations").json["recommendations"]["hidden_strengths"] == ["devops"]
+            assert compute.call_count == 3
+
+        snapshot = client.get("/recommendations/stats").json["recommendations"]
+        assert (snapshot["hits"], snapshot["misses"]) == (1, 3)
+
+
+def test_adjacent_skills(client, app):
+    """
+    Tests that adjacent skills are ranked by co-occurrence with the user's skills and follow one user's update
+    """
+    ids = adjacency.skill_ids
+    graph = adjacency.SkillGraph({1: ids(["python", "flask"]), 2: ids(["python", "flask", "docker"]),
+                                  3: ids(["python", "django"]), 4: ids(["Rust", "testing"])})
+    assert [skill for skill, _ in graph.adjacent(ids(["python"]))] == ["flask", "django", "docker"]
+
+    graph.update_user(4, ids(["python", "django"]))
+    graph.update_user(5, ids(["python", "django"]))
+    assert [skill for skill, _ in graph.adjacent(ids(["python"]))][0] == "django"
+    assert graph.adjacent(ids(["rust"])) == []
+    assert graph.cooccurrence[adjacency.INDEX["rust"], adjacency.INDEX["testing"]] == 0
+
+    adjacency.reset_graph()
+    with app.app_context():
+        db.session.add_all([User(github_username = "mcalero123"), User(github_username = "octocat")])
+        db.session.commit()
+        db.session.add(ResumeData(user_id=1, extracted_skills=["python", "flask"], supported_skills=[], skill_gaps=[]))
+        db.session.add(Repository(user_id=2, name="a", languages=["Python"], commit_summary=["testing"]))
+        resume = ResumeData(user_id=2, extracted_skills=[], supported_skills=[], skill_gaps=[])
+        db.session.add(resume)
+        db.session.commit()
+        assert skill_recommender(db.session.get(User, 2), resume)["adjacent_skills"] == ["flask"]
+    adjacency.reset_graph()
+
+
+def test_stale_skill_graph_rebuilt_off_request(app):
+    """
+    Tests that a stale graph keeps serving while its replacement is built, and updates made meanwhile carry over
+    """
+    import threading
+    ids = adjacency.skill_ids
+    adjacency.reset_graph()
+    with app.app_context():
+        db.session.add(User(github_username = "mcalero123"))
+        db.session.commit()
+        db.session.add(ResumeData(user_id=1, extracted_skills=["python", "flask"], supported_skills=[], skill_gaps=[]))
+        db.session.commit()
+        old = adjacency.get_graph()
+        old.built_at -= 10
+        loading = threading.Event()
+        release = threading.Event()
+        load = adjacency.load_user_skills
+
+        def slow_load():
+            loading.set()
+            release.wait(5)
+            return load()
+
+        with patch("app.adjacency.load_user_skills", slow_load):
+            assert adjacency.get_graph(max_age=5) is old
+            assert loading.wait(5)
+            # served without waiting for the rebuild
+            assert adjacency.get_graph(max_age=5) is old
+            old.update_user(2, ids(["python", "django"]))
+            release.set()
+            adjacency._rebuild.join(5)
+        graph = adjacency.get_graph(max_age=5)
+        assert graph is not old and adjacency._rebuild is None
+        assert [skill for skill, _ in graph.adjacent(ids(["python"]))] == ["flask", "django"]
+        # a caller still holding the old graph updates the new one
+        old.update_user(1, ids(["python"]))
+        assert [skill for skill, _ in graph.adjacent(ids(["python"]))] == ["django"]
+    adjacency.reset_graph()
+
+
+def test_tfidf_incremental_document_frequencies(app):
+    """
+    Tests that document frequencies follow users being added and changed without a recount, and rank skill gaps
+    """
+    with app.app_context():
+        db.session.add_all(User(github_username = f"user{i}") for i in range(3))
+        db.session.commit()
+        for user_id, counts in [(1, {"python": 3, "docker": 1}), (2, {"python": 1}), (3, {"python": 2, "rust": 1})]:
+            db.session.add(ResumeData(user_id=user_id, skill_counts=counts, extracted_skills=list(counts),
+                                      supported_skills=[], skill_gaps=list(counts)))
+            tfidf.index_users([user_id])
+        db.session.add(Repository(user_id=1, name="a", skill_counts={"docker": 4}))
+        tfidf.index_users([1])
+        ResumeData.query.filter_by(user_id=3).one().skill_counts = {"python": 2}
+        tfidf.index_users([3])
+        db.session.commit()
+
+        frequencies = tfidf.DocumentFrequencies.from_corpus(tfidf.load_corpus())
+        assert frequencies.documents == 3
+        assert frequencies.frequencies[tfidf.INDEX["python"]] == 3
+        assert frequencies.frequencies[tfidf.INDEX["docker"]] == 1
+        assert frequencies.frequencies[tfidf.INDEX["rust"]] == 0
+        assert frequencies.frequencies.tolist() == tfidf.rebuild().frequencies.tolist()
+
+        # docker is rarer across users and mentioned 5 times, python is everywhere
+        weights = tfidf.user_weights(1)
+        assert weights["docker"] > weights["python"]
+        resume = ResumeData.query.filter_by(user_id=1).one()
+        assert skill_recommender(db.session.get(User, 1), resume)["skill_gaps"] == ["docker", "python"]
+
+
+def test_tfidf_concurrent_writers(app):
+    """
+    Tests that document frequency changes add to what another writer stored meanwhile, and that creating the
+    corpus when another writer just did doesn't fail
+    """
+    with app.app_context():
+        db.session.add_all(User(github_username = f"user{i}") for i in range(2))
+        db.session.commit()
+        for user_id in (1, 2):
+            db.session.add(ResumeData(user_id=user_id, skill_counts={"python": 1}, extracted_skills=["python"],
+                                      supported_skills=[], skill_gaps=[]))
+        tfidf.index_users([1])
+        db.session.commit()
+
+        index = tfidf._index
+
+        def racing_index(frequencies, user_ids):
+            # another worker indexes user 2 after this one read the corpus
+            with patch("app.tfidf._index", index):
+                tfidf.index_users([2])
+            index(frequencies, user_ids)
+
+        ResumeData.query.filter_by(user_id=1).one().skill_counts = {"python": 1, "docker": 1}
+        with patch("app.tfidf._index", racing_index):
+            tfidf.index_users([1])
+        db.session.commit()
+        frequencies = tfidf.DocumentFrequencies.from_corpus(tfidf.load_corpus())
+        assert frequencies.documents == 2
+        assert frequencies.frequencies[tfidf.INDEX["python"]] == 2
+        assert frequencies.frequencies[tfidf.INDEX["docker"]] == 1
+
+        # the corpus row is there, but wasn't when this rebuild looked
+        with patch("app.tfidf.load_corpus", side_effect=[None, tfidf.load_corpus()]):
+            tfidf.rebuild()
+        db.session.commit()
+        assert tfidf.DocumentFrequencies.from_corpus(tfidf.load_corpus()).frequencies.tolist() == frequencies.frequencies.tolist()
+
+
+def test_skill_vocabulary(blank_nlp):
+    """
+    Tests that every skill and topic has a unique ID, aliases resolve, and parsed skills round trip through bitsets
+    """
+    assert set(resume_checker.SKILL_LIST) | set(TOPIC_KEYWORDS) <= set(vocabulary.SKILL_IDS)
+    assert len(set(vocabulary.SKILL_IDS.values())) == len(vocabulary.SKILL_IDS)
+    assert set(vocabulary.ALIASES.values()) <= set(vocabulary.SKILL_IDS)
+
+    extracted, supported, gaps = resume_checker.resume_parser("Skills\nNodeJS, Postgres, golang\nProjects\nAPI in golang\n")
+    assert extracted == ["go", "node.js", "postgresql"]
+    assert supported == ["go"]
+    resume = ResumeData(user_id=1, extracted_skills=extracted, supported_skills=supported, skill_gaps=gaps)
+    extracted_bits, supported_bits, gap_bits = resume.skill_bits()
+    assert vocabulary.unpack(resume.extracted_bits) == extracted_bits == vocabulary.to_bits(["golang", "node.js", "postgres"])
+    assert vocabulary.from_bits(gap_bits) == gaps == ["node.js", "postgresql"]
+
+
+def test_analytics_rollups(client, app):
+    """
+    Tests that rollups follow resumes and repos changing, match a recount, and answer the analytics endpoint
+    """
+    with app.app_context():
+        db.session.add_all(User(github_username = f"user{i}") for i in range(2))
+        db.session.commit()
+        for user_id, extracted in [(1, ["python", "docker"]), (2, ["python", "rust"])]:
+            db.session.add(ResumeData(user_id=user_id, extracted_skills=extracted, supported_skills=["python"]))
+            rollups.index_users([user_id])
+        upsert_repositories(1, [{"name": "a", "languages": ["Python"], "commit_summary": ["testing"]},
+                                {"name": "b", "languages": ["Python", "Go"]}])
+        rollups.index_users([1])
+        db.session.commit()
+        # user 2 backs up rust, user 1 drops a repo language
+        ResumeData.query.filter_by(user_id=2).one().supported_skills = ["python", "rust"]
+        upsert_repositories(1, [{"name": "b", "languages": ["Python"]}])
+        rollups.index_users([1, 2])
+        db.session.commit()
+        assert rollups.verify() == []
+
+    response = client.get("/analytics/gap")
+    assert response.status_code == 200
+    assert response.json == {"kind": "gap", "total": 2, "top": [{"name": "docker", "count": 1}]}
+    response = client.get("/analytics/language?limit=5")
+    assert response.json["total"] == 2
+    assert response.json["top"] == [{"name": "Python", "count": 2}]
+    assert client.get("/analytics/skill").json["top"][0] == {"name": "python", "count": 2}
+    assert client.get("/analytics/nope").status_code == 400
+
+
+def test_token_vault_cache_and_rotation(app, monkeypatch):
+    """
+    Tests that decrypted tokens are cached and wiped on eviction, and that rotate-tokens moves every token to a new key
+    """
+    small = TokenVault(keys=[Fernet.generate_key()], ttl=60, max_size=1)
+    first, second = small.encrypt("first"), small.encrypt("second")
+    assert small.decrypt(first) == "first" and small.decrypt(first) == "first"
+    assert (small.hits, small.misses) == (1, 1)
+    cached = small._cache[first][1]
+    assert small.decrypt(second) == "second"
+    assert first not in small._cache and cached == bytes(len("first"))
+
+    with app.app_context():
+        db.session.add_all(User(github_username = f"user{i}", access_token = f"token{i}") for i in range(3))
+        db.session.commit()
+        new_key = Fernet.generate_key().decode()
+        monkeypatch.setenv("ENCRYPTION_KEYS", f"{new_key},{os.environ['ENCRYPTION_KEY']}")
+        token_vault.init_app(app)
+        result = app.test_cli_runner().invoke(rotate_tokens_command, ["--batch-size", "2"])
+        assert "re-encrypted 3 access tokens" in result.output
+
+        only_new = TokenVault(keys=[new_key])
+        assert [only_new.decrypt(user._access_token) for user in User.query.order_by(User.id)] == ["token0", "token1", "token2"]
+        assert db.session.get(User, 2).access_token == "token1"
+
+
+def test_metrics_endpoint(client, app, monkeypatch, caplog):
+    """
+    Tests that route, SQL and stage timings and the folded in stats are exposed, and that trace lines are logged
+    """
+    monkeypatch.setattr(metrics, "tracing", True)
+    with caplog.at_level("INFO", logger="skillsync.trace"):
+        assert client.get("/users?limit=5").status_code == 200
+    trace = json.loads(caplog.records[-1].getMessage())
+    assert trace["endpoint"] == "main.all_user" and trace["status"] == 200 and trace["sql_queries"] >= 1
+
+    with metrics.timer("resume_parse"):
+        pass
+    response = client.get("/metrics")
+    assert response.mimetype == "text/plain"
+    text = response.get_data(as_text=True)
+    assert 'skillsync_request_seconds_count{endpoint="main.all_user",method="GET",status="200"}' in text
+    assert 'skillsync_stage_seconds_bucket{stage="resume_parse",le="+Inf"}' in text
+    assert "skillsync_sql_seconds_count " in text
+    assert "skillsync_github_requests " in text and "skillsync_recommendations_hits " in text
+
+
+def test_sql_timing_survives_failed_statements(app):
+    """
+    Tests that a failed statement isn't timed and leaves nothing behind for the next one on its connection
+    """
+    def sql_count():
+        return sum(count for _, _, count in metrics.SQL_SECONDS.snapshot().values())
+
+    with app.app_context():
+        connection = db.session.connection()
+        before = sql_count()
+        with pytest.raises(Exception):
+            connection.exec_driver_sql("SELECT * FROM no_such_table")
+        db.session.rollback()
+        assert sql_count() == before
+        db.session.execute(db.text("SELECT 1"))
+        assert sql_count() == before + 1
+        assert not db.session.connection().info.get("query_start")
+
+
+def test_github_graphql_matches_rest(app):
+    """
+    Tests that the GraphQL fetch mode writes the same repository rows as REST, first sync and re-sync, against the
+    local fake GitHub server, in far fewer requests
+    """
+    def sync(mode):
+        app.config["GITHUB_FETCH_MODE"] = mode
+        before = fake.request_count
+        github_handler("octocat", "TPAB")
+        columns = [column for column in Repository.__table__.columns if column.name != "id"]
+        rows = {row.name: row._asdict() for row in db.session.execute(db.select(*columns))}
+        return rows, fake.request_count - before
+
+    with FakeGitHub(repos=7, commits=230, latency=0) as fake, app.app_context():
+        app.config["GITHUB_API_URL"] = fake.url
+        app.config["GITHUB_GRAPHQL_BATCH"] = 3
+        db.session.add(User(github_username = "octocat", access_token = "TPAB"))
+        db.session.commit()
+        results = {}
+        for mode in ("rest", "graphql"):
+            first, first_requests = sync(mode)
+            fake.commits = 240
+            resync, resync_requests = sync(mode)
+            results[mode] = (first, resync, first_requests, resync_requests)
+            fake.commits = 230
+            Repository.query.delete()
+            db.session.commit()
+
+        rest, graphql = results["rest"], results["graphql"]
+        assert len(rest[0]) == 7 and rest[0]["repo-0"]["last_commit_sha"] == "repo-0-00000230"
+        assert graphql[:2] == rest[:2]
+        # REST: repo list, 3 commit pages and languages per repo. GraphQL: repo list and 3 pages of 3 batches
+        assert (rest[2], graphql[2]) == (29, 10)
+
+
+def test_github_graphql_failed_page_keeps_high_water_mark(app):
+    """
+    Tests that a GraphQL sync failing on a later commits page leaves the repo's last commit alone, so a retry
+    counts the commits it missed
+    """
+    def stored():
+        columns = [column for column in Repository.__table__.columns if column.name != "id"]
+        return db.session.execute(db.select(*columns)).one()._asdict()
+
+    with FakeGitHub(repos=1, commits=50, latency=0) as fake, app.app_context():
+        app.config.update(GITHUB_API_URL=fake.url, GITHUB_FETCH_MODE="graphql")
+        db.session.add(User(github_username = "octocat", access_token = "TPAB"))
+        db.session.commit()
+        github_handler("octocat", "TPAB")
+        first = stored()
+
+        answer = fake.graphql
+
+        def failing(query, variables, authorization=None):
+            body = answer(query, variables, authorization)
+            if variables.get("after0"):
+                body["data"]["r0"] = None
+            return body
+
+        fake.commits = 250
+        fake.graphql = failing
+        github_handler("octocat", "TPAB")
+        assert stored() == first and first["last_commit_sha"] == "repo-0-00000050"
+
+        fake.graphql = answer
+        github_handler("octocat", "TPAB")
+        retried = stored()
+        assert retried["last_commit_sha"] == "repo-0-00000250"
+
+        Repository.query.delete()
+        db.session.commit()
+        app.config["GITHUB_FETCH_MODE"] = "rest"
+        github_handler("octocat", "TPAB")
+        assert retried == stored()
+
+
+def test_github_paginated_capped_author_only(app):
+    """
+    Tests that syncs read every page of the repo list and, with GITHUB_MAX_COMMITS and GITHUB_AUTHOR_ONLY, only
+    the user's newest commits, the same in both fetch modes
+    """
+    with FakeGitHub(repos=105, commits=10, latency=0) as fake, app.app_context():
+        app.config.update(GITHUB_API_URL=fake.url, GITHUB_MAX_COMMITS=4, GITHUB_AUTHOR_ONLY=True)
+        db.session.add(User(github_username = "octocat", access_token = "token-octocat"))
+        db.session.commit()
+        results = {}
+        for mode in ("rest", "graphql"):
+            app.config["GITHUB_FETCH_MODE"] = mode
+            github_handler("octocat", "token-octocat")
+            columns = [column for column in Repository.__table__.columns if column.name != "id"]
+            results[mode] = {row.name: row._asdict() for row in db.session.execute(db.select(*columns))}
+            Repository.query.delete()
+            db.session.commit()
+
+        rest = results["rest"]
+        assert len(rest) == 105 and results["graphql"] == rest
+        # commit 10 is the collaborator's, so the newest of the user's is 9
+        assert rest["repo-0"]["last_commit_sha"] == "repo-0-00000009"
+        assert max(rest["repo-0"]["topic_counts"].values()) <= 4
+
+
+def test_github_webhooks(app, client):
+    """
+    Tests that signed push and repository webhooks update only their repo, that a run of queued pushes is applied
+    with one request, and that redelivered or already counted pushes change nothing
+    """
+    fixtures = os.path.join(os.path.dirname(__file__), "fixtures", "webhooks")
+
+    def load(name):
+        with open(os.path.join(fixtures, name), "rb") as f:
+            return f.read()
+
+    def post(name, event="push", delivery=None, secret="s3cret"):
+        body = load(name)
+        return client.post("/github/webhook", data=body, headers={
+            "Content-Type": "application/json", "X-GitHub-Event": event, "X-GitHub-Delivery": delivery or name,
+            "X-Hub-Signature-256": webhooks.sign(secret, body)})
+
+    with FakeGitHub(repos=2, commits=10, latency=0) as fake:
+        app.config.update(GITHUB_API_URL=fake.url, GITHUB_WEBHOOK_SECRET="s3cret")
+        user = User(github_username = "octocat", access_token = "token-octocat")
+        db.session.add(user)
+        db.session.commit()
+        github_handler("octocat", "token-octocat")
+        untouched = Repository.query.filter_by(name="repo-1").one().serialize()
+        topic_counts = Repository.query.filter_by(name="repo-0").one().topic_counts
+
+        pushes = [json.loads(load("push.json")), json.loads(load("push_followup.json"))]
+        for i, payload in enumerate(pushes):
+            webhooks.record(f"queued-{i}", "push", user.id, "repo-0", payload)
+        before = fake.request_count
+        assert webhooks.process_repo(user.id, "repo-0") == 2
+        # only the languages are fetched
+        assert fake.request_count - before == 1
+        repo = Repository.query.filter_by(name="repo-0").one()
+        messages = [commit["message"] for payload in pushes for commit in payload["commits"]]
+        expected = Counter(topic_counts) + Counter(summarize_commits(messages)[0])
+        assert repo.topic_counts == dict(expected) and repo.commit_summary == sorted(expected)
+        assert (repo.last_commit_sha, repo.last_commit_date) == (pushes[1]["after"], "2025-03-01T15:05:31Z")
+
+        assert post("push.json", secret="wrong").status_code == 401
+        assert post("push.json", delivery="redelivered").status_code == 202
+        assert post("push.json", delivery="redelivered").json["message"] == "already received"
+        assert Repository.query.filter_by(name="repo-0").one().topic_counts == dict(expected)
+        assert fake.request_count - before == 1
+
+        assert post("repository_renamed.json", "repository").status_code == 202
+        assert Repository.query.filter_by(name="skillsync-api").one().topic_counts == dict(expected)
+        assert post("repository_deleted.json", "repository").status_code == 202
+        assert {repo.name for repo in Repository.query} == {"repo-1"}
+        assert Repository.query.filter_by(name="repo-1").one().serialize() == untouched
+
+
+def test_webhook_deliveries_not_lost(app):
+    """
+    Tests that a delivery arriving while its repo's job runs gets a job of its own, and that the sweep applies
+    deliveries and starts queued jobs that were lost, e.g. to a restart
+    """
+    user = User(github_username = "octocat", access_token = "TPAB")
+    db.session.add(user)
+    db.session.commit()
+    upsert_repositories(user.id, [{"name": "repo-0", "description": "old"}])
+    db.session.commit()
+
+    def edited(description):
+        return {"action": "edited", "repository": {"name": "repo-0", "description": description}}
+
+    running = Job(kind="github_webhook", dedupe_key=f"github_webhook:{user.id}:repo-0", status="queued",
+                  payload={"user_id": user.id, "repo_name": "repo-0"})
+    db.session.add(running)
+    db.session.commit()
+    assert jobs._claim(running.id) and not jobs._claim(running.id)
+    webhooks.record("during-run", "repository", user.id, "repo-0", edited("during run"))
+    job = webhooks.queue(user.id, "repo-0")
+    assert job.id != running.id and job.status == "done"
+    assert Repository.query.filter_by(name="repo-0").one().description == "during run"
+
+    # a delivery whose job went away, and a queued job whose timer did
+    db.session.add(WebhookEvent(delivery_id="lost", event="repository", user_id=user.id, repo_name="repo-0",
+                                payload=edited("lost event"), received_at=datetime(2020, 1, 1)))
+    lost_job = Job(kind="github_webhook", dedupe_key="github_webhook:other", status="queued",
+                   payload={"user_id": user.id, "repo_name": "repo-1"}, updated_at=datetime(2020, 1, 1))
+    db.session.add(lost_job)
+    db.session.commit()
+    jobs.sweep()
+    assert Repository.query.filter_by(name="repo-0").one().description == "lost event"
+    assert db.session.get(Job, lost_job.id).status == "done"
+    assert WebhookEvent.query.filter(WebhookEvent.processed_at.is_(None)).count() == 0
+
+
+def test_pdf_timeout_only_kills_its_own_worker(tmp_path):
+    """
+    Tests that a PDF that hangs (a FIFO nobody writes to) times out however short it is, while another PDF is
+    extracted at the same time and afterwards
+    """
+    import fitz
+    import threading
+    pdf = fitz.open()
+    for i in range(20):
+        pdf.new_page().insert_text((72, 72), f"page {i}")
+    pdf.save(str(tmp_path / "cv.pdf"))
+    os.mkfifo(tmp_path / "hang.pdf")
+    config = {"EXTRACT_TIMEOUT": 2, "EXTRACT_PROCESSES": 2}
+    extract_file(str(tmp_path / "cv.pdf"), config=config)
+
+    hung = []
+    thread = threading.Thread(target=lambda: hung.append(extract_file(str(tmp_path / "hang.pdf"), config=config)))
+    thread.start()
+    assert extract_file(str(tmp_path / "cv.pdf"), config=config).startswith("page 0")
+    thread.join(10)
+    assert hung == [""]
+    assert extract_file(str(tmp_path / "cv.pdf"), config=config).count("page") == 20